@@ -138,53 +138,108 @@ def main():
             # backend読み込み
             import sys
             sys.path.insert(0, str(Path(__file__).parent))
-            from backend import session_manager
-
-            # 利用可能なセッション一覧
-            sessions = session_manager.get_saved_sessions()
-            if sessions:
-                # 書籍名を抽出
-                book_names = set()
-                for session_path in sessions:
-                    filename = session_path.name
-                    if 'latest' in filename:
-                        book_name = filename.replace('session_', '').replace('_latest.json', '')
-                        book_names.add(book_name)
-
-                if book_names:
-                    selected_book = st.selectbox(
-                        "書籍を選択",
-                        sorted(book_names),
-                        key="restore_book_select"
-                    )
-
-                    if st.button("🔄 このセッションを復元", use_container_width=True):
-                        session_data = session_manager.load_session_state(selected_book, use_latest=True)
-                        if session_data:
-                            # session_stateに復元
-                            st.session_state.scenes = session_data.get('scenes', [])
-                            st.session_state.scene_images = {
-                                int(k): Path(v) for k, v in session_data.get('scene_images', {}).items()
+            from backend import session_manager, session_catalog
+
+            # 利用可能なセッション一覧（カタログから取得、更新が新しい順）
+            books = session_catalog.list_books()
+            if books:
+                book_info = {book['book']: book for book in books}
+
+                selected_book = st.selectbox(
+                    "書籍を選択",
+                    list(book_info.keys()),
+                    format_func=lambda name: (
+                        f"{name}（ステップ{book_info[name]['step']}・"
+                        f"画像{book_info[name]['num_images']}枚・音声{book_info[name]['num_audio']}件）"
+                    ),
+                    key="restore_book_select"
+                )
+
+                if st.button("🔄 このセッションを復元", use_container_width=True):
+                    session_data = session_manager.load_session_state(selected_book, use_latest=True)
+                    if session_data:
+                        # session_stateに復元
+                        st.session_state.scenes = session_data.get('scenes', [])
+                        st.session_state.scene_images = {
+                            int(k): Path(v) for k, v in session_data.get('scene_images', {}).items()
+                        }
+                        st.session_state.selected_scenario = session_data.get('selected_scenario')
+                        if 'scene_audio' in session_data:
+                            st.session_state.scene_audio = {
+                                int(k): Path(v) for k, v in session_data['scene_audio'].items()
                             }
-                            st.session_state.selected_scenario = session_data.get('selected_scenario')
-                            if 'scene_audio' in session_data:
-                                st.session_state.scene_audio = {
-                                    int(k): Path(v) for k, v in session_data['scene_audio'].items()
-                                }
-                            st.session_state.current_step = 4  # 音声・BGM設定へ
-
-                            st.success(f"✅ セッション復元完了: {selected_book}")
-                            st.info("画面4（音声・BGM設定）から再開できます")
-                            st.rerun()
-                        else:
-                            st.error("セッションの読み込みに失敗しました")
-                else:
-                    st.info("復元可能なセッションがありません")
+                        st.session_state.current_step = 4  # 音声・BGM設定へ
+
+                        st.success(f"✅ セッション復元完了: {selected_book}")
+                        st.info("画面4（音声・BGM設定）から再開できます")
+                        st.rerun()
+                    else:
+                        st.error("セッションの読み込みに失敗しました")
             else:
                 st.info("保存されたセッションがありません")
 
         st.markdown("---")
 
+        # API接続状態
+        with st.expander("🩺 API接続状態"):
+            st.caption("直近24時間のAPI呼び出しのレイテンシとエラー（画面・ジョブのワーカー・一括処理の全プロセス分）")
+
+            import sys
+            sys.path.insert(0, str(Path(__file__).parent))
+            from backend import api_clients
+
+            if st.button("📡 接続を確認", use_container_width=True):
+                for result in api_clients.check_health():
+                    if result['ok']:
+                        st.success(f"{result['service']}: {result['latency_ms']:.0f}ms")
+                    else:
+                        st.error(f"{result['service']}: {result['error']}")
+
+            stats = api_clients.client_stats()
+            if stats:
+                st.dataframe(
+                    [
+                        {
+                            "API": row['service'],
+                            "回数": row['calls'],
+                            "エラー": row['errors'],
+                            "p50(ms)": row['p50_ms'],
+                            "p95(ms)": row['p95_ms'],
+                            "最後のエラー": row['last_error'] or "",
+                        }
+                        for row in stats
+                    ],
+                    hide_index=True,
+                    use_container_width=True
+                )
+            else:
+                st.info("まだAPIを呼び出していません")
+
+            # レート制御（全プロセス共通）
+            from backend import rate_governor
+
+            usage = rate_governor.utilization()
+            if usage:
+                st.caption("レート制御（このマシンの全セッション・一括処理の合計、直近1分）")
+                st.dataframe(
+                    [
+                        {
+                            "API": row['key'],
+                            "上限(回/分)": row['limit_rpm'],
+                            "現在の許可(回/分)": row['rate_rpm'],
+                            "利用率": f"{row['utilization']:.0%}",
+                            "429": row['throttled'],
+                            "平均待ち(秒)": row['avg_wait_seconds'],
+                            "停止中(秒)": row['backoff_seconds'],
+                        }
+                        for row in usage
+                    ],
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+        st.markdown("---")
+
         if st.button("🔄 すべてリセット"):
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
@@ -1,26 +1,22 @@
 """
 Backend modules for book promotion video generation
+
+サブモジュールは最初に参照されたときに読み込む（`from backend import job_runner` で
+job_runner だけが読み込まれ、moviepy や google.generativeai などは必要になるまで読み込まない）。
 """
 
-from . import utils
-from . import epub_parser
-from . import book_analyzer
-from . import summary_generator
-from . import scenario_generator
-from . import scenario_generator_v2
-from . import scene_splitter
-from . import image_generator
-from . import image_generator_v2
-from . import session_manager
-from . import tts_engine
-from . import tts_engine_v2
-from . import video_renderer
-from . import bgm_manager
+import importlib
 
 __all__ = [
     'utils',
+    'workspace',
     'epub_parser',
     'book_analyzer',
+    'book_index',
+    'chunk_checkpoints',
+    'chunk_planner',
+    'extractive_summarizer',
+    'text_fingerprints',
     'summary_generator',
     'scenario_generator',
     'scenario_generator_v2',
@@ -28,8 +24,31 @@ __all__ = [
     'image_generator',
     'image_generator_v2',
     'session_manager',
+    'session_catalog',
+    'job_runner',
+    'api_clients',
+    'rate_governor',
+    'tracing',
+    'artifact_dag',
+    'batch_runner',
     'tts_engine',
     'tts_engine_v2',
+    'subtitle_generator',
+    'subtitle_aligner',
     'video_renderer',
+    'video_renderer_v2',
     'bgm_manager',
+    'bgm_manager_v2',
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+APIクライアントの共有モジュール（OpenAI / Gemini）
+
+プロセス内でクライアントを1つずつ作成して使い回す。呼び出しのたびにクライアントを作り直すと
+keep-alive の接続とTLSセッションが捨てられ、毎回接続からやり直しになるため。
+
+- get_openai_client(): openai.OpenAI（内部のHTTP接続プールを共有、タイムアウトを設定。
+  SDKの自動リトライは使わず、再試行は call() だけで行う）
+- get_gemini_model(): genai.configure は APIキーごとに1回だけ行い、GenerativeModel をモデル名ごとに共有。
+  generate_content() にはタイムアウトとレート制御を付け、所要時間を記録する
+- get_http_session(): requests.Session（生成画像のダウンロードなど、接続を使い回す）
+- call(): レート制御（rate_governor）の枠を取ってから呼び出し、429なら待って再試行する
+- track(): 呼び出しの所要時間・エラーを記録する（data/internal/api_stats.sqlite3。
+  ジョブのワーカーなど別プロセスでの呼び出しも同じ場所に記録する）
+- client_stats() / check_health(): 接続状態とレイテンシの確認（全プロセス分）
+
+タイムアウトなどは CLIENT_SETTINGS の既定値を、環境変数（OPENAI_TIMEOUT など）または configure() で変更できる。
+
+使い方:
+    client = api_clients.get_openai_client()
+    response = api_clients.call("openai.tts", client.audio.speech.create, model=..., input=...)
+
+    model = api_clients.get_gemini_model("gemini-2.5-flash-lite")
+    response = model.generate_content(prompt, generation_config={...})
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterator, Callable
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from . import rate_governor
+from .utils import get_project_root
+
+load_dotenv()
+
+# 既定の設定（環境変数で上書き可能）
+CLIENT_SETTINGS = {
+    "openai_timeout": 120.0,         # OpenAI: 1リクエストのタイムアウト（秒）
+    "openai_connect_timeout": 10.0,  # OpenAI: 接続のタイムアウト（秒）
+    "gemini_timeout": 300.0,         # Gemini: 1リクエストのタイムアウト（秒）
+    "http_timeout": 60.0,            # 画像のダウンロードなど: 1リクエストのタイムアウト（秒）
+    "http_pool_size": 16,            # 画像のダウンロードなど: ホストごとに保持する接続数
+    "rate_limit_retries": 5,         # call(): 429のときの再試行回数
+}
+
+_ENV_NAMES = {
+    "openai_timeout": "OPENAI_TIMEOUT",
+    "openai_connect_timeout": "OPENAI_CONNECT_TIMEOUT",
+    "gemini_timeout": "GEMINI_TIMEOUT",
+    "http_timeout": "HTTP_TIMEOUT",
+    "http_pool_size": "HTTP_POOL_SIZE",
+    "rate_limit_retries": "RATE_LIMIT_RETRIES",
+}
+
+# レイテンシの統計に使う直近の呼び出し数
+LATENCY_WINDOW = 200
+# 呼び出しの記録を残す期間（秒）
+STATS_RETENTION = 24 * 3600
+
+_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    service TEXT NOT NULL,
+    at REAL NOT NULL,
+    seconds REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_service_at ON calls (service, at);
+"""
+
+_lock = threading.Lock()
+_overrides: Dict[str, Any] = {}
+_openai_clients: Dict[tuple, Any] = {}
+_gemini_models: Dict[tuple, "GeminiModel"] = {}
+_gemini_configured_key: Optional[str] = None
+_http_session = None
+_stats_schema_ready: set = set()
+
+
+def get_setting(name: str) -> Any:
+    """
+    設定値を取得（configure() → 環境変数 → 既定値の順）
+
+    Args:
+        name: CLIENT_SETTINGS のキー
+
+    Returns:
+        設定値（既定値と同じ型）
+    """
+    if name in _overrides:
+        return _overrides[name]
+    default = CLIENT_SETTINGS[name]
+    value = os.getenv(_ENV_NAMES[name])
+    if value is None or value == "":
+        return default
+    try:
+        return type(default)(value)
+    except ValueError:
+        print(f"⚠️ 環境変数 {_ENV_NAMES[name]} の値が不正です（{value}）。既定値 {default} を使います")
+        return default
+
+
+def configure(**settings: Any) -> None:
+    """
+    設定を変更（作成済みのクライアントは破棄され、次の取得時に新しい設定で作り直す）
+
+    Args:
+        **settings: CLIENT_SETTINGS のキーと値（例: openai_timeout=60）
+    """
+    unknown = set(settings) - set(CLIENT_SETTINGS)
+    if unknown:
+        raise ValueError(f"不明な設定: {', '.join(sorted(unknown))}")
+    with _lock:
+        _overrides.update(settings)
+    reset_clients()
+
+
+def reset_clients() -> None:
+    """作成済みのクライアントを破棄"""
+    global _gemini_configured_key, _http_session
+    with _lock:
+        clients = list(_openai_clients.values())
+        if _http_session is not None:
+            clients.append(_http_session)
+        _openai_clients.clear()
+        _gemini_models.clear()
+        _gemini_configured_key = None
+        _http_session = None
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+
+
+def _require_key(env_name: str) -> str:
+    api_key = os.getenv(env_name)
+    if not api_key:
+        raise ValueError(f"{env_name}環境変数が設定されていません")
+    return api_key
+
+
+# ---------------------------------------------------------------------------
+# OpenAI
+# ---------------------------------------------------------------------------
+
+def get_openai_client():
+    """
+    共有の OpenAI クライアントを取得
+
+    同じAPIキーなら同じクライアントを返す（HTTP接続プールを共有するため、
+    スレッドから同時に使ってよい）。
+
+    SDKの自動リトライは無効にする（max_retries=0）。SDKのリトライは rate_governor を通らず、
+    call() の再試行と掛け合わさって429のときの試行回数が増えるため。
+
+    Returns:
+        openai.OpenAI
+
+    Raises:
+        ValueError: OPENAI_API_KEY が設定されていない場合
+    """
+    import openai
+
+    api_key = _require_key("OPENAI_API_KEY")
+    # openai.OpenAI も含めるのは、差し替え（ベンチマークの偽クライアント）を反映するため
+    cache_key = (openai.OpenAI, api_key)
+    with _lock:
+        client = _openai_clients.get(cache_key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=api_key,
+                timeout=openai.Timeout(get_setting("openai_timeout"), connect=get_setting("openai_connect_timeout")),
+                max_retries=0,  # 再試行は call() で行う
+            )
+            _openai_clients[cache_key] = client
+    return client
+
+
+# ---------------------------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------------------------
+
+class GeminiModel:
+    """
+    共有の GenerativeModel（generate_content にタイムアウトとレート制御を付け、所要時間を記録する）
+
+    Attributes:
+        model_name: モデル名
+        model: genai.GenerativeModel
+    """
+
+    def __init__(self, model_name: str, model):
+        self.model_name = model_name
+        self.model = model
+
+    def generate_content(self, *args, **kwargs):
+        """GenerativeModel.generate_content と同じ（request_options を省略した場合はタイムアウトを設定）"""
+        kwargs.setdefault("request_options", {"timeout": get_setting("gemini_timeout")})
+        return call(f"gemini.{self.model_name}", self.model.generate_content, *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.model, name)
+
+
+def get_gemini_model(model_name: str = "gemini-2.5-flash-lite") -> GeminiModel:
+    """
+    共有の Gemini モデルを取得
+
+    genai.configure はAPIキーが変わったときだけ行い、モデルはモデル名ごとに使い回す。
+
+    Args:
+        model_name: モデル名
+
+    Returns:
+        GeminiModel
+
+    Raises:
+        ValueError: GOOGLE_API_KEY が設定されていない場合
+    """
+    global _gemini_configured_key
+    import google.generativeai as genai
+
+    api_key = _require_key("GOOGLE_API_KEY")
+    cache_key = (genai.GenerativeModel, api_key, model_name)
+    with _lock:
+        model = _gemini_models.get(cache_key)
+        if model is None:
+            if _gemini_configured_key != api_key:
+                genai.configure(api_key=api_key)
+                _gemini_configured_key = api_key
+            model = GeminiModel(model_name, genai.GenerativeModel(model_name))
+            _gemini_models[cache_key] = model
+    return model
+
+
+# ---------------------------------------------------------------------------
+# HTTP（生成画像のダウンロードなど）
+# ---------------------------------------------------------------------------
+
+def get_http_session():
+    """
+    共有の requests.Session を取得（接続プール付き）
+
+    Returns:
+        requests.Session
+    """
+    global _http_session
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _lock:
+        if _http_session is None:
+            session = requests.Session()
+            pool_size = get_setting("http_pool_size")
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+    return _http_session
+
+
+def http_get(url: str, **kwargs):
+    """
+    共有セッションでGET（タイムアウトを省略した場合は http_timeout、所要時間を記録）
+
+    Args:
+        url: URL
+        **kwargs: requests.Session.get の引数
+
+    Returns:
+        requests.Response
+    """
+    kwargs.setdefault("timeout", get_setting("http_timeout"))
+    with track("http.get"):
+        response = get_http_session().get(url, **kwargs)
+        response.raise_for_status()
+    return response
+
+
+# ---------------------------------------------------------------------------
+# レイテンシ・エラーの記録
+# ---------------------------------------------------------------------------
+
+def get_stats_db_path() -> Path:
+    """呼び出しの記録を保存するファイルのパス"""
+    return get_project_root() / "data" / "internal" / "api_stats.sqlite3"
+
+
+@contextmanager
+def _connect_stats():
+    """呼び出しの記録に接続（スキーマの作成はプロセスごとに1回）"""
+    db_path = get_stats_db_path()
+    if not db_path.exists():
+        # 削除された場合は作り直す
+        _stats_schema_ready.discard(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    try:
+        if db_path not in _stats_schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_STATS_SCHEMA)
+            _stats_schema_ready.add(db_path)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _record(service: str, seconds: float, error: Optional[BaseException]) -> None:
+    now = time.time()
+    message = f"{type(error).__name__}: {error}"[:300] if error is not None else None
+    try:
+        with _connect_stats() as conn:
+            conn.execute(
+                "INSERT INTO calls (service, at, seconds, error) VALUES (?, ?, ?, ?)",
+                (service, now, seconds, message)
+            )
+            conn.execute("DELETE FROM calls WHERE service = ? AND at < ?", (service, now - STATS_RETENTION))
+    except sqlite3.Error as e:
+        # 記録できなくてもAPIの呼び出し自体は失敗させない
+        print(f"  ⚠️ API呼び出しの記録に失敗しました: {e}")
+
+
+@contextmanager
+def track(service: str) -> Iterator[None]:
+    """
+    APIの呼び出しを計測（client_stats() に反映）
+
+    Args:
+        service: サービス名（例: "openai.images", "openai.tts"）
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _record(service, time.perf_counter() - start, error)
+
+
+def call(service: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    レート制御の枠を取ってから func を呼び出す
+
+    429（レート制限）の場合は rate_governor に報告し（全プロセスの許可レートが下がる）、
+    待ってから rate_limit_retries 回まで再試行する。
+
+    Args:
+        service: サービス名（レート制御のキー。例: "openai.images"）
+        func: 呼び出す関数（例: client.images.generate）
+        *args, **kwargs: func の引数
+
+    Returns:
+        func の戻り値
+    """
+    retries = get_setting("rate_limit_retries")
+    attempt = 0
+    while True:
+        rate_governor.acquire(service)
+        try:
+            with track(service):
+                result = func(*args, **kwargs)
+        except Exception as e:
+            if not rate_governor.is_rate_limit_error(e):
+                raise
+            backoff = rate_governor.report_rate_limited(service, rate_governor.retry_after_seconds(e))
+            if attempt >= retries:
+                raise
+            attempt += 1
+            print(f"  ⏳ {service}: レート制限（429）のため{backoff:.1f}秒待って再試行します（{attempt}/{retries}）")
+            continue
+        rate_governor.report_success(service)
+        return result
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _format_time(at: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(at).isoformat(timespec='seconds') if at is not None else None
+
+
+def client_stats() -> List[Dict[str, Any]]:
+    """
+    API呼び出しの統計（ジョブのワーカーなど、このホストの全プロセス分）
+
+    Returns:
+        [{'service', 'calls', 'errors', 'error_rate', 'p50_ms', 'p95_ms', 'max_ms',
+          'last_success_at', 'last_error_at', 'last_error'}, ...]（サービス名順）
+        回数は直近 STATS_RETENTION 秒、レイテンシは直近 LATENCY_WINDOW 回の呼び出しから計算
+    """
+    if not get_stats_db_path().exists():
+        return []
+
+    since = time.time() - STATS_RETENTION
+    rows = []
+    with _connect_stats() as conn:
+        services = conn.execute(
+            """
+            SELECT service, COUNT(*), COUNT(error),
+                   MAX(CASE WHEN error IS NULL THEN at END), MAX(CASE WHEN error IS NOT NULL THEN at END)
+            FROM calls WHERE at >= ? GROUP BY service ORDER BY service
+            """,
+            (since,)
+        ).fetchall()
+        for service, calls, errors, last_success_at, last_error_at in services:
+            latencies = [
+                seconds for (seconds,) in conn.execute(
+                    "SELECT seconds FROM calls WHERE service = ? AND at >= ? ORDER BY at DESC LIMIT ?",
+                    (service, since, LATENCY_WINDOW)
+                )
+            ]
+            last_error = None
+            if last_error_at is not None:
+                last_error = conn.execute(
+                    "SELECT error FROM calls WHERE service = ? AND at = ? AND error IS NOT NULL",
+                    (service, last_error_at)
+                ).fetchone()[0]
+            rows.append({
+                "service": service,
+                "calls": calls,
+                "errors": errors,
+                "error_rate": round(errors / calls, 3) if calls else 0.0,
+                "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+                "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+                "max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+                "last_success_at": _format_time(last_success_at),
+                "last_error_at": _format_time(last_error_at),
+                "last_error": last_error,
+            })
+    return rows
+
+
+def reset_stats() -> None:
+    """統計を消去"""
+    if not get_stats_db_path().exists():
+        return
+    with _connect_stats() as conn:
+        conn.execute("DELETE FROM calls")
+
+
+def check_health(services: tuple = ("openai", "gemini")) -> List[Dict[str, Any]]:
+    """
+    各APIに軽いリクエスト（モデル情報の取得）を送って接続を確認
+
+    共有クライアントを使うため、2回目以降は接続の再利用後のレイテンシになる。
+
+    Args:
+        services: 確認するサービス（"openai" / "gemini"）
+
+    Returns:
+        [{'service', 'ok', 'latency_ms', 'error'}, ...]
+    """
+    results = []
+    for service in services:
+        start = time.perf_counter()
+        try:
+            if service == "openai":
+                with track("openai.health"):
+                    get_openai_client().models.retrieve("tts-1")
+            elif service == "gemini":
+                import google.generativeai as genai
+                get_gemini_model()
+                with track("gemini.health"):
+                    genai.get_model("models/gemini-2.5-flash-lite", request_options={"timeout": get_setting("gemini_timeout")})
+            else:
+                raise ValueError(f"不明なサービス: {service}")
+            results.append({
+                "service": service,
+                "ok": True,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                "error": None,
+            })
+        except Exception as e:
+            results.append({
+                "service": service,
+                "ok": False,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                "error": f"{type(e).__name__}: {e}"[:300],
+            })
+    return results
+
+
+def _after_fork_in_child() -> None:
+    # fork した子プロセスに親の接続（gRPCのチャネルなど）とロックの状態を引き継がない
+    global _lock, _gemini_configured_key, _http_session
+    _lock = threading.Lock()
+    _openai_clients.clear()
+    _gemini_models.clear()
+    _gemini_configured_key = None
+    _http_session = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
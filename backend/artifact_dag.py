@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+成果物DAGモジュール（コンテンツアドレス方式）
+
+パイプラインの各ステージの成果物を「入力とパラメータのハッシュ」をキーとして
+data/artifacts/ に保存する。
+
+- 各成果物は上流の成果物のキー（deps）とパラメータからキーが決まるため、
+  上流が変わると下流のキーも変わり、影響を受けるノードだけが再計算される
+- 同じキーの成果物があれば（ファイルが残っていれば）計算せずに再利用する
+- 成果物が生成したファイル（計算結果に含まれるパスのうち output_dir 以下のもの）は
+  成果物ディレクトリにコピーして保持する（ワークスペースのファイルが上書き・削除されても成果物は変わらない）
+- 保存先は全実行で共有するため、別の実行IDや別のワークスペースの成果物も再利用される
+
+使い方:
+    analysis = artifact_dag.compute("analyze", {"epub": file_digest(epub)}, lambda: ...)
+    scenarios = artifact_dag.compute("scenarios", {}, lambda: ..., deps=[analysis])
+    image = artifact_dag.compute("image", {...}, lambda: ..., output_dir=workspace.output_dir)
+"""
+
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable, Iterable, Union
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from .utils import get_project_root, load_json, save_json
+
+# キーの計算方法を変えた場合に上げる
+DAG_VERSION = 1
+
+_digest_cache: Dict[tuple, str] = {}
+_digest_lock = threading.Lock()
+
+
+class Artifact(dict):
+    """
+    成果物（compute() の戻り値）
+
+    Keys:
+        key: 成果物のキー
+        node: ノード名（ステージ名）
+        value: 計算結果（JSONに保存できる値）
+        deps: 上流の成果物のキー
+        files: 成果物が保持するファイルのパス
+        cached: 再利用した場合True
+    """
+
+    @property
+    def key(self) -> str:
+        return self['key']
+
+    @property
+    def value(self) -> Any:
+        return self['value']
+
+
+def get_artifacts_dir() -> Path:
+    """成果物の保存先"""
+    return get_project_root() / "data" / "artifacts"
+
+
+def file_digest(file_path: Union[str, Path]) -> str:
+    """
+    ファイル内容のSHA-256（同じファイルはサイズ・更新日時が変わるまでメモリにキャッシュ）
+
+    Args:
+        file_path: ファイルパス
+
+    Returns:
+        16進ダイジェスト
+    """
+    path = Path(file_path)
+    stat = path.stat()
+    cache_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+    with _digest_lock:
+        if cache_key in _digest_cache:
+            return _digest_cache[cache_key]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        _digest_cache[cache_key] = digest
+    return digest
+
+
+def artifact_key(node: str, params: Dict[str, Any], deps: Iterable[str] = (), version: int = 1) -> str:
+    """
+    成果物のキーを計算
+
+    Args:
+        node: ノード名
+        params: パラメータ（JSONに変換できる値。ファイルは file_digest() で内容のハッシュにしておく）
+        deps: 上流の成果物のキー
+        version: ノードの処理内容のバージョン（処理を変えたら上げる）
+
+    Returns:
+        キー（16進文字列）
+    """
+    key_source = {
+        "dag_version": DAG_VERSION,
+        "node": node,
+        "version": version,
+        "params": params,
+        "deps": sorted(deps),
+    }
+    serialized = json.dumps(key_source, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:32]
+
+
+def _record_file(node: str, key: str) -> Path:
+    return get_artifacts_dir() / node / key[:2] / f"{key}.json"
+
+
+def _files_dir(node: str, key: str) -> Path:
+    return get_artifacts_dir() / node / key[:2] / key
+
+
+def get_artifact(node: str, key: str) -> Optional[Artifact]:
+    """
+    保存済みの成果物を取得（ファイルが欠けている場合はNone）
+
+    Args:
+        node: ノード名
+        key: 成果物のキー
+    """
+    record_file = _record_file(node, key)
+    if not record_file.exists():
+        return None
+
+    try:
+        record = load_json(record_file)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+    for file_info in record.get("files", []):
+        path = Path(file_info["path"])
+        if not path.exists() or path.stat().st_size != file_info["size"]:
+            return None
+
+    return Artifact(record, cached=True)
+
+
+def _store_file(src: Path, dst: Path) -> None:
+    """
+    ファイルを成果物ディレクトリにコピー（一時ファイル経由で置き換え）
+
+    ハードリンクにしないのは、ffmpeg や TTS の書き込みが既存ファイルをその場で
+    上書きするため、ワークスペース側の再生成で成果物まで書き換わってしまうから。
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _collect_files(value: Any, output_dir: Path) -> List[str]:
+    """
+    計算結果に含まれる、output_dir 以下の既存ファイルのパス（文字列）を集める
+
+    入力のEPUBや抽出したテキストなど、出力先の外のファイルは成果物に含めない。
+    """
+    if isinstance(value, Path):
+        value = str(value)
+    if isinstance(value, str):
+        if (len(value) < 1024 and os.path.isabs(value) and os.path.isfile(value)
+                and Path(value).resolve().is_relative_to(output_dir)):
+            return [value]
+        return []
+    if isinstance(value, dict):
+        return [path for item in value.values() for path in _collect_files(item, output_dir)]
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in _collect_files(item, output_dir)]
+    return []
+
+
+def _replace_paths(value: Any, mapping: Dict[str, str]) -> Any:
+    """計算結果内のファイルパスを成果物ディレクトリのパスに置き換える"""
+    if isinstance(value, Path):
+        value = str(value)
+    if isinstance(value, str):
+        return mapping.get(value, value)
+    if isinstance(value, dict):
+        return {k: _replace_paths(v, mapping) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_paths(v, mapping) for v in value]
+    return value
+
+
+def compute(
+    node: str,
+    params: Dict[str, Any],
+    func: Callable[[], Any],
+    deps: Iterable[Union[Artifact, str]] = (),
+    version: int = 1,
+    force: bool = False,
+    output_dir: Optional[Path] = None
+) -> Artifact:
+    """
+    成果物を取得（保存済みなら再利用、なければ計算して保存）
+
+    Args:
+        node: ノード名（例: "analyze", "image"）
+        params: このノードのパラメータ
+        func: 成果物を計算する関数（引数なし）
+        deps: 上流の成果物（Artifact またはキー）
+        version: ノードの処理内容のバージョン
+        force: True の場合、保存済みでも再計算する
+        output_dir: このノードが生成するファイルの出力先。戻り値に含まれる絶対パスのうち
+            このディレクトリ以下のファイルは成果物ディレクトリにコピーされ、戻り値中のパスも
+            置き換えられる（Noneの場合はファイルを保持しない）
+
+    Returns:
+        Artifact
+    """
+    dep_keys = [dep.key if isinstance(dep, Artifact) else dep for dep in deps]
+    key = artifact_key(node, params, dep_keys, version)
+
+    if not force:
+        cached = get_artifact(node, key)
+        if cached is not None:
+            print(f"  ♻️ 成果物を再利用: {node} ({key[:12]})")
+            return cached
+
+    value = func()
+
+    # 生成されたファイルを成果物ディレクトリに保持
+    files_dir = _files_dir(node, key)
+    mapping = {}
+    files = []
+    collected = _collect_files(value, Path(output_dir).resolve()) if output_dir is not None else []
+    for index, src in enumerate(dict.fromkeys(collected)):
+        src_path = Path(src)
+        dst = files_dir / f"{index:03d}_{src_path.name}"
+        _store_file(src_path, dst)
+        mapping[src] = str(dst)
+        files.append({"path": str(dst), "size": dst.stat().st_size})
+
+    record = {
+        "key": key,
+        "node": node,
+        "version": version,
+        "params": params,
+        "deps": dep_keys,
+        "value": _replace_paths(value, mapping),
+        "files": files,
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+    }
+    save_json(_record_file(node, key), record, indent=None)
+
+    return Artifact(record, cached=False)
+
+
+def lineage(node: str, key: str) -> List[Dict[str, Any]]:
+    """
+    成果物の上流をたどった一覧（自分自身を含む、上流が先）
+
+    Args:
+        node: ノード名
+        key: 成果物のキー
+
+    Returns:
+        [{'node', 'key', 'created_at', 'valid'}, ...]
+    """
+    index = {path.stem: path for path in get_artifacts_dir().glob("*/*/*.json")}
+    result = []
+    seen = set()
+
+    def visit(current_key: str, current_node: Optional[str]) -> None:
+        if current_key in seen:
+            return
+        seen.add(current_key)
+        record_path = _record_file(current_node, current_key) if current_node else index.get(current_key)
+        if record_path is None or not record_path.exists():
+            result.append({"node": current_node, "key": current_key, "created_at": None, "valid": False})
+            return
+        record = load_json(record_path)
+        for dep in record.get("deps", []):
+            visit(dep, None)
+        result.append({
+            "node": record["node"],
+            "key": current_key,
+            "created_at": record.get("created_at"),
+            "valid": get_artifact(record["node"], current_key) is not None,
+        })
+
+    visit(key, node)
+    return result
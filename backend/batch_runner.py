@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+一括処理モジュール（ヘッドレス）
+
+複数のEPUBについて、書籍分析 → シナリオ生成 → シーン分割 → 画像生成 → 音声生成 → 動画生成
+までをUIなしで実行する。
+
+- 書籍ごとに専用のワークスペース（data/jobs/<実行ID>-<書籍キー>/）を使い、複数冊を並列処理
+- API呼び出しを伴うステージは、全プロセス共通のセマフォで同時実行数を制限
+  （書籍分析は呼び出しを多数続けるため、セマフォを使わず呼び出しごとの rate_governor に任せる）
+- 各ステージの結果は成果物DAG（artifact_dag）に入力とパラメータのハッシュをキーとして保存し、
+  再実行時は変更の影響を受けるノードだけを再計算（画像・音声はシーン単位）
+- 使用した成果物のキーをワークスペースの batch_state.json に記録
+- 実行結果を data/batch/<実行ID>/report.json にまとめる（書籍ごとの計測は tracing のトレースIDで参照）
+"""
+
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, Optional, List, Callable, Union
+import csv
+import hashlib
+import json
+import multiprocessing
+import shutil
+import time
+import traceback
+
+from . import artifact_dag, tracing
+from .utils import get_project_root, load_json, save_json
+from .workspace import Workspace, get_workspace
+
+# 処理するステージ（順番に実行）
+STAGES = ["analyze", "scenarios", "select", "scenes", "images", "narration", "render"]
+
+# 外部API（Gemini / OpenAI）を呼び出すステージ（セマフォで同時実行数を制限）
+# analyze は数十回の呼び出しを続けるため、ステージ全体でセマフォの枠を持つと
+# 他の書籍の画像・音声生成が待たされる。呼び出しごとの rate_governor で制御する
+API_STAGES = {"scenarios", "scenes", "images", "narration"}
+
+# 書籍ごとの設定のデフォルト値
+DEFAULT_BOOK_SETTINGS = {
+    "summary_mode": "full",
+    "pattern_id": 1,
+    "aspect_ratio": "9:16",
+    "visual_style": "Cinematic",
+    "num_scenes": 5,
+    "voice": "nova",
+    "voice_model": "tts-1-hd",
+    "voice_speed": 1.2,
+    "bgm": None,
+    "bgm_volume": 0.15,
+    "subtitle_type": "normal",
+    "subtitle_output": "burn",
+    "use_ken_burns": False,
+    "transition_type": "クロスフェード",
+}
+
+STATE_FILE = "batch_state.json"
+
+
+def get_batch_dir(run_id: str) -> Path:
+    """実行ごとのレポート出力先"""
+    return get_project_root() / "data" / "batch" / run_id
+
+
+def _book_key(epub_path: Path) -> str:
+    """EPUBのパスから、ワークスペース名に使える書籍キーを作る"""
+    return hashlib.sha1(str(epub_path.resolve()).encode('utf-8')).hexdigest()[:10]
+
+
+def _book_workspace(run_id: str, epub_path: Path) -> Workspace:
+    return get_workspace(f"{run_id}-{_book_key(epub_path)}")
+
+
+def load_manifest(source: Path, defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    処理対象の書籍一覧を読み込む
+
+    Args:
+        source: EPUBを置いたディレクトリ、またはマニフェスト（.json / .jsonl / .csv）
+            マニフェストの各行は {"epub": パス, ...書籍ごとの設定} の形式。
+            相対パスはマニフェストのあるディレクトリを基準にする。
+        defaults: 全書籍に適用する設定（DEFAULT_BOOK_SETTINGSを上書き）
+
+    Returns:
+        [{'epub': 絶対パス, ...設定}, ...]
+    """
+    source = Path(source)
+    base_settings = {**DEFAULT_BOOK_SETTINGS, **(defaults or {})}
+
+    if source.is_dir():
+        entries = [{"epub": str(path)} for path in sorted(source.glob("*.epub"))]
+        base_dir = source
+    elif source.suffix == ".json":
+        entries = load_json(source)
+        if isinstance(entries, dict):
+            entries = entries.get("books", [])
+        base_dir = source.parent
+    elif source.suffix == ".jsonl":
+        with open(source, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        base_dir = source.parent
+    elif source.suffix == ".csv":
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            entries = [{k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(f)]
+        base_dir = source.parent
+    else:
+        raise ValueError(f"対応していない入力です（ディレクトリ / .json / .jsonl / .csv）: {source}")
+
+    books = []
+    for entry in entries:
+        if "epub" not in entry:
+            raise ValueError(f"マニフェストに epub がありません: {entry}")
+        settings = {**base_settings, **entry}
+        epub_path = Path(settings["epub"])
+        if not epub_path.is_absolute():
+            epub_path = base_dir / epub_path
+        settings["epub"] = str(epub_path.resolve())
+
+        # CSVの値は文字列なので型を揃える
+        for key in ("pattern_id", "num_scenes"):
+            settings[key] = int(settings[key])
+        for key in ("voice_speed", "bgm_volume"):
+            settings[key] = float(settings[key])
+        if isinstance(settings["use_ken_burns"], str):
+            settings["use_ken_burns"] = settings["use_ken_burns"].lower() in ("1", "true", "yes")
+
+        books.append(settings)
+
+    return books
+
+
+def _resolve_bgm(bgm: Optional[str]) -> Optional[Path]:
+    """BGM設定（ファイル名またはパス）をファイルパスに変換"""
+    if not bgm:
+        return None
+
+    path = Path(bgm)
+    if path.exists():
+        return path.resolve()
+
+    from .bgm_manager_v2 import list_available_bgm
+    for candidate in list_available_bgm():
+        if candidate.name == bgm or candidate.stem == bgm:
+            return candidate
+
+    raise FileNotFoundError(f"BGMファイルが見つかりません: {bgm}")
+
+
+def _guarded(api_semaphore, func: Callable[[], Any]) -> Callable[[], Any]:
+    """API呼び出しを全体の同時実行数の枠内で実行するようにfuncを包む"""
+    if api_semaphore is None:
+        return func
+
+    def run():
+        with api_semaphore:
+            return func()
+    return run
+
+
+def _compute_stage(
+    stage: str,
+    settings: Dict[str, Any],
+    artifacts: Dict[str, Any],
+    workspace: Workspace,
+    api_semaphore=None,
+    force: bool = False
+) -> Union[artifact_dag.Artifact, List[artifact_dag.Artifact]]:
+    """
+    1つのステージの成果物を取得（入力とパラメータが同じ成果物があれば再利用）
+
+    Args:
+        stage: ステージ名
+        settings: 書籍ごとの設定
+        artifacts: これまでのステージの成果物
+        workspace: 書籍のワークスペース
+        api_semaphore: API呼び出しの同時実行数を制限するセマフォ
+        force: True の場合、保存済みの成果物があっても再計算する
+
+    Returns:
+        Artifact（画像・音声はシーンごとの Artifact のリスト）
+    """
+    api = api_semaphore if stage in API_STAGES else None
+    from . import scenario_generator_v2  # scenarios・select の両方で使う
+
+    if stage == "analyze":
+        from . import book_analyzer
+        epub_path = Path(settings["epub"])
+        mode = settings.get("summary_mode", book_analyzer.DEFAULT_ANALYSIS_MODE)
+        params = {"epub": artifact_dag.file_digest(epub_path)}
+        if mode != book_analyzer.DEFAULT_ANALYSIS_MODE:
+            params["summary_mode"] = mode  # 既定のモードでは以前と同じキーにして保存済みの成果物を使う
+        return artifact_dag.compute(
+            "analyze",
+            params,
+            lambda: book_analyzer.analyze_book(
+                epub_path, workspace.raw_dir, workspace=workspace, mode=mode, reuse=not force
+            ),
+            force=force
+        )
+
+    if stage == "scenarios":
+        analysis = artifacts["analyze"].value
+
+        def generate():
+            patterns = scenario_generator_v2.generate_scenarios_from_summary(
+                book_name=analysis["book_name"],
+                summary=analysis["summary"],
+                target_audience=analysis.get("target_audience", ""),
+                book_type=analysis.get("book_type", "")
+            )
+            return {"book_name": analysis["book_name"], "patterns": patterns}
+
+        return artifact_dag.compute("scenarios", {}, _guarded(api, generate), deps=[artifacts["analyze"]], force=force)
+
+    if stage == "select":
+        scenarios = artifacts["scenarios"].value
+
+        def select():
+            # シナリオが再利用された場合もワークスペースに書き出してから選択する
+            scenario_generator_v2.save_scenarios(scenarios["book_name"], scenarios["patterns"], workspace=workspace)
+            return scenario_generator_v2.select_scenario(
+                settings["pattern_id"],
+                settings["aspect_ratio"],
+                settings["visual_style"],
+                settings["num_scenes"],
+                workspace=workspace
+            )
+
+        params = {key: settings[key] for key in ("pattern_id", "aspect_ratio", "visual_style", "num_scenes")}
+        return artifact_dag.compute("select", params, select, deps=[artifacts["scenarios"]], force=force)
+
+    if stage == "scenes":
+        from . import scene_splitter
+        scenario = artifacts["select"].value
+
+        def split():
+            scenes = scene_splitter.split_into_scenes(scenario, settings["num_scenes"])
+            scene_splitter.save_scenes(scenes, scenario["book_name"], workspace=workspace)
+            return scenes
+
+        return artifact_dag.compute(
+            "scenes", {"num_scenes": settings["num_scenes"]}, _guarded(api, split),
+            deps=[artifacts["select"]], force=force
+        )
+
+    if stage == "images":
+        # 画像はシーンごとの成果物（プロンプトが変わらないシーンは再利用）
+        from . import image_generator_v2
+        book_name = artifacts["select"].value["book_name"]
+        results = []
+        for scene in artifacts["scenes"].value:
+            params = {
+                "prompt": scene["image_prompt"],
+                "visual_style": settings["visual_style"],
+                "aspect_ratio": settings["aspect_ratio"],
+            }
+            generate = partial(
+                image_generator_v2.generate_image_for_scene,
+                scene["image_prompt"], book_name, scene["scene_number"],
+                settings["visual_style"], settings["aspect_ratio"], workspace
+            )
+            results.append(artifact_dag.compute(
+                "image", params, _guarded(api, lambda g=generate: str(g())),
+                force=force, output_dir=workspace.output_dir
+            ))
+        return results
+
+    if stage == "narration":
+        # 音声もシーンごとの成果物（ナレーションが変わらないシーンは再利用）
+        from . import tts_engine_v2
+        book_name = artifacts["select"].value["book_name"]
+        results = []
+        for scene in artifacts["scenes"].value:
+            params = {
+                "text": scene["narration"],
+                "voice": settings["voice"],
+                "model": settings["voice_model"],
+                "speed": settings["voice_speed"],
+            }
+
+            def synthesize(scene=scene):
+                scene_audio = tts_engine_v2.synthesize_narration_for_scenes(
+                    scenes=[scene],
+                    book_name=book_name,
+                    voice=settings["voice"],
+                    speed=settings["voice_speed"],
+                    model=settings["voice_model"],
+                    workspace=workspace
+                )
+                return str(scene_audio[scene["scene_number"]])
+
+            results.append(artifact_dag.compute(
+                "narration", params, _guarded(api, synthesize), force=force, output_dir=workspace.output_dir
+            ))
+        return results
+
+    if stage == "render":
+        from . import video_renderer_v2
+        scenario = artifacts["select"].value
+        scenes = artifacts["scenes"].value
+
+        storyboard_data = {
+            "book_name": scenario["book_name"],
+            "scenes": [
+                {
+                    "scene_number": scene["scene_number"],
+                    "narration": scene["narration"],
+                    "image_file": image.value,
+                    "audio_file": audio.value,
+                    "duration_seconds": scene.get("duration_seconds")
+                }
+                for scene, image, audio in zip(scenes, artifacts["images"], artifacts["narration"])
+            ],
+            "total_scenes": len(scenes),
+            "aspect_ratio": settings["aspect_ratio"]
+        }
+        render_settings = {
+            "subtitle_type": settings["subtitle_type"],
+            "subtitle_output": settings["subtitle_output"],
+            "use_ken_burns": settings["use_ken_burns"],
+            "transition_type": settings["transition_type"],
+        }
+        bgm_file = _resolve_bgm(settings.get("bgm"))
+        bgm = {"file": str(bgm_file), "volume": settings["bgm_volume"]} if bgm_file else None
+
+        params = {
+            "book_name": scenario["book_name"],
+            "aspect_ratio": settings["aspect_ratio"],
+            "scenes": [
+                {key: scene[key] for key in ("scene_number", "narration", "duration_seconds")}
+                for scene in storyboard_data["scenes"]
+            ],
+            "render_settings": render_settings,
+            "bgm": {"digest": artifact_dag.file_digest(bgm_file), "volume": settings["bgm_volume"]} if bgm_file else None,
+        }
+        return artifact_dag.compute(
+            "render",
+            params,
+            lambda: video_renderer_v2.render_final_video(storyboard_data, render_settings, bgm=bgm, workspace=workspace),
+            deps=artifacts["images"] + artifacts["narration"],
+            force=force,
+            output_dir=workspace.output_dir
+        )
+
+    raise ValueError(f"不明なステージ: {stage}")
+
+
+def _artifact_keys(result) -> Union[str, List[str]]:
+    if isinstance(result, list):
+        return [artifact.key for artifact in result]
+    return result.key
+
+
+def _is_cached(result) -> bool:
+    if isinstance(result, list):
+        return all(artifact["cached"] for artifact in result)
+    return result["cached"]
+
+
+def process_book(
+    run_id: str,
+    settings: Dict[str, Any],
+    api_semaphore=None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    1冊分の処理を実行（入力とパラメータが同じ成果物は再利用し、変わったノードだけ再計算）
+
+    Args:
+        run_id: 実行ID
+        settings: 書籍ごとの設定（load_manifest() の要素）
+        api_semaphore: API呼び出しの同時実行数を制限するセマフォ（Noneの場合は制限なし）
+        force: True の場合、保存済みの成果物があってもすべて再計算する
+
+    Returns:
+        書籍ごとの実行結果（status, stage_seconds, video_file, error など）
+    """
+    epub_path = Path(settings["epub"])
+    workspace = _book_workspace(run_id, epub_path)
+    state_file = workspace.internal_file(STATE_FILE)
+
+    state = {"epub": str(epub_path), "settings": settings, "artifacts": {}, "stage_seconds": {}}
+
+    report = {
+        "epub": str(epub_path),
+        "book_name": epub_path.stem,
+        "workspace": str(workspace.root),
+        "status": "succeeded",
+        "failed_stage": None,
+        "error": None,
+        "skipped_stages": [],
+        "stage_seconds": state["stage_seconds"],
+        "video_file": None,
+        "trace_id": tracing.new_trace_id(workspace.job_id),
+        "cost_usd": 0.0,
+    }
+
+    print(f"📚 [{epub_path.stem}] 処理開始（ワークスペース: {workspace.root}）")
+
+    artifacts = {}
+    with tracing.span("batch.book", kind="job", trace_id=report["trace_id"], book=epub_path.stem) as book_span:
+        for stage in STAGES:
+            start = time.perf_counter()
+            try:
+                with tracing.span(f"stage.{stage}", book=epub_path.stem) as sp:
+                    artifacts[stage] = _compute_stage(stage, settings, artifacts, workspace, api_semaphore, force)
+                    sp.set(cached=_is_cached(artifacts[stage]))
+            except Exception as e:
+                report.update({
+                    "status": "failed",
+                    "failed_stage": stage,
+                    "error": f"{e}\n\n{traceback.format_exc()}",
+                })
+                print(f"❌ [{epub_path.stem}] {stage} で失敗: {e}")
+                break
+            finally:
+                state["stage_seconds"][stage] = round(time.perf_counter() - start, 2)
+
+            state["artifacts"][stage] = _artifact_keys(artifacts[stage])
+            save_json(state_file, state)
+
+            if _is_cached(artifacts[stage]):
+                report["skipped_stages"].append(stage)
+                print(f"  ♻️ [{epub_path.stem}] {stage} 再利用")
+            else:
+                print(f"  ✓ [{epub_path.stem}] {stage} 完了（{state['stage_seconds'][stage]}秒）")
+
+    save_json(state_file, state)
+
+    report["cost_usd"] = round(book_span.counters["cost_usd"], 4)
+
+    if "render" in artifacts:
+        report["video_file"] = artifacts["render"].value["video_file"]
+        report["book_name"] = artifacts["analyze"].value["book_name"]
+
+    return report
+
+
+def run_batch(
+    books: List[Dict[str, Any]],
+    run_id: str,
+    max_books: int = 2,
+    api_concurrency: int = 4,
+    output_dir: Optional[Path] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    複数の書籍を並列に処理し、レポートを作成
+
+    Args:
+        books: load_manifest() の戻り値
+        run_id: 実行ID（同じIDで再実行すると続きから再開）
+        max_books: 同時に処理する書籍数
+        api_concurrency: 全書籍で同時に実行できるAPIステージ数
+        output_dir: 完成動画のコピー先（Noneの場合は data/batch/<実行ID>/videos/）
+        force: 完了済みのステージもやり直す
+
+    Returns:
+        レポート（report.json と同じ内容）
+    """
+    batch_dir = get_batch_dir(run_id)
+    output_dir = Path(output_dir) if output_dir else batch_dir / "videos"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # ファイル名（拡張子を除く）が同じEPUBが複数ある場合、完成動画の名前に書籍キーを付けて区別する
+    stem_counts = Counter(Path(settings["epub"]).stem for settings in books)
+
+    print(f"🚀 一括処理開始: {len(books)}冊（実行ID: {run_id}, 並列数: {max_books}, API同時実行数: {api_concurrency}）")
+
+    started_at = datetime.now()
+    start = time.perf_counter()
+    book_reports = []
+
+    with multiprocessing.Manager() as manager:
+        api_semaphore = manager.BoundedSemaphore(api_concurrency)
+
+        with ProcessPoolExecutor(max_workers=max_books) as executor:
+            futures = {
+                executor.submit(process_book, run_id, settings, api_semaphore, force): settings
+                for settings in books
+            }
+            for future in as_completed(futures):
+                settings = futures[future]
+                try:
+                    book_report = future.result()
+                except Exception as e:
+                    book_report = {
+                        "epub": settings["epub"],
+                        "book_name": Path(settings["epub"]).stem,
+                        "status": "failed",
+                        "failed_stage": None,
+                        "error": f"ワーカーが異常終了しました: {e!r}",
+                        "skipped_stages": [],
+                        "stage_seconds": {},
+                        "video_file": None,
+                        "trace_id": None,
+                        "cost_usd": 0.0,
+                    }
+
+                # 完成動画を出力先にまとめる
+                if book_report.get("video_file"):
+                    video_file = Path(book_report["video_file"])
+                    name = book_report['book_name']
+                    if stem_counts[Path(settings["epub"]).stem] > 1:
+                        name = f"{name}-{_book_key(Path(settings['epub']))}"
+                    dest = output_dir / f"{name}{video_file.suffix}"
+                    shutil.copy2(video_file, dest)
+                    book_report["output_file"] = str(dest)
+
+                book_reports.append(book_report)
+
+    book_reports.sort(key=lambda r: r["epub"])
+    report = {
+        "run_id": run_id,
+        "started_at": started_at.isoformat(timespec='seconds'),
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+        "total": len(book_reports),
+        "succeeded": sum(1 for r in book_reports if r["status"] == "succeeded"),
+        "failed": sum(1 for r in book_reports if r["status"] != "succeeded"),
+        "cost_usd": round(sum(r["cost_usd"] for r in book_reports), 4),
+        "books": book_reports,
+    }
+
+    report_file = batch_dir / "report.json"
+    save_json(report_file, report)
+
+    print_report(report)
+    print(f"💾 レポートを保存: {report_file}")
+
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """レポートの概要を表形式で表示"""
+    print(f"\n{'='*80}")
+    print(f"📊 一括処理結果: 成功 {report['succeeded']} / 失敗 {report['failed']} / 全{report['total']}冊"
+          f"（{report['elapsed_seconds']}秒, 推定APIコスト ${report['cost_usd']:.3f}）")
+    print(f"{'='*80}")
+
+    for book in report["books"]:
+        total_seconds = sum(book["stage_seconds"].values())
+        if book["status"] == "succeeded":
+            detail = book.get("output_file") or book["video_file"]
+        else:
+            first_line = (book["error"] or "").split("\n", 1)[0]
+            detail = f"{book['failed_stage']}: {first_line}"
+        skipped = f" (再利用: {len(book['skipped_stages'])}ステージ)" if book["skipped_stages"] else ""
+        mark = "✅" if book["status"] == "succeeded" else "❌"
+        print(f"  {mark} {book['book_name']}  {total_seconds:.1f}秒  ${book['cost_usd']:.3f}{skipped}  {detail}")
@@ -6,7 +6,8 @@ v1スクリプトには依存しない
 """
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from .workspace import Workspace
 
 
 def get_project_root() -> Path:
@@ -48,7 +49,8 @@ def list_available_bgm() -> List[Path]:
 def add_bgm(
     video_file: str,
     bgm_file: str,
-    volume: float = 0.15
+    volume: float = 0.15,
+    workspace: Optional[Workspace] = None
 ) -> dict:
     """
     動画にBGMを追加
@@ -57,6 +59,7 @@ def add_bgm(
         video_file: 動画ファイルのパス（文字列）
         bgm_file: BGMファイルのパス（文字列）
         volume: BGM音量 (0.0 - 1.0)
+        workspace: 一時ファイルの置き場所（Noneの場合は既定のワークスペース）
 
     Returns:
         BGM付き動画情報
@@ -67,7 +70,7 @@ def add_bgm(
     bgm_path = Path(bgm_file)
 
     # BGMを追加
-    output_file = add_bgm_to_video(video_path, bgm_path, volume)
+    output_file = add_bgm_to_video(video_path, bgm_path, volume, workspace=workspace)
 
     return {
         "output_file": str(output_file),
@@ -6,33 +6,33 @@ EPUB → テキスト化 → チャンク化 → チャンクまとめ → 全
 """
 
 from pathlib import Path
-from typing import Dict, Any, List
-import google.generativeai as genai
-import os
+from typing import Dict, Any, List, Optional, Callable, Tuple
 import json
-import time
 from dotenv import load_dotenv
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+from .workspace import Workspace, resolve_workspace
+from . import (
+    api_clients, book_index, chunk_checkpoints, chunk_planner, epub_parser, extractive_summarizer, summary_generator,
+    text_fingerprints, tracing
+)
 
 # .envファイルから環境変数を読み込む
 load_dotenv()
 
+# チャンクまとめ・全体概要に使うモデル
+SUMMARY_MODEL = 'gemini-2.5-flash-lite'
 
-def extract_text_from_epub(epub_path: Path) -> str:
-    """EPUBからテキストを抽出"""
-    book = epub.read_epub(str(epub_path))
-    text_content = []
+# 分析モード
+ANALYSIS_MODES = {
+    "full": "全文（チャンクごとにまとめてから全体概要）",
+    "fast": "高速（各章の抜粋から1回で全体概要）",
+    "offline": "オフライン（APIを使わずに重要な文を抜き出す）",
+}
+DEFAULT_ANALYSIS_MODE = "full"
 
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
-            text = soup.get_text(separator='\n', strip=True)
-            if text:
-                text_content.append(text)
 
-    return '\n\n'.join(text_content)
+def extract_text_from_epub(epub_path: Path) -> str:
+    """EPUBからテキストを抽出（epub_parser.extract_text_from_epub と同じ）"""
+    return epub_parser.extract_text_from_epub(epub_path)
 
 
 def chunk_text(text: str, chunk_size: int = 40000) -> List[str]:
@@ -55,21 +55,8 @@ def chunk_text(text: str, chunk_size: int = 40000) -> List[str]:
     return chunks
 
 
-def summarize_chunks(chunks: List[str]) -> List[str]:
-    """各チャンクを1000-1500文字にまとめる"""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY環境変数が設定されていません")
-
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
-
-    summaries = []
-
-    for i, chunk in enumerate(chunks):
-        print(f"  📝 チャンク{i+1}/{len(chunks)}をまとめ中...")
-
-        prompt = f"""
+def _chunk_summary_prompt(chunk: str) -> str:
+    return f"""
 以下のテキストを1000-1500文字で要約してください。
 
 {chunk}
@@ -83,28 +70,180 @@ def summarize_chunks(chunks: List[str]) -> List[str]:
 1000-1500文字の要約のみを出力してください。
 """
 
-        response = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.3}
-        )
 
-        summaries.append(response.text.strip())
+def summarize_chunks(
+    chunks: List[str],
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    book_hash: Optional[str] = None,
+    extract_ratio: float = 1.0,
+    report: Optional[Dict[str, Any]] = None,
+    reuse: bool = True
+) -> List[str]:
+    """
+    各チャンクを1000-1500文字にまとめる
+
+    book_hash を指定した場合、まとめを1チャンクごとにチェックポイントとして保存し、
+    保存済みのチャンクはAPIを呼ばずに再利用する（途中で失敗しても再実行で続きから処理できる）。
+    reuse=False の場合は保存済みのチェックポイントを読まずにすべてまとめ直す（保存はする）。
 
-        # API制限回避のため、リクエスト間に遅延を追加
-        if i < len(chunks) - 1:  # 最後のチャンク以外
-            time.sleep(2)  # 2秒待機
+    extract_ratio が1.0未満の場合、各チャンクから重要な文をその割合の文字数まで
+    ローカルで抜き出し（extractive_summarizer）、抜き出した文だけをGeminiに送る。
+
+    前のチャンクとほぼ同じ内容のチャンク（text_fingerprints の MinHash で類似度が
+    SIMILARITY_THRESHOLD 以上）は、APIを呼ばずに前のチャンクのまとめを使う。
+
+    Args:
+        chunks: チャンクのリスト
+        progress_callback: 進捗通知 (メッセージ, 0.0～1.0) を受け取る関数
+        book_hash: 書籍ハッシュ（chunk_checkpoints.text_hash(全文)、Noneの場合は保存しない）
+        extract_ratio: Geminiに送る文字数の割合（1.0の場合はチャンク全体を送る）
+        report: 指定した場合、処理の内訳を書き込む辞書
+            {'chunks', 'api_calls', 'checkpoints_reused', 'near_duplicates', 'api_calls_avoided',
+             'chars_in', 'chars_sent'}
+        reuse: 保存済みのチェックポイントを使うか
+
+    Returns:
+        まとめのリスト
+    """
+    model_name = SUMMARY_MODEL
+    model = api_clients.get_gemini_model(model_name)
+    checkpoints = chunk_checkpoints.load_checkpoints(book_hash) if book_hash and reuse else {}
+
+    with tracing.span("summarize.near_duplicates", chunks=len(chunks)) as sp:
+        duplicates = text_fingerprints.find_near_duplicates(chunks)
+        sp.set(near_duplicates=len(duplicates))
+
+    summaries = []
+    reused = 0
+    api_calls = 0
+    sent_chars = 0
+
+    for i, chunk in enumerate(chunks):
+        if i in duplicates:
+            original, similarity = duplicates[i]
+            print(f"  🔁 チャンク{i+1}はチャンク{original+1}とほぼ同じ内容（類似度{similarity:.0%}）: まとめを再利用")
+            summaries.append(summaries[original])
+            continue
+
+        if extract_ratio < 1.0:
+            with tracing.span("summarize.extract", chunk=i + 1) as sp:
+                chunk = extractive_summarizer.extract_summary(chunk, int(len(chunk) * extract_ratio))
+                sp.add(characters=len(chunk))
+        sent_chars += len(chunk)
+        prompt = _chunk_summary_prompt(chunk)
+        hash_value = chunk_checkpoints.chunk_hash(model_name, prompt)
+
+        if hash_value in checkpoints:
+            summaries.append(checkpoints[hash_value]["summary"])
+            reused += 1
+            continue
+
+        print(f"  📝 チャンク{i+1}/{len(chunks)}をまとめ中...")
+        if progress_callback:
+            progress_callback(f"チャンク{i+1}/{len(chunks)}をまとめ中", i / len(chunks))
+
+        with tracing.span("gemini.summarize_chunk", kind="api", chunk=i + 1):
+            response = model.generate_content(
+                prompt,
+                generation_config={"temperature": 0.3}
+            )
+            tracing.record_gemini(response, model_name, prompt)
+        api_calls += 1
+
+        summary = response.text.strip()
+        summaries.append(summary)
+        if book_hash:
+            chunk_checkpoints.save_checkpoint(book_hash, hash_value, i, summary, model_name)
+
+    total_chars = sum(len(chunk) for i, chunk in enumerate(chunks) if i not in duplicates)
+    if extract_ratio < 1.0:
+        print(f"  ✂️ 重要な文を抽出: {total_chars:,}文字 → {sent_chars:,}文字"
+              f"（{1 - sent_chars / max(1, total_chars):.0%}削減）")
+    if reused:
+        print(f"  ♻️ 保存済みのまとめを再利用: {reused}/{len(chunks)}チャンク")
+    if duplicates:
+        print(f"  🔁 ほぼ同じ内容のチャンク: {len(duplicates)}個（API呼び出しを{len(duplicates)}回省略）")
+
+    if report is not None:
+        report.update({
+            "chunks": len(chunks),
+            "api_calls": api_calls,
+            "checkpoints_reused": reused,
+            "near_duplicates": len(duplicates),
+            "api_calls_avoided": reused + len(duplicates),
+            "chars_in": total_chars,
+            "chars_sent": sent_chars,
+        })
 
     return summaries
 
 
+def summarize_changed_chapters(
+    full_text: str,
+    chapters: List[Dict[str, Any]],
+    segments: List[Dict[str, Any]],
+    chunk_size: int,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    book_hash: Optional[str] = None,
+    extract_ratio: float = 1.0,
+    report: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], List[str]]:
+    """
+    前の版のまとめを再利用し、違う章だけをチャンクに分けてまとめる
+
+    Args:
+        full_text: 本文
+        chapters: 章の位置
+        segments: book_index.match_chapters の戻り値（summary がNoneの区間をまとめ直す）
+        chunk_size: まとめ直す区間のチャンクサイズ
+        progress_callback / book_hash / extract_ratio: summarize_chunks と同じ
+        report: 指定した場合、summarize_chunks の内訳に 'chunks_reused'（前の版から再利用したチャンク数）を加えて書き込む
+
+    Returns:
+        (チャンクのリスト, まとめのリスト)（本文の順番）
+    """
+    chunks: List[str] = []
+    summaries: List[Optional[str]] = []
+    pending: List[int] = []
+    for segment in segments:
+        first, last = chapters[segment['chapters'][0]], chapters[segment['chapters'][-1]]
+        text = full_text[first['start']:last['end']]
+        if segment['summary'] is not None:
+            chunks.append(text)
+            summaries.append(segment['summary'])
+            continue
+        for chunk in chunk_text(text, chunk_size=chunk_size):
+            pending.append(len(chunks))
+            chunks.append(chunk)
+            summaries.append(None)
+
+    reused = len(chunks) - len(pending)
+    changed = sum(len(segment['chapters']) for segment in segments if segment['summary'] is None)
+    print(f"  ♻️ 前の版のまとめを再利用: {reused}チャンク（まとめ直す章: {changed}/{len(chapters)}章）")
+
+    if report is None:
+        report = {}
+    new_summaries = summarize_chunks(
+        [chunks[i] for i in pending],
+        progress_callback=progress_callback,
+        book_hash=book_hash,
+        extract_ratio=extract_ratio,
+        report=report
+    )
+    for i, summary in zip(pending, new_summaries):
+        summaries[i] = summary
+
+    report.update({
+        "chunks": len(chunks),
+        "chunks_reused": reused,
+        "api_calls_avoided": report.get("api_calls_avoided", 0) + reused,
+    })
+    return chunks, summaries
+
+
 def generate_final_summary(chunk_summaries: List[str], book_name: str) -> Dict[str, Any]:
     """チャンクまとめから全体概要を生成（論文形式800字）"""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY環境変数が設定されていません")
-
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
+    model = api_clients.get_gemini_model(SUMMARY_MODEL)
 
     all_summaries = '\n\n'.join([f"【部分{i+1}】\n{s}" for i, s in enumerate(chunk_summaries)])
 
@@ -157,13 +296,15 @@ JSON形式で出力してください。
 """
 
     print(f"  🤖 全体概要を生成中...")
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.3,
-            "response_mime_type": "application/json"
-        }
-    )
+    with tracing.span("gemini.final_summary", kind="api"):
+        response = model.generate_content(
+            prompt,
+            generation_config={
+                "temperature": 0.3,
+                "response_mime_type": "application/json"
+            }
+        )
+        tracing.record_gemini(response, 'gemini-2.5-flash-lite', prompt)
 
     result = json.loads(response.text)
     print(f"  ✓ 全体概要生成完了（{result['character_count']}文字）")
@@ -171,26 +312,81 @@ JSON形式で出力してください。
     return result
 
 
-def analyze_book(epub_path: Path, output_dir: Path) -> Dict[str, Any]:
+def generate_extractive_summary(chunk_summaries: List[str], target_length: int = 800) -> Dict[str, Any]:
+    """
+    チャンクまとめから全体概要を抜き出す（APIを使わない、generate_final_summary と同じ形式）
+
+    Args:
+        chunk_summaries: チャンクまとめ（重要な文の抜粋）のリスト
+        target_length: 概要の上限（文字数）
+
+    Returns:
+        {'summary', 'character_count', 'main_topics', 'target_audience', 'book_type'}
+    """
+    summary = extractive_summarizer.extract_summary('\n'.join(chunk_summaries), target_length)
+    print(f"  ✓ 全体概要を抽出（{len(summary)}文字）")
+    return {
+        "summary": summary,
+        "character_count": len(summary),
+        "main_topics": extractive_summarizer.extract_keywords(chunk_summaries),
+        "target_audience": "不明（オフライン要約）",
+        "book_type": "不明（オフライン要約）",
+    }
+
+
+def analyze_book(
+    epub_path: Path,
+    output_dir: Path,
+    workspace: Optional[Workspace] = None,
+    progress_callback: Optional[Callable[[str, str, float], None]] = None,
+    quality: str = chunk_planner.DEFAULT_QUALITY,
+    mode: str = DEFAULT_ANALYSIS_MODE,
+    reuse: bool = True
+) -> Dict[str, Any]:
     """
     書籍を分析（画面1の全処理）
 
     1. EPUBからテキスト抽出
-    2. チャンク化
+    2. チャンク化（チャンクサイズは chunk_planner が品質設定から決める）
     3. チャンクごとにまとめ
     4. 全体概要生成（論文形式800字）
 
+    mode="fast" の場合は 2～4 の代わりに、各章から均等に抜き出した抜粋から
+    API呼び出し1回で全体概要を生成する（summary_generator.generate_book_summary）。
+    mode="offline" の場合は 3・4 をAPIを使わずに行う（extractive_summarizer で重要な文を抜き出す）。
+
+    reuse=True の場合、分析結果を本文の指紋と一緒に book_index に保存し、
+    ファイル名が違っても本文が同じ本は保存済みの分析結果をそのまま返す。
+    mode="full" では、章の多くが一致する本（新しい版など）は違う章だけをまとめ直す。
+
+    Args:
+        epub_path: EPUBファイルのパス
+        output_dir: 抽出テキストの出力先
+        workspace: 中間データの保存先（Noneの場合はdata/internal/）
+        progress_callback: 進捗通知 (ステージ名, メッセージ, ステージ内の進捗0.0～1.0) を受け取る関数
+        quality: まとめの品質設定（chunk_planner.QUALITY_PRESETS のキー、mode="full" / "offline" のみ）
+        mode: 分析モード（ANALYSIS_MODES のキー）
+        reuse: 保存済みの分析結果・チャンクまとめのチェックポイントを再利用するか
+            （Falseの場合もすべてまとめ直した今回の結果は保存する）
+
     Returns:
         分析結果の辞書
     """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"不明な分析モード: {mode}（{', '.join(ANALYSIS_MODES)}）")
+    num_steps = 2 if mode == "fast" else 4
+
     print(f"\n{'='*80}")
     print(f"📚 書籍分析開始: {epub_path.name}")
     print(f"{'='*80}\n")
 
     # 1. テキスト抽出
-    print("📖 Step 1/4: テキスト抽出中...")
-    full_text = extract_text_from_epub(epub_path)
-    print(f"  ✓ {len(full_text)}文字を抽出")
+    print(f"📖 Step 1/{num_steps}: テキスト抽出中...")
+    if progress_callback:
+        progress_callback("extract", "テキスト抽出中", 0.0)
+    with tracing.span("analyze.extract", book=epub_path.stem):
+        full_text, chapters = epub_parser.extract_text_with_chapters(epub_path)
+    print(f"  ✓ {len(full_text)}文字を抽出（{len(chapters)}章）")
 
     book_name = epub_path.stem
 
@@ -200,37 +396,150 @@ def analyze_book(epub_path: Path, output_dir: Path) -> Dict[str, Any]:
     with open(text_file, 'w', encoding='utf-8') as f:
         f.write(full_text)
 
-    # 2. チャンク化
-    print("\n🔍 Step 2/4: チャンク化中...")
-    chunks = chunk_text(full_text, chunk_size=2000)
-    print(f"  ✓ {len(chunks)}個のチャンクに分割")
-
-    # 3. チャンクまとめ
-    print("\n📝 Step 3/4: 各チャンクをまとめ中...")
-    chunk_summaries = summarize_chunks(chunks)
-    print(f"  ✓ {len(chunk_summaries)}個のまとめを生成")
-
-    # 4. 全体概要生成
-    print("\n✨ Step 4/4: 全体概要を生成中...")
-    final_summary = generate_final_summary(chunk_summaries, book_name)
+    # 本文が同じ本（ファイル名・EPUBの書き出し方が違うだけ）の保存済みの分析結果を探す
+    index_quality = None if mode == "fast" else quality
+    text_hash = book_index.book_text_hash(full_text)
+    if reuse:
+        with tracing.span("analyze.index_lookup", book=book_name) as sp:
+            previous = book_index.find_analysis(text_hash, mode, index_quality, SUMMARY_MODEL)
+            sp.set(hit=previous is not None)
+        if previous:
+            print(f"  ♻️ 保存済みの分析を再利用: 「{previous['book_name']}」（{previous['created_at'][:19]}）")
+            result = {
+                **previous['analysis'],
+                "book_name": book_name,
+                "text_file": str(text_file),
+                "character_count": len(full_text),
+                "chapters": chapters,
+                "summary_report": {},
+                "reused_from": {"book_name": previous['book_name'], "created_at": previous['created_at'],
+                                "match": "exact"},
+            }
+            return _save_analysis(result, workspace)
+
+    with tracing.span("analyze.fingerprint", book=book_name, chapters=len(chapters)):
+        simhashes = book_index.chapter_simhashes(full_text, chapters)
+    reused_from = None
+
+    if mode == "fast":
+        # 2. 抜粋から全体概要生成
+        print("\n⚡ Step 2/2: 各章の抜粋から全体概要を生成中...")
+        if progress_callback:
+            progress_callback("final_summary", "各章の抜粋から全体概要を生成中", 0.0)
+        with tracing.span("analyze.final_summary", book=book_name, mode=mode):
+            final_summary = summary_generator.generate_book_summary(book_name, full_text, chapters=chapters)
+        plan = None
+        chunks = []
+        chunk_summaries = []
+    else:
+        # 2. チャンク化
+        print("\n🔍 Step 2/4: チャンク化中...")
+        if progress_callback:
+            progress_callback("chunk", "チャンク化中", 0.0)
+        with tracing.span("analyze.chunk", book=epub_path.stem) as sp:
+            plan = chunk_planner.plan_chunks(full_text, model=SUMMARY_MODEL, quality=quality)
+            chunks = chunk_text(full_text, chunk_size=plan['chunk_size'])
+            sp.set(num_chunks=len(chunks), chunk_size=plan['chunk_size'], quality=quality)
+        print(f"  ✓ {len(chunks)}個のチャンクに分割")
+
+    summary_report: Dict[str, Any] = {}
+    if mode == "offline":
+        plan = None
+
+        # 3. 重要な文の抽出
+        print("\n✂️ Step 3/4: 各チャンクから重要な文を抽出中（APIなし）...")
+        if progress_callback:
+            progress_callback("summarize", "各チャンクから重要な文を抽出中", 0.0)
+        with tracing.span("analyze.summarize", book=book_name, mode=mode):
+            chunk_summaries = [
+                extractive_summarizer.extract_summary(chunk, chunk_planner.SUMMARY_OUTPUT_CHARS) for chunk in chunks
+            ]
+
+        # 4. 全体概要の抽出
+        print("\n✨ Step 4/4: 全体概要を抽出中（APIなし）...")
+        if progress_callback:
+            progress_callback("final_summary", "全体概要を抽出中", 0.0)
+        with tracing.span("analyze.final_summary", book=book_name, mode=mode):
+            final_summary = generate_extractive_summary(chunk_summaries)
+
+    elif mode == "full":
+        print(f"  🔮 {chunk_planner.format_plan(plan)}")
+        if progress_callback:
+            progress_callback("chunk", chunk_planner.format_plan(plan), 1.0)
+
+        # 章の多くが一致する本（新しい版など）の保存済みの分析結果を探す
+        similar = None
+        if reuse:
+            with tracing.span("analyze.index_similar", book=book_name) as sp:
+                similar = book_index.find_similar(simhashes, mode, quality, SUMMARY_MODEL)
+                sp.set(hit=similar is not None)
+
+        # 3. チャンクまとめ
+        print("\n📝 Step 3/4: 各チャンクをまとめ中...")
+        summarize_progress = (lambda message, fraction: progress_callback("summarize", message, fraction)) \
+            if progress_callback else None
+        with tracing.span("analyze.summarize", book=epub_path.stem):
+            if similar:
+                print(f"  🔍 近い本の分析結果: 「{similar['book_name']}」"
+                      f"（{similar['matched_chapters']}/{len(chapters)}章が一致）")
+                reused_from = {"book_name": similar['book_name'], "created_at": similar['created_at'],
+                               "match": "similar", "matched_chapters": similar['matched_chapters']}
+                chunks, chunk_summaries = summarize_changed_chapters(
+                    full_text,
+                    chapters,
+                    book_index.match_chapters(simhashes, similar['chunks']),
+                    plan['chunk_size'],
+                    progress_callback=summarize_progress,
+                    book_hash=chunk_checkpoints.text_hash(full_text),
+                    extract_ratio=plan['extract_ratio'],
+                    report=summary_report
+                )
+            else:
+                chunk_summaries = summarize_chunks(
+                    chunks,
+                    progress_callback=summarize_progress,
+                    book_hash=chunk_checkpoints.text_hash(full_text),
+                    extract_ratio=plan['extract_ratio'],
+                    report=summary_report,
+                    reuse=reuse
+                )
+        print(f"  ✓ {len(chunk_summaries)}個のまとめを生成")
+
+        # 4. 全体概要生成
+        print("\n✨ Step 4/4: 全体概要を生成中...")
+        if progress_callback:
+            progress_callback("final_summary", "全体概要を生成中", 0.0)
+        with tracing.span("analyze.final_summary", book=book_name):
+            final_summary = generate_final_summary(chunk_summaries, book_name)
 
     # 結果をまとめる
     result = {
         "book_name": book_name,
         "text_file": str(text_file),
         "character_count": len(full_text),
+        "mode": mode,
+        "chapters": chapters,
         "num_chunks": len(chunks),
+        "chunk_plan": plan,
+        "summary_report": summary_report,
         "chunk_summaries": chunk_summaries,
         **final_summary
     }
+    if reused_from:
+        result["reused_from"] = reused_from
+
+    # 次に同じ本・新しい版を分析するときのために、本文の指紋と一緒に保存
+    with tracing.span("analyze.index_record", book=book_name):
+        book_index.record_analysis(text_hash, result, simhashes, chunks, full_text, index_quality, SUMMARY_MODEL)
+
+    return _save_analysis(result, workspace)
 
-    # data/internal/に保存
-    from .utils import get_project_root, save_json
 
-    internal_dir = get_project_root() / "data" / "internal"
-    internal_dir.mkdir(parents=True, exist_ok=True)
+def _save_analysis(result: Dict[str, Any], workspace: Optional[Workspace]) -> Dict[str, Any]:
+    """分析結果を data/internal/ に保存して返す"""
+    from .utils import save_json
 
-    analysis_file = internal_dir / "book_analysis.json"
+    analysis_file = resolve_workspace(workspace).internal_file("book_analysis.json")
     save_json(analysis_file, result)
 
     print(f"\n{'='*80}")
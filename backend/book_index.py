@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+書籍の指紋インデックス（同じ本・新しい版の分析結果を再利用）
+
+書籍分析（book_analyzer.analyze_book）の結果を、本文の指紋と一緒に
+data/internal/book_index/ に保存する（一覧はSQLiteのインデックス、分析結果はJSON）。
+
+- 本文ハッシュ: 空白を除いた本文のSHA-256
+  （ファイル名やEPUBの書き出し方＝改行・空白の入り方が違っても同じ値になる）
+- 章の SimHash: 章ごとの64ビットの SimHash（text_fingerprints.simhash）
+  （誤字の修正など少しの違いなら、ハミング距離が CHAPTER_MAX_DISTANCE 以下になる）
+
+同じ本文ハッシュ・同じ分析設定の結果があれば、それをそのまま使う（APIを呼ばない）。
+章の多く（SIMILAR_BOOK_RATIO 以上）が一致する本（新しい版など）は、一致する章だけで
+できていたチャンクのまとめを再利用し、違う章だけをまとめ直す。
+"""
+
+from pathlib import Path
+import sqlite3
+import hashlib
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from .utils import get_project_root, save_json
+from . import text_fingerprints
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    text_hash TEXT NOT NULL,
+    book_name TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    quality TEXT NOT NULL,
+    model TEXT NOT NULL,
+    character_count INTEGER NOT NULL,
+    chapter_simhashes TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_text_hash ON analyses (text_hash);
+CREATE INDEX IF NOT EXISTS analyses_settings ON analyses (mode, quality, model);
+"""
+
+# 同じ章とみなす SimHash のハミング距離（64ビット中）
+CHAPTER_MAX_DISTANCE = 4
+# 章のうちこの割合以上が一致する本を「近い本」とみなす
+SIMILAR_BOOK_RATIO = 0.5
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def get_index_root() -> Path:
+    """インデックスの保存先"""
+    return get_project_root() / "data" / "internal" / "book_index"
+
+
+@contextmanager
+def _connect():
+    """インデックスに接続（初回はスキーマ作成）"""
+    index_root = get_index_root()
+    index_root.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(index_root / "index.sqlite3"), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def book_text_hash(text: str) -> str:
+    """本文ハッシュ（空白を除いた本文のSHA-256、16進）"""
+    return hashlib.sha256(_WHITESPACE.sub('', text).encode('utf-8')).hexdigest()
+
+
+def chapter_simhashes(full_text: str, chapters: List[Dict[str, Any]]) -> List[str]:
+    """
+    章ごとの SimHash
+
+    Args:
+        full_text: 本文
+        chapters: 章の位置（epub_parser.extract_text_with_chapters の戻り値）
+
+    Returns:
+        章ごとの SimHash（16桁の16進文字列）のリスト
+    """
+    return [
+        f"{text_fingerprints.simhash(full_text[chapter['start']:chapter['end']]):016x}"
+        for chapter in chapters
+    ]
+
+
+def _is_same_chapter(simhash_a: str, simhash_b: str) -> bool:
+    return text_fingerprints.hamming_distance(int(simhash_a, 16), int(simhash_b, 16)) <= CHAPTER_MAX_DISTANCE
+
+
+def _analysis_key(text_hash: str, mode: str, quality: Optional[str], model: str) -> str:
+    digest = hashlib.sha256(f"{mode}\n{quality or ''}\n{model}".encode('utf-8')).hexdigest()
+    return f"{text_hash[:32]}_{digest[:8]}"
+
+
+def chunk_chapter_groups(
+    full_text: str,
+    chunks: List[str],
+    chapters: List[Dict[str, Any]]
+) -> List[Optional[List[int]]]:
+    """
+    チャンクごとに、チャンクを構成する章の番号を求める
+
+    Args:
+        full_text: 本文
+        chunks: チャンクのリスト（本文の順番どおり）
+        chapters: 章の位置
+
+    Returns:
+        チャンクごとの章の番号のリスト。チャンクが章の途中で始まる・終わる場合はNone
+    """
+    starts = {chapter['start']: i for i, chapter in enumerate(chapters)}
+    groups: List[Optional[List[int]]] = []
+    position = 0
+    for chunk in chunks:
+        start = full_text.find(chunk, position)
+        if start < 0:
+            groups.append(None)
+            continue
+        position = start + len(chunk)
+
+        group = None
+        first = starts.get(start)
+        if first is not None:
+            last = first
+            while last < len(chapters) and chapters[last]['end'] < position:
+                last += 1
+            if last < len(chapters) and chapters[last]['end'] == position:
+                group = list(range(first, last + 1))
+        groups.append(group)
+    return groups
+
+
+def find_analysis(text_hash: str, mode: str, quality: Optional[str], model: str) -> Optional[Dict[str, Any]]:
+    """
+    同じ本文・同じ分析設定の保存済みの分析結果を探す
+
+    Args:
+        text_hash: 本文ハッシュ（book_text_hash）
+        mode: 分析モード
+        quality: まとめの品質設定（mode="fast" の場合はNone）
+        model: まとめに使うモデル
+
+    Returns:
+        {'book_name', 'created_at', 'analysis', 'chunks'}。見つからない場合はNone
+    """
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT * FROM analyses WHERE key = ?", (_analysis_key(text_hash, mode, quality, model),)
+        ).fetchone()
+    return _load_entry(row) if row else None
+
+
+def find_similar(simhashes: List[str], mode: str, quality: Optional[str], model: str) -> Optional[Dict[str, Any]]:
+    """
+    章の多くが一致する、同じ分析設定の保存済みの分析結果を探す
+
+    Args:
+        simhashes: 章ごとの SimHash（chapter_simhashes）
+        mode: 分析モード
+        quality: まとめの品質設定
+        model: まとめに使うモデル
+
+    Returns:
+        {'book_name', 'created_at', 'analysis', 'chunks', 'matched_chapters'}
+        （一致する章が最も多いもの）。見つからない場合はNone
+    """
+    if not simhashes:
+        return None
+
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM analyses WHERE mode = ? AND quality = ? AND model = ? ORDER BY created_at DESC",
+            (mode, quality or '', model)
+        ).fetchall()
+
+    best: Optional[Tuple[int, sqlite3.Row]] = None
+    for row in rows:
+        previous = json.loads(row['chapter_simhashes'])
+        matched = sum(1 for simhash in simhashes if any(_is_same_chapter(simhash, old) for old in previous))
+        if matched >= len(simhashes) * SIMILAR_BOOK_RATIO and (best is None or matched > best[0]):
+            best = (matched, row)
+
+    if best is None:
+        return None
+    entry = _load_entry(best[1])
+    if entry is not None:
+        entry['matched_chapters'] = best[0]
+    return entry
+
+
+def _load_entry(row: sqlite3.Row) -> Optional[Dict[str, Any]]:
+    """インデックスの行から分析結果を読み込む（ファイルが消えている・壊れている場合はNone）"""
+    try:
+        with open(row['path'], 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return {
+        'book_name': row['book_name'],
+        'created_at': row['created_at'],
+        'analysis': data['analysis'],
+        'chunks': data.get('chunks', []),
+    }
+
+
+def match_chapters(simhashes: List[str], previous_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    保存済みのチャンクのまとめのうち、今回の本でもそのまま使えるものを探す
+
+    本文の先頭から順に、保存済みのチャンクと同じ章が同じ順番で並んでいる箇所を探す
+    （複数あてはまる場合は章の多いチャンクを使う）。
+
+    Args:
+        simhashes: 今回の本の章ごとの SimHash
+        previous_chunks: 保存済みのチャンク [{'simhashes': [章のSimHash, ...], 'summary'}, ...]
+
+    Returns:
+        本文の順番の区間のリスト [{'chapters': [章の番号, ...], 'summary': まとめ or None}, ...]
+        summary がNoneの区間は、まとめ直しが必要な章（連続する章は1つの区間にまとめる）
+    """
+    segments: List[Dict[str, Any]] = []
+    i = 0
+    while i < len(simhashes):
+        best = None
+        for chunk in previous_chunks:
+            group = chunk['simhashes']
+            if not group or i + len(group) > len(simhashes) or (best and len(group) <= len(best['simhashes'])):
+                continue
+            if all(_is_same_chapter(simhashes[i + k], old) for k, old in enumerate(group)):
+                best = chunk
+
+        if best is not None:
+            segments.append({'chapters': list(range(i, i + len(best['simhashes']))), 'summary': best['summary']})
+            i += len(best['simhashes'])
+            continue
+
+        if segments and segments[-1]['summary'] is None:
+            segments[-1]['chapters'].append(i)
+        else:
+            segments.append({'chapters': [i], 'summary': None})
+        i += 1
+    return segments
+
+
+def record_analysis(
+    text_hash: str,
+    analysis: Dict[str, Any],
+    simhashes: List[str],
+    chunks: List[str],
+    full_text: str,
+    quality: Optional[str],
+    model: str
+) -> Path:
+    """
+    分析結果をインデックスに保存
+
+    Args:
+        text_hash: 本文ハッシュ（book_text_hash）
+        analysis: 分析結果（analyze_book の戻り値）
+        simhashes: 章ごとの SimHash
+        chunks: まとめたチャンクのリスト（analysis['chunk_summaries'] と同じ順番）
+        full_text: 本文
+        quality: まとめの品質設定（mode="fast" の場合はNone）
+        model: まとめに使ったモデル
+
+    Returns:
+        分析結果の保存先パス
+    """
+    mode = analysis['mode']
+    key = _analysis_key(text_hash, mode, quality, model)
+    path = get_index_root() / f"{key}.json"
+
+    # 章の区切りと一致するチャンクだけを、次の版で再利用できるように章の SimHash と一緒に保存
+    saved_chunks = []
+    groups = chunk_chapter_groups(full_text, chunks, analysis['chapters'])
+    for group, summary in zip(groups, analysis['chunk_summaries']):
+        if group:
+            saved_chunks.append({'simhashes': [simhashes[i] for i in group], 'summary': summary})
+
+    save_json(path, {'analysis': analysis, 'chunks': saved_chunks})
+
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO analyses
+                (key, text_hash, book_name, mode, quality, model, character_count, chapter_simhashes, path, created_at)
+            VALUES (:key, :text_hash, :book_name, :mode, :quality, :model, :character_count, :chapter_simhashes,
+                    :path, :created_at)
+            """,
+            {
+                'key': key,
+                'text_hash': text_hash,
+                'book_name': analysis['book_name'],
+                'mode': mode,
+                'quality': quality or '',
+                'model': model,
+                'character_count': analysis['character_count'],
+                'chapter_simhashes': json.dumps(simhashes),
+                'path': str(path),
+                'created_at': datetime.now().isoformat(timespec='microseconds'),
+            }
+        )
+    return path
+
+
+def clear_index() -> int:
+    """
+    インデックスを削除
+
+    Returns:
+        削除した分析結果の数
+    """
+    index_root = get_index_root()
+    if not index_root.exists():
+        return 0
+    removed = 0
+    for path in index_root.glob("*.json"):
+        path.unlink(missing_ok=True)
+        removed += 1
+    for path in index_root.glob("index.sqlite3*"):
+        path.unlink(missing_ok=True)
+    return removed
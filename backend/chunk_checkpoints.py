@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+チャンクまとめのチェックポイント
+
+書籍分析（book_analyzer.summarize_chunks）のチャンクまとめを、1チャンク終わるごとに
+data/internal/chunk_checkpoints/<書籍ハッシュ>/<チャンクハッシュ>.json に保存する。
+
+途中で失敗（APIの上限・ネットワーク）しても、再実行時は保存済みのチャンクを読み込み、
+まだまとめていないチャンクだけをAPIに送る。
+
+- 書籍ハッシュ: 抽出したテキスト全体のSHA-256
+- チャンクハッシュ: モデル名とプロンプト（チャンク本文を含む）のSHA-256
+  （プロンプトやモデルを変えた場合は別のチェックポイントになる）
+"""
+
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+import hashlib
+import json
+import shutil
+
+from .utils import get_project_root, save_json
+
+
+def get_checkpoints_root() -> Path:
+    """チェックポイントの保存先"""
+    return get_project_root() / "data" / "internal" / "chunk_checkpoints"
+
+
+def text_hash(text: str) -> str:
+    """テキストのSHA-256（16進）"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def chunk_hash(model: str, prompt: str) -> str:
+    """チャンクハッシュ（モデル名とプロンプトのSHA-256）"""
+    return text_hash(f"{model}\n{prompt}")
+
+
+def get_checkpoint_dir(book_hash: str) -> Path:
+    """書籍ごとのチェックポイントのディレクトリ"""
+    return get_checkpoints_root() / book_hash[:32]
+
+
+def load_checkpoints(book_hash: str) -> Dict[str, Dict[str, Any]]:
+    """
+    保存済みのチャンクまとめを読み込む
+
+    Args:
+        book_hash: 書籍ハッシュ
+
+    Returns:
+        {チャンクハッシュ: {'chunk_index', 'chunk_hash', 'summary', 'model', 'created_at'}}
+        壊れたファイルは無視する
+    """
+    checkpoint_dir = get_checkpoint_dir(book_hash)
+    if not checkpoint_dir.exists():
+        return {}
+
+    checkpoints = {}
+    for path in checkpoint_dir.glob("*.json"):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if data.get("summary") and data.get("chunk_hash") == path.stem:
+            checkpoints[path.stem] = data
+    return checkpoints
+
+
+def save_checkpoint(book_hash: str, hash_value: str, chunk_index: int, summary: str, model: str) -> Path:
+    """
+    チャンクまとめを保存（アトミック書き込み）
+
+    Args:
+        book_hash: 書籍ハッシュ
+        hash_value: チャンクハッシュ
+        chunk_index: チャンク番号（0始まり、表示用）
+        summary: まとめ
+        model: モデル名
+
+    Returns:
+        保存先パス
+    """
+    path = get_checkpoint_dir(book_hash) / f"{hash_value}.json"
+    save_json(path, {
+        "chunk_index": chunk_index,
+        "chunk_hash": hash_value,
+        "summary": summary,
+        "model": model,
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+    })
+    return path
+
+
+def clear_checkpoints(book_hash: Optional[str] = None) -> int:
+    """
+    チェックポイントを削除
+
+    Args:
+        book_hash: 書籍ハッシュ（Noneの場合はすべて）
+
+    Returns:
+        削除したディレクトリの数
+    """
+    root = get_checkpoints_root()
+    targets: List[Path] = [get_checkpoint_dir(book_hash)] if book_hash else (
+        [p for p in root.iterdir() if p.is_dir()] if root.exists() else []
+    )
+    removed = 0
+    for target in targets:
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+チャンク分割の計画（書籍分析のチャンクサイズ決定）
+
+モデルのコンテキスト長・まとめの出力量・日本語テキストのトークン数の見積もりから、
+品質設定ごとにチャンクサイズ（文字数）を決める。
+品質を保てる範囲でチャンクを大きくし、API呼び出しの回数を減らす。
+
+分析を始める前に、予測したAPI呼び出し回数・時間・コストを表示できる。
+
+品質設定（QUALITY_PRESETS）:
+- high: 1チャンクを小さめにして、細かい内容までまとめに残す
+- balanced: 標準（各チャンクの重要な文を6割に絞ってから送る）
+- fast: 1チャンクを大きくして、呼び出し回数と時間を最小にする（重要な文を4割に絞る）
+
+重要な文の抽出（extract_ratio）は extractive_summarizer でローカルに行う。
+"""
+
+from typing import Dict, Any, List
+import math
+import re
+
+from .tracing import PRICING
+
+# モデルごとの上限（トークン）
+MODEL_LIMITS = {
+    "gemini-2.5-flash-lite": {"context_tokens": 1_048_576, "output_tokens": 65_536},
+}
+
+# コンテキストのうちチャンク本文に使う割合の上限（長すぎる入力は品質が落ちるため余裕を残す）
+CONTEXT_FRACTION = 0.5
+
+# 品質設定: 1チャンクの入力トークンの目安と、Geminiに送る前に残す文字数の割合
+QUALITY_PRESETS = {
+    "high": {"label": "高品質", "target_input_tokens": 8_000, "extract_ratio": 1.0},
+    "balanced": {"label": "標準", "target_input_tokens": 30_000, "extract_ratio": 0.6},
+    "fast": {"label": "高速", "target_input_tokens": 120_000, "extract_ratio": 0.4},
+}
+DEFAULT_QUALITY = "balanced"
+
+# まとめ1件の出力（1000-1500文字）とプロンプトの固定部分
+SUMMARY_OUTPUT_CHARS = 1500
+PROMPT_OVERHEAD_TOKENS = 100
+
+# 時間の見積もり（1回の呼び出し = 固定の待ち時間 + 入力の処理 + 出力の生成）
+BASE_LATENCY_SECONDS = 1.0
+INPUT_TOKENS_PER_SECOND = 20_000
+OUTPUT_TOKENS_PER_SECOND = 200
+
+# 文字種ごとのトークン数（1文字あたり、Geminiのトークナイザでの実測に近い値）
+_TOKENS_PER_CHAR = (
+    (re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff\uff66-\uff9f]'), 1.0),  # かな・漢字
+    (re.compile(r'[\x00-\x7f]'), 0.25),  # ASCII（英数字・記号）
+)
+_OTHER_TOKENS_PER_CHAR = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    テキストのトークン数を見積もる（APIを呼ばずにローカルで計算）
+
+    Args:
+        text: テキスト
+
+    Returns:
+        推定トークン数
+    """
+    remaining = len(text)
+    tokens = 0.0
+    for pattern, per_char in _TOKENS_PER_CHAR:
+        count = len(pattern.findall(text))
+        tokens += count * per_char
+        remaining -= count
+    tokens += remaining * _OTHER_TOKENS_PER_CHAR
+    return math.ceil(tokens)
+
+
+def _estimate_seconds(tokens_in: int, tokens_out: int) -> float:
+    return BASE_LATENCY_SECONDS + tokens_in / INPUT_TOKENS_PER_SECOND + tokens_out / OUTPUT_TOKENS_PER_SECOND
+
+
+def _estimate_cost(model: str, tokens_in: int, tokens_out: int) -> float:
+    price = PRICING["gemini"].get(model, {"input": 0.0, "output": 0.0})
+    return (tokens_in * price["input"] + tokens_out * price["output"]) / 1_000_000
+
+
+def _count_chunks(paragraph_lengths: List[int], chunk_size: int) -> int:
+    """book_analyzer.chunk_text と同じ詰め方（段落単位）でのチャンク数"""
+    count = 0
+    current = 0
+    for length in paragraph_lengths:
+        if current + length <= chunk_size:
+            current += length + 2
+        else:
+            if current:
+                count += 1
+            current = length + 2
+    return count + (1 if current else 0)
+
+
+def plan_chunks(
+    text: str,
+    model: str = "gemini-2.5-flash-lite",
+    quality: str = DEFAULT_QUALITY
+) -> Dict[str, Any]:
+    """
+    チャンクサイズを決め、API呼び出し回数・時間・コストを予測する
+
+    チャンクは段落単位で詰めるため、「品質設定の目安」と「コンテキスト長の上限」を超えない
+    チャンクサイズで実際に詰めたときの数をチャンク数とし、チャンクサイズはその数を保つ最小の大きさにする
+    （各チャンクの大きさを揃え、最後だけ小さいチャンクを作らない）。
+
+    Args:
+        text: 書籍の全文
+        model: まとめに使うモデル名
+        quality: 品質設定（QUALITY_PRESETS のキー）
+
+    Returns:
+        {'model', 'quality', 'chunk_size', 'num_chunks', 'total_tokens', 'tokens_per_chunk',
+         'extract_ratio', 'api_calls', 'seconds', 'cost_usd'}
+        tokens_per_chunk は重要な文を抽出した後の、1回の呼び出しで送るトークン数
+    """
+    if quality not in QUALITY_PRESETS:
+        raise ValueError(f"不明な品質設定: {quality}（{', '.join(QUALITY_PRESETS)}）")
+
+    limits = MODEL_LIMITS.get(model, MODEL_LIMITS["gemini-2.5-flash-lite"])
+    total_tokens = estimate_tokens(text)
+    tokens_per_char = total_tokens / len(text) if text else 1.0
+
+    output_tokens = estimate_tokens("あ" * SUMMARY_OUTPUT_CHARS)
+    max_input_tokens = min(
+        QUALITY_PRESETS[quality]["target_input_tokens"],
+        limits["context_tokens"] * CONTEXT_FRACTION - PROMPT_OVERHEAD_TOKENS - output_tokens
+    )
+
+    paragraph_lengths = [len(para) for para in text.split('\n\n')]
+    max_chunk_size = max(1, int(max_input_tokens / tokens_per_char))
+    num_chunks = max(1, _count_chunks(paragraph_lengths, max_chunk_size))
+
+    # チャンク数が増えない範囲でチャンクサイズを小さくする（二分探索）
+    low, high = max(1, len(text) // num_chunks), max_chunk_size
+    while low < high:
+        middle = (low + high) // 2
+        if _count_chunks(paragraph_lengths, middle) <= num_chunks:
+            high = middle
+        else:
+            low = middle + 1
+    chunk_size = high
+
+    extract_ratio = QUALITY_PRESETS[quality]["extract_ratio"]
+    tokens_per_chunk = math.ceil(total_tokens / num_chunks * extract_ratio)
+    chunk_in = tokens_per_chunk + PROMPT_OVERHEAD_TOKENS
+
+    # 全体概要（チャンクまとめをすべて入力に含める1回の呼び出し）
+    final_in = num_chunks * output_tokens + PROMPT_OVERHEAD_TOKENS
+    final_out = estimate_tokens("あ" * 800) * 2  # 800字の概要 + JSONの他の項目
+
+    seconds = num_chunks * _estimate_seconds(chunk_in, output_tokens) + _estimate_seconds(final_in, final_out)
+    cost_usd = num_chunks * _estimate_cost(model, chunk_in, output_tokens) + _estimate_cost(model, final_in, final_out)
+
+    return {
+        "model": model,
+        "quality": quality,
+        "chunk_size": chunk_size,
+        "num_chunks": num_chunks,
+        "total_tokens": total_tokens,
+        "tokens_per_chunk": tokens_per_chunk,
+        "extract_ratio": extract_ratio,
+        "api_calls": num_chunks + 1,
+        "seconds": round(seconds, 1),
+        "cost_usd": round(cost_usd, 4),
+    }
+
+
+def format_plan(plan: Dict[str, Any]) -> str:
+    """
+    予測を表示用の文字列にする
+
+    Args:
+        plan: plan_chunks() の結果
+
+    Returns:
+        1行の文字列
+    """
+    label = QUALITY_PRESETS[plan["quality"]]["label"]
+    extract = f"重要な文を{plan['extract_ratio']:.0%}に絞って" if plan.get("extract_ratio", 1.0) < 1.0 else ""
+    return (
+        f"品質: {label} / チャンク {plan['num_chunks']}個（約{plan['chunk_size']:,}文字・"
+        f"{extract}{plan['tokens_per_chunk']:,}トークン） / 予測: API {plan['api_calls']}回・"
+        f"約{plan['seconds']:.0f}秒・${plan['cost_usd']:.4f}"
+    )
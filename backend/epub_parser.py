@@ -3,64 +3,215 @@
 EPUBファイルの解析モジュール
 
 EPUBからテキストを抽出（v1非依存）
+
+- ルビ（<rt> の読み・<rp> の括弧）は本文に混ぜない（"keep" の場合は 漢字《かんじ》 の形で残す）
+- 改行はブロック要素（段落・見出しなど）と <br> の位置だけに入れ、インライン要素の中では改行しない
+- NFKC正規化で全角英数字・半角カナなどの表記を統一する
 """
 
 import json
+import re
+import unicodedata
 from pathlib import Path
-from typing import Dict, Any
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
-from .utils import save_json, get_project_root
-
+from typing import Dict, Any, Optional, List, Tuple
+from .utils import save_json
+from .workspace import Workspace, resolve_workspace
+from . import tracing
+
+# ルビの扱い
+RUBY_MODES = {
+    "drop": "読みを除く",
+    "keep": "漢字《かんじ》の形で残す",
+}
+DEFAULT_RUBY_MODE = "drop"
+
+# 前後で改行するブロック要素
+BLOCK_TAGS = [
+    "address", "article", "aside", "blockquote", "caption", "dd", "div", "dl", "dt", "figcaption",
+    "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav",
+    "ol", "p", "pre", "section", "table", "td", "th", "title", "tr", "ul",
+]
+_BLOCK_TAG_SET = frozenset(BLOCK_TAGS)
+
+_LINE_BREAK = "\ue000"  # ブロックの境界の目印（私用領域の文字）
+_SPACES = re.compile(r'\s+')
+_SOURCE_NEWLINE = re.compile(r'\s*\n\s*')
+_CJK = r'[\u3000-\u30ff\u3400-\u9fff\uf900-\ufaff\uff01-\uff60]'
+_CJK_SOURCE_NEWLINE = re.compile(rf'(?<={_CJK})\n(?={_CJK})')
+# NFKCで変わらない文字（ASCII・ひらがな・全角カタカナ・漢字・句読点・かぎ括弧）以外の連続
+# 直前の1文字も含める（結合文字の濁点などを前の文字と合成するため）
+_NFKC_UNSTABLE = re.compile(r'.?[^\n -~、。「-』ぁ-ゖァ-ヺー一-鿿]+', re.S)
+
+
+def _normalize_nfkc(text: str) -> str:
+    """NFKC正規化（変わりうる部分だけを正規化する。結果は unicodedata.normalize と同じ）"""
+    return _NFKC_UNSTABLE.sub(lambda m: unicodedata.normalize('NFKC', m.group()), text)
+
+
+def _collect_text(node, parts: List[str], ruby: str) -> int:
+    """
+    node の子孫のテキストを parts に集める（ブロック要素の境界と <br> には _LINE_BREAK を入れる）
 
-def extract_text_from_epub(epub_path: Path) -> str:
+    Returns:
+        除いたルビの文字数
     """
-    EPUBファイルからテキストを抽出
+    from bs4.element import CData, NavigableString, PreformattedString
+
+    ruby_chars = 0
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            # コメント・DOCTYPE などは除く
+            if not isinstance(child, PreformattedString) or isinstance(child, CData):
+                parts.append(str(child))
+            continue
+
+        name = child.name
+        if name in ("script", "style"):
+            continue
+        if name == "rp":
+            ruby_chars += len(child.get_text())
+        elif name in ("rt", "rtc"):
+            reading = child.get_text()
+            if ruby == "keep" and reading.strip():
+                parts.append(f"《{reading.strip()}》")
+            else:
+                ruby_chars += len(reading)
+        elif name == "br":
+            parts.append(_LINE_BREAK)
+        elif name in _BLOCK_TAG_SET:
+            parts.append(_LINE_BREAK)
+            ruby_chars += _collect_text(child, parts, ruby)
+            parts.append(_LINE_BREAK)
+        else:
+            ruby_chars += _collect_text(child, parts, ruby)
+    return ruby_chars
+
+
+def _document_text(html: bytes, ruby: str = "drop", normalize: bool = True) -> Tuple[str, int]:
+    """
+    XHTML 1つ分のテキスト
 
     Args:
-        epub_path: EPUBファイルのパス
+        html: XHTMLの内容
+        ruby: ルビ（<rt>）の扱い（RUBY_MODES のキー）
+        normalize: True の場合、NFKC正規化する
 
     Returns:
-        抽出されたテキスト
+        (テキスト, 除いたルビの文字数)
     """
-    book = epub.read_epub(str(epub_path))
-
-    text_content = []
+    from bs4 import BeautifulSoup
+
+    # ルビ: <rp>（括弧）は常に除き、<rt>（読み）は除くか《》で残す
+    # 改行はブロック要素の境界と <br> だけに入れる（<ruby> や <span> などインライン要素の中では改行しない）
+    parts: List[str] = []
+    ruby_chars = _collect_text(BeautifulSoup(html, 'html.parser'), parts, ruby)
+
+    text = ''.join(parts)
+    if normalize:
+        text = _normalize_nfkc(text)
+    lines = []
+    for line in text.split(_LINE_BREAK):
+        # ソースの折り返し（改行）は日本語の文字の間では除き、それ以外の空白は1つの空白にまとめる
+        line = _CJK_SOURCE_NEWLINE.sub('', _SOURCE_NEWLINE.sub('\n', line))
+        line = _SPACES.sub(' ', line).strip()
+        if line:
+            lines.append(line)
+    return '\n'.join(lines), ruby_chars
+
+
+def extract_text_with_chapters(
+    epub_path: Path,
+    ruby: str = DEFAULT_RUBY_MODE,
+    normalize: bool = True
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    EPUBファイルからテキストと章の位置を抽出
 
-    # すべてのドキュメントアイテムを取得
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            # HTMLコンテンツをパース
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
+    EPUBのドキュメント（XHTML）1つを1章とし、結合後のテキスト内の開始・終了位置を記録する。
+    章の中はブロック要素（段落・見出しなど）ごとに1行、章の間は空行で区切る。
 
-            # テキストを抽出
-            text = soup.get_text(separator='\n', strip=True)
+    Args:
+        epub_path: EPUBファイルのパス
+        ruby: ルビの扱い（"drop": 読みを除く / "keep": 漢字《かんじ》の形で残す）
+        normalize: True の場合、NFKC正規化する（全角英数字・半角カナなどを統一）
 
-            if text:
-                text_content.append(text)
+    Returns:
+        (抽出されたテキスト, [{'index', 'title', 'start', 'end'}, ...])
+        title は章の先頭行（40文字まで）、start / end はテキスト内の文字位置
+    """
+    import ebooklib
+    from ebooklib import epub
+
+    if ruby not in RUBY_MODES:
+        raise ValueError(f"不明なルビの扱い: {ruby}（{', '.join(RUBY_MODES)}）")
+
+    with tracing.span("epub.extract", kind="io", file=Path(epub_path).name) as sp:
+        sp.add(bytes_in=tracing.file_size(epub_path))
+        book = epub.read_epub(str(epub_path))
+
+        text_content = []
+        chapters = []
+        offset = 0
+        ruby_chars = 0
+
+        # すべてのドキュメントアイテムを取得
+        for item in book.get_items():
+            if item.get_type() == ebooklib.ITEM_DOCUMENT:
+                text, dropped = _document_text(item.get_content(), ruby, normalize)
+                ruby_chars += dropped
+
+                if text:
+                    if text_content:
+                        offset += 2  # 章の区切り（\n\n）
+                    chapters.append({
+                        "index": len(chapters),
+                        "title": text.split('\n', 1)[0][:40],
+                        "start": offset,
+                        "end": offset + len(text),
+                    })
+                    text_content.append(text)
+                    offset += len(text)
+
+        # すべてのテキストを結合
+        full_text = '\n\n'.join(text_content)
+        sp.add(characters=len(full_text))
+        sp.set(ruby_chars_dropped=ruby_chars)
+
+    return full_text, chapters
+
+
+def extract_text_from_epub(epub_path: Path, ruby: str = DEFAULT_RUBY_MODE, normalize: bool = True) -> str:
+    """
+    EPUBファイルからテキストを抽出
 
-    # すべてのテキストを結合
-    full_text = '\n\n'.join(text_content)
+    Args:
+        epub_path: EPUBファイルのパス
+        ruby: ルビの扱い（"drop": 読みを除く / "keep": 漢字《かんじ》の形で残す）
+        normalize: True の場合、NFKC正規化する
 
+    Returns:
+        抽出されたテキスト
+    """
+    full_text, _ = extract_text_with_chapters(epub_path, ruby, normalize)
     return full_text
 
 
-def parse_epub(epub_path: Path, output_dir: Path) -> Dict[str, Any]:
+def parse_epub(epub_path: Path, output_dir: Path, workspace: Optional[Workspace] = None) -> Dict[str, Any]:
     """
     EPUBファイルをテキストに変換し、基本情報を返す
 
     Args:
         epub_path: EPUBファイルのパス
         output_dir: 出力先ディレクトリ（data/raw/）
+        workspace: 中間データの保存先（Noneの場合はdata/internal/）
 
     Returns:
         基本情報の辞書
     """
     print(f"  📖 EPUBファイルを解析中: {epub_path.name}")
 
-    # EPUBからテキストを抽出
-    full_text = extract_text_from_epub(epub_path)
+    # EPUBからテキストと章の位置を抽出
+    full_text, chapters = extract_text_with_chapters(epub_path)
 
     # 書籍名（ファイル名から）
     book_name = epub_path.stem
@@ -88,14 +239,13 @@ def parse_epub(epub_path: Path, output_dir: Path) -> Dict[str, Any]:
         "text_file": str(text_file),
         "full_text": full_text,  # 後続処理で使用
         "character_count": len(full_text),
+        "chapters": chapters,
         "preview": full_text[:500] + "..." if len(full_text) > 500 else full_text,
         "status": "parsed"
     }
 
     # data/internal/に基本情報を保存
-    internal_dir = get_project_root() / "data" / "internal"
-    internal_dir.mkdir(parents=True, exist_ok=True)
-    basic_info_file = internal_dir / "basic_info.json"
+    basic_info_file = resolve_workspace(workspace).internal_file("basic_info.json")
 
     save_data = {k: v for k, v in summary.items() if k != 'full_text'}  # full_textは除外
     save_json(basic_info_file, save_data)
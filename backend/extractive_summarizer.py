@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+抽出型要約（APIを使わずに重要な文を選ぶ）
+
+文を「。！？」で区切り、文字バイグラムのTF-IDFベクトルの類似度グラフで TextRank を計算して、
+スコアの高い文を文字数の上限まで選ぶ（選んだ文は元の順番で並べる）。
+形態素解析器は使わず、NumPy の行列演算だけで処理する。
+
+用途:
+- チャンクまとめ（book_analyzer.summarize_chunks）の前処理: Geminiに送る文字数を減らす
+- APIを使わない要約（book_analyzer.analyze_book の mode="offline"）
+"""
+
+from collections import Counter
+from typing import List, Union
+import re
+
+import numpy as np
+
+# 文の区切り（閉じ括弧は直前の文に含める）
+SENTENCE_PATTERN = re.compile(r'[^。！？!?\n]+(?:[。！？!?]+[」』）)]*)?')
+# キーワード候補（漢字・カタカナの2文字以上の連続）
+KEYWORD_PATTERN = re.compile(r'[\u4e00-\u9fff\u30a1-\u30fa\u30fc]{2,}')
+
+# バイグラムの次元数（語彙がこれより多い場合は番号の剰余でまとめる）
+FEATURE_DIMENSIONS = 2048
+# これより短い文（見出し・相づちなど）は選ばない
+MIN_SENTENCE_CHARS = 8
+# 1回のTextRankで扱う文の数の上限（類似度行列が 文の数^2 になるため）
+MAX_SENTENCES = 2000
+# TextRank のパラメータ
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    テキストを文に分割
+
+    Args:
+        text: テキスト
+
+    Returns:
+        文のリスト（前後の空白を除く、空の文は含めない）
+    """
+    return [s.strip() for s in SENTENCE_PATTERN.findall(text) if s.strip()]
+
+
+def _tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    """文ごとの文字バイグラムのTF-IDF（行ごとにL2正規化済み、float32）"""
+    vocabulary = {}
+    rows = []
+    columns = []
+    for i, sentence in enumerate(sentences):
+        for j in range(len(sentence) - 1):
+            rows.append(i)
+            columns.append(vocabulary.setdefault(sentence[j:j + 2], len(vocabulary)))
+
+    num_sentences = len(sentences)
+    dimensions = min(FEATURE_DIMENSIONS, max(1, len(vocabulary)))
+    if not rows:
+        return np.zeros((num_sentences, dimensions), dtype=np.float32)
+
+    cells = np.asarray(rows, dtype=np.int64) * dimensions + np.asarray(columns, dtype=np.int64) % dimensions
+    counts = np.bincount(cells, minlength=num_sentences * dimensions).reshape(num_sentences, dimensions)
+    counts = counts.astype(np.float32)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + num_sentences) / (1.0 + document_frequency)) + 1.0
+    matrix = np.log1p(counts) * idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def rank_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    TextRank で文の重要度を計算
+
+    Args:
+        sentences: 文のリスト
+
+    Returns:
+        文ごとのスコア（合計1.0）
+    """
+    num_sentences = len(sentences)
+    if num_sentences == 0:
+        return np.zeros(0)
+    if num_sentences == 1:
+        return np.ones(1)
+
+    matrix = _tfidf_matrix(sentences)
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # 類似度を遷移確率にする（どの文とも似ていない文は全体に均等に遷移）
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1.0), 1.0 / num_sentences)
+
+    scores = np.full(num_sentences, 1.0 / num_sentences)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1.0 - DAMPING) / num_sentences + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            scores = updated
+            break
+        scores = updated
+    return scores / scores.sum()
+
+
+def _select(sentences: List[str], max_chars: int) -> List[int]:
+    """スコアの高い順に max_chars まで文を選ぶ（選んだ文の番号を元の順番で返す）"""
+    scores = rank_sentences(sentences)
+    lengths = np.array([len(s) for s in sentences])
+    scores = np.where(lengths >= MIN_SENTENCE_CHARS, scores, -1.0)
+    lengths = lengths + 1  # 区切りの改行の分
+
+    selected = []
+    total = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if scores[index] < 0 and selected:
+            break
+        if total + lengths[index] > max_chars:
+            continue
+        selected.append(int(index))
+        total += int(lengths[index])
+    if not selected:
+        selected = [int(np.argmax(scores))]
+    return sorted(selected)
+
+
+def extract_summary(text: str, max_chars: int) -> str:
+    """
+    重要な文を max_chars 文字まで選んで、元の順番でつなげる
+
+    文の数が MAX_SENTENCES を超える場合は、区間ごとに文字数の上限を按分して選ぶ。
+
+    Args:
+        text: テキスト
+        max_chars: 要約の上限（文字数）
+
+    Returns:
+        要約（連続する文はそのままつなげ、間を飛ばした箇所は改行で区切る）
+        テキストが max_chars 以下の場合はそのまま返す。1文が max_chars より長い場合は途中で切る
+    """
+    if len(text) <= max_chars:
+        return text
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return text[:max_chars]
+
+    selected: List[int] = []
+    for start in range(0, len(sentences), MAX_SENTENCES):
+        block = sentences[start:start + MAX_SENTENCES]
+        block_chars = sum(len(s) for s in block)
+        block_budget = max(1, max_chars * block_chars // max(1, len(text)))
+        selected.extend(start + index for index in _select(block, block_budget))
+
+    parts = []
+    previous = None
+    for index in selected:
+        if previous is not None:
+            parts.append("" if index == previous + 1 else "\n")
+        parts.append(sentences[index])
+        previous = index
+    return "".join(parts)[:max_chars]
+
+
+def extract_keywords(texts: Union[str, List[str]], top_n: int = 5) -> List[str]:
+    """
+    主要な語（漢字・カタカナの連続）を選ぶ
+
+    複数のテキスト（チャンクなど）を渡した場合、多くのテキストに現れる語を優先する。
+
+    Args:
+        texts: テキスト、またはテキストのリスト
+        top_n: 選ぶ語の数
+
+    Returns:
+        語のリスト（重要度の高い順）
+    """
+    if isinstance(texts, str):
+        texts = [texts]
+
+    frequency = Counter()
+    spread = Counter()
+    for text in texts:
+        words = KEYWORD_PATTERN.findall(text)
+        frequency.update(words)
+        spread.update(set(words))
+
+    scores = {
+        word: count * (1.0 + spread[word] / len(texts)) * np.sqrt(len(word))
+        for word, count in frequency.items()
+    }
+    return sorted(scores, key=lambda word: (-scores[word], word))[:top_n]
@@ -6,16 +6,29 @@ DALL-E 3を直接使用して画像を生成
 """
 
 from pathlib import Path
-from typing import Dict, Any, Optional
-import openai
-import os
-import requests
+from typing import Dict, Any, Optional, List, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+import contextvars
+import time
 from dotenv import load_dotenv
-from .utils import get_project_root
+from .workspace import Workspace, resolve_workspace
+from . import api_clients, tracing
 
 load_dotenv()
 
+# DALL-E 3のサイズマッピング
+IMAGE_SIZES = {
+    "16:9": "1792x1024",  # 横長
+    "9:16": "1024x1792",  # 縦長
+    "1:1": "1024x1024"    # 正方形
+}
+
+# 不足分の画像を同時に生成する数（API全体の上限は rate_governor が守る）
+MAX_IMAGE_WORKERS = 3
+# 1枚あたりの生成時間の目安（秒、今回1枚も生成しなかった場合の節約時間の見積もりに使う）
+ESTIMATED_SECONDS_PER_IMAGE = 20.0
+
 
 def _sanitize_prompt(prompt: str) -> str:
     """
@@ -53,7 +66,8 @@ def generate_image_for_scene(
     book_name: str,
     scene_number: int,
     visual_style: str = "Cinematic",
-    aspect_ratio: str = "9:16"
+    aspect_ratio: str = "9:16",
+    workspace: Optional[Workspace] = None
 ) -> Path:
     """
     シーン用の画像を生成（DALL-E 3）
@@ -64,23 +78,14 @@ def generate_image_for_scene(
         scene_number: シーン番号
         visual_style: ビジュアルスタイル
         aspect_ratio: アスペクト比
+        workspace: 保存先ワークスペース（Noneの場合はdata/output/）
 
     Returns:
         生成された画像のパス
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY環境変数が設定されていません")
+    client = api_clients.get_openai_client()
 
-    client = openai.OpenAI(api_key=api_key)
-
-    # DALL-E 3のサイズマッピング
-    size_map = {
-        "16:9": "1792x1024",  # 横長
-        "9:16": "1024x1792",  # 縦長
-        "1:1": "1024x1024"    # 正方形
-    }
-    size = size_map.get(aspect_ratio, "1024x1792")
+    size = IMAGE_SIZES.get(aspect_ratio, "1024x1792")
 
     # プロンプトにスタイルを追加（安全なプロンプトに調整）
     # コンテンツフィルター回避のため、より一般的な表現に
@@ -92,44 +97,52 @@ def generate_image_for_scene(
 
     try:
         # DALL-E 3で画像生成
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=full_prompt,
-            size=size,
-            quality="standard",
-            n=1
-        )
+        with tracing.span("dalle.generate", kind="api", book=book_name, scene=scene_number):
+            response = api_clients.call(
+                "openai.images",
+                client.images.generate,
+                model="dall-e-3",
+                prompt=full_prompt,
+                size=size,
+                quality="standard",
+                n=1
+            )
+            tracing.record_image("dall-e-3", size, "standard", full_prompt)
     except Exception as e:
         error_msg = str(e)
         if "content_policy_violation" in error_msg:
             # コンテンツポリシー違反の場合、より安全なプロンプトで再試行
             print(f"  ⚠️ コンテンツフィルターに引っかかりました。より安全なプロンプトで再試行...")
             fallback_prompt = f"A {visual_style} style illustration for a book scene. Abstract and artistic representation."
-            response = client.images.generate(
-                model="dall-e-3",
-                prompt=fallback_prompt,
-                size=size,
-                quality="standard",
-                n=1
-            )
+            with tracing.span("dalle.generate", kind="api", book=book_name, scene=scene_number, fallback=True):
+                response = api_clients.call(
+                    "openai.images",
+                    client.images.generate,
+                    model="dall-e-3",
+                    prompt=fallback_prompt,
+                    size=size,
+                    quality="standard",
+                    n=1
+                )
+                tracing.record_image("dall-e-3", size, "standard", fallback_prompt)
         else:
             raise
 
     image_url = response.data[0].url
 
     # 画像をダウンロードして保存
-    project_root = get_project_root()
-    output_dir = project_root / "data" / "output" / "images" / book_name
-    output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = resolve_workspace(workspace).output_subdir("images", book_name)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     image_filename = f"scene_{scene_number:02d}_{timestamp}.png"
     image_path = output_dir / image_filename
 
     # 画像をダウンロード
-    img_data = requests.get(image_url).content
-    with open(image_path, 'wb') as f:
-        f.write(img_data)
+    with tracing.span("image.download", kind="io", book=book_name, scene=scene_number) as sp:
+        img_data = api_clients.http_get(image_url).content
+        with open(image_path, 'wb') as f:
+            f.write(img_data)
+        sp.add(bytes_in=len(img_data), bytes_out=len(img_data))
 
     print(f"  ✓ 画像を保存: {image_path}")
 
@@ -141,7 +154,8 @@ def regenerate_image_for_scene(
     book_name: str,
     scene_number: int,
     visual_style: str = "Cinematic",
-    aspect_ratio: str = "9:16"
+    aspect_ratio: str = "9:16",
+    workspace: Optional[Workspace] = None
 ) -> Path:
     """
     シーンの画像を再生成
@@ -152,6 +166,7 @@ def regenerate_image_for_scene(
         scene_number: シーン番号
         visual_style: ビジュアルスタイル
         aspect_ratio: アスペクト比
+        workspace: 保存先ワークスペース（Noneの場合はdata/output/）
 
     Returns:
         生成された画像のパス
@@ -162,7 +177,8 @@ def regenerate_image_for_scene(
         book_name,
         scene_number,
         visual_style,
-        aspect_ratio
+        aspect_ratio,
+        workspace
     )
 
 
@@ -170,7 +186,8 @@ def generate_all_scene_images(
     scenes: list[Dict[str, Any]],
     book_name: str,
     visual_style: str = "Cinematic",
-    aspect_ratio: str = "9:16"
+    aspect_ratio: str = "9:16",
+    workspace: Optional[Workspace] = None
 ) -> Dict[int, Path]:
     """
     全シーンの画像を一括生成
@@ -180,6 +197,7 @@ def generate_all_scene_images(
         book_name: 書籍名
         visual_style: ビジュアルスタイル
         aspect_ratio: アスペクト比
+        workspace: 保存先ワークスペース（Noneの場合はdata/output/）
 
     Returns:
         {シーン番号: 画像パス} の辞書
@@ -196,7 +214,8 @@ def generate_all_scene_images(
                 book_name,
                 scene_num,
                 visual_style,
-                aspect_ratio
+                aspect_ratio,
+                workspace
             )
             scene_images[scene_num] = image_path
 
@@ -205,3 +224,159 @@ def generate_all_scene_images(
             raise
 
     return scene_images
+
+
+def is_valid_image(image_path) -> bool:
+    """
+    画像ファイルが存在し、壊れていないか（途中で書き込みが止まったファイルなどを除く）
+
+    Args:
+        image_path: 画像のパス（Noneも可）
+
+    Returns:
+        有効な画像ならTrue
+    """
+    from PIL import Image
+
+    if not image_path:
+        return False
+    path = Path(image_path)
+    try:
+        if not path.is_file() or path.stat().st_size == 0:
+            return False
+        with Image.open(path) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+
+
+def find_missing_scenes(
+    scenes: List[Dict[str, Any]],
+    scene_images: Dict[int, Any]
+) -> List[Dict[str, Any]]:
+    """
+    有効な画像がないシーン（未生成・失敗・ファイルが消えた・壊れた）を抽出
+
+    Args:
+        scenes: シーンのリスト
+        scene_images: {シーン番号: 画像パス}
+
+    Returns:
+        画像の生成が必要なシーンのリスト（scenesの順）
+    """
+    return [
+        scene for scene in scenes
+        if not is_valid_image(scene_images.get(scene['scene_number']))
+    ]
+
+
+def generate_missing_scene_images(
+    scenes: List[Dict[str, Any]],
+    book_name: str,
+    scene_images: Optional[Dict[int, Any]] = None,
+    visual_style: str = "Cinematic",
+    aspect_ratio: str = "9:16",
+    workspace: Optional[Workspace] = None,
+    max_workers: int = MAX_IMAGE_WORKERS,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    on_image: Optional[Callable[[int, Optional[Path], Optional[str]], None]] = None
+) -> Dict[str, Any]:
+    """
+    有効な画像がないシーンだけを同時に生成（既存の画像はそのまま使う）
+
+    Args:
+        scenes: シーンのリスト
+        book_name: 書籍名
+        scene_images: 既存の {シーン番号: 画像パス}（Noneの場合は全シーンを生成）
+        visual_style: ビジュアルスタイル
+        aspect_ratio: アスペクト比
+        workspace: 保存先ワークスペース（Noneの場合はdata/output/）
+        max_workers: 同時に生成する数
+        progress_callback: 進捗通知 (メッセージ, 0.0～1.0) を受け取る関数
+        on_image: 1シーン終わるごとに (シーン番号, 画像パス, エラー) で呼ばれる関数（呼び出し元のスレッドで実行）
+
+    Returns:
+        {
+            'scene_images': {シーン番号: Path}（既存 + 今回生成、全シーン分とは限らない）,
+            'generated': [今回生成したシーン番号],
+            'reused': [既存の画像を使ったシーン番号],
+            'errors': {シーン番号: エラーメッセージ},
+            'seconds': 今回の所要時間,
+            'saved_api_calls': 呼ばずに済んだ画像生成APIの回数,
+            'saved_seconds': 節約できた時間の見積もり（1枚ずつ生成した場合）,
+            'saved_cost_usd': 節約できたAPIコストの見積もり
+        }
+    """
+    existing = {int(num): Path(path) for num, path in (scene_images or {}).items() if path}
+    missing = find_missing_scenes(scenes, existing)
+    missing_numbers = {scene['scene_number'] for scene in missing}
+    reused = [scene['scene_number'] for scene in scenes if scene['scene_number'] not in missing_numbers]
+
+    results = {num: existing[num] for num in reused}
+    errors: Dict[int, str] = {}
+    durations: List[float] = []
+    start = time.perf_counter()
+
+    print(f"🖼️ 画像生成: {len(missing)}シーン（既存の画像を使用: {len(reused)}シーン）")
+
+    def generate(scene: Dict[str, Any]) -> Path:
+        scene_start = time.perf_counter()
+        path = generate_image_for_scene(
+            scene['image_prompt'],
+            book_name,
+            scene['scene_number'],
+            visual_style,
+            aspect_ratio,
+            workspace
+        )
+        durations.append(time.perf_counter() - scene_start)
+        return path
+
+    if missing:
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing))))
+        try:
+            # 計測（tracing）の親spanをスレッドに引き継ぐ
+            futures = {
+                executor.submit(contextvars.copy_context().run, generate, scene): scene['scene_number']
+                for scene in missing
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                scene_num = futures[future]
+                try:
+                    results[scene_num] = future.result()
+                    error = None
+                except Exception as e:
+                    error = str(e)
+                    errors[scene_num] = error
+                    print(f"  ❌ シーン{scene_num}でエラー: {error}")
+
+                if on_image:
+                    on_image(scene_num, results.get(scene_num), error)
+                if progress_callback:
+                    progress_callback(f"シーン{scene_num}の画像を生成 ({done}/{len(missing)})", done / len(missing))
+        except BaseException:
+            # キャンセルなどで中断した場合、まだ始まっていないシーンは生成しない
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
+    per_image = sum(durations) / len(durations) if durations else ESTIMATED_SECONDS_PER_IMAGE
+    size = IMAGE_SIZES.get(aspect_ratio, "1024x1792")
+    price = tracing.PRICING["images"]["dall-e-3"].get(f"standard_{size}", 0.0)
+
+    report = {
+        'scene_images': dict(sorted(results.items())),
+        'generated': sorted(num for num in missing_numbers if num not in errors),
+        'reused': reused,
+        'errors': errors,
+        'seconds': round(time.perf_counter() - start, 2),
+        'saved_api_calls': len(reused),
+        'saved_seconds': round(per_image * len(reused), 1),
+        'saved_cost_usd': round(price * len(reused), 4),
+    }
+    print(
+        f"  ✓ 生成 {len(report['generated'])}枚 / 失敗 {len(errors)}枚 / 再利用 {len(reused)}枚 "
+        f"（節約: API {report['saved_api_calls']}回・約{report['saved_seconds']:.0f}秒・${report['saved_cost_usd']:.2f}）"
+    )
+    return report
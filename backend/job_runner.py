@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+"""
+バックグラウンドジョブ実行モジュール
+
+時間のかかる処理（書籍分析・画像生成・音声生成・動画生成）をプロセスプールで実行し、
+状態をSQLiteのジョブテーブル（data/internal/jobs/jobs.sqlite3）に記録する。
+
+- Streamlitのページはジョブを投入し、get_job() で進捗を取得して表示する
+- ジョブの状態と結果はテーブルに残るため、再実行やブラウザの再接続でも失われない
+- ジョブには投入元（ブラウザのセッションなど）の owner を記録し、再接続時の復元は同じ owner のジョブに限る
+- cancel_job() でキャンセルを要求すると、ワーカーは次の進捗報告時に処理を中断する
+- アプリが落ちて実行中のまま残ったジョブは、次回起動時に "orphaned" にする
+"""
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+from . import tracing
+from .utils import get_project_root
+from .workspace import Workspace, get_workspace
+
+# ジョブの状態
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_ORPHANED = "orphaned"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED, STATUS_ORPHANED)
+
+# 同時に実行するジョブ数
+MAX_WORKERS = int(os.getenv("JOB_RUNNER_WORKERS", "2"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    book TEXT NOT NULL,
+    owner TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL DEFAULT '',
+    message TEXT NOT NULL DEFAULT '',
+    progress REAL NOT NULL DEFAULT 0,
+    params TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    workspace_job_id TEXT,
+    runner_pid INTEGER,
+    worker_pid INTEGER,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    acknowledged INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_kind_book ON jobs (kind, book, created_at);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+# スキーマの作成・移行が済んだジョブテーブル（プロセスごとに1回だけ行う）
+_schema_ready: set = set()
+
+
+class JobCancelled(Exception):
+    """キャンセル要求によりジョブを中断したことを示す例外"""
+
+
+def get_jobs_db_path() -> Path:
+    """ジョブテーブルのパス"""
+    return get_project_root() / "data" / "internal" / "jobs" / "jobs.sqlite3"
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+@contextmanager
+def _connect():
+    """ジョブテーブルに接続（スキーマの作成・移行はプロセスごとに初回だけ）"""
+    db_path = get_jobs_db_path()
+    if not db_path.exists():
+        # 削除された場合は作り直す
+        _schema_ready.discard(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if db_path not in _schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _migrate(conn)
+            conn.commit()
+            _schema_ready.add(db_path)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """owner 列がない（以前のバージョンで作成した）ジョブテーブルに列を追加"""
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+    if 'owner' not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner_kind ON jobs (owner, kind, created_at)")
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job['params'] = json.loads(job['params'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    job['acknowledged'] = bool(job['acknowledged'])
+    return job
+
+
+def _to_json(value: Any) -> str:
+    """Pathなどを含む値をJSON文字列に変換"""
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class JobContext:
+    """
+    ワーカー内で実行中のジョブに渡されるコンテキスト
+
+    Attributes:
+        job_id: ジョブID
+        workspace: ジョブの作業ディレクトリ
+    """
+
+    def __init__(self, job_id: str, workspace: Workspace):
+        self.job_id = job_id
+        self.workspace = workspace
+
+    def progress(self, stage: str, fraction: float = 0.0, message: str = "") -> None:
+        """
+        進捗を記録（キャンセルが要求されていればJobCancelledを送出）
+
+        Args:
+            stage: ステージ名（例: "images"）
+            fraction: ジョブ全体の進捗 (0.0 - 1.0)
+            message: 表示用メッセージ
+        """
+        with _connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, message = ?, updated_at = ? WHERE id = ?",
+                (stage, max(0.0, min(1.0, fraction)), message, _now(), self.job_id)
+            )
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()
+
+        if row and row['cancel_requested']:
+            raise JobCancelled(f"ジョブ {self.job_id} はキャンセルされました")
+
+    def stage_callback(self, stage: str, start: float, end: float) -> Callable[[str, float], None]:
+        """
+        バックエンド関数の progress_callback (メッセージ, ステージ内の進捗) 用の関数を作成
+
+        Args:
+            stage: ステージ名
+            start: ジョブ全体に対するステージ開始時の進捗
+            end: ジョブ全体に対するステージ終了時の進捗
+        """
+        def callback(message: str, fraction: float) -> None:
+            self.progress(stage, start + (end - start) * fraction, message)
+        return callback
+
+
+# ---------------------------------------------------------------------------
+# ジョブの処理内容（ワーカープロセスで実行）
+# ---------------------------------------------------------------------------
+
+def _job_analyze_book(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """書籍分析（画面1）"""
+    from . import book_analyzer, chunk_planner
+
+    stage_ranges = {
+        "extract": (0.0, 0.05),
+        "chunk": (0.05, 0.1),
+        "summarize": (0.1, 0.85),
+        "final_summary": (0.85, 1.0),
+    }
+
+    def callback(stage: str, message: str, fraction: float) -> None:
+        start, end = stage_ranges.get(stage, (0.0, 1.0))
+        ctx.progress(stage, start + (end - start) * fraction, message)
+
+    return book_analyzer.analyze_book(
+        Path(params['epub_path']),
+        Path(params['output_dir']),
+        workspace=ctx.workspace,
+        progress_callback=callback,
+        quality=params.get('quality', chunk_planner.DEFAULT_QUALITY),
+        mode=params.get('mode', book_analyzer.DEFAULT_ANALYSIS_MODE),
+        reuse=params.get('reuse', True)
+    )
+
+
+def _job_storyboard(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """シーン分割と画像生成（画面3）"""
+    from . import scene_splitter, session_manager
+
+    scenario = params['scenario']
+    book_name = scenario['book_name']
+
+    ctx.progress("split", 0.0, "シーン分割中")
+    scenes = scene_splitter.split_into_scenes(scenario, params['num_scenes'])
+    scene_splitter.save_scenes(scenes, book_name, workspace=ctx.workspace)
+
+    def save_progress(scene_images: Dict[int, Any], errors: Dict[int, str]) -> None:
+        # 途中経過を保存（エラー時も復元可能に）
+        session_data = {
+            'scenes': scenes,
+            'scene_images': scene_images,
+            'selected_scenario': scenario
+        }
+        if errors:
+            session_data['error_at_scene'] = min(errors)
+        session_manager.save_session_state(session_data, book_name, immediate=bool(errors))
+
+    report = _generate_scene_images(ctx, scenario, scenes, {}, save_progress, start=0.1)
+
+    return {
+        'scenes': scenes,
+        'scene_images': {num: str(path) for num, path in report['scene_images'].items()},
+        'errors': report['errors'],
+    }
+
+
+def _generate_scene_images(
+    ctx: JobContext,
+    scenario: Dict[str, Any],
+    scenes: List[Dict[str, Any]],
+    scene_images: Dict[int, Any],
+    save_progress: Callable[[Dict[int, Any], Dict[int, str]], None],
+    start: float = 0.0
+) -> Dict[str, Any]:
+    """有効な画像がないシーンの画像を生成し、1シーンごとに save_progress で保存"""
+    from . import image_generator_v2, session_manager
+
+    book_name = scenario['book_name']
+    current = {int(num): path for num, path in scene_images.items()}
+    errors: Dict[int, str] = {}
+
+    def on_image(scene_num: int, path: Optional[Path], error: Optional[str]) -> None:
+        if error:
+            errors[scene_num] = error
+        else:
+            current[scene_num] = path
+        save_progress(current, errors)
+
+    report = image_generator_v2.generate_missing_scene_images(
+        scenes,
+        book_name,
+        scene_images=current,
+        visual_style=scenario.get('visual_style', 'Cinematic'),
+        aspect_ratio=scenario.get('aspect_ratio', '9:16'),
+        workspace=ctx.workspace,
+        progress_callback=ctx.stage_callback("images", start, 1.0),
+        on_image=on_image
+    )
+    session_manager.flush_session(book_name)
+    return report
+
+
+def _job_fill_images(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """不足している画像だけを生成（画面3）"""
+    from . import session_manager
+
+    scenario = params['scenario']
+    scenes = params['scenes']
+
+    def save_progress(scene_images: Dict[int, Any], errors: Dict[int, str]) -> None:
+        session_manager.save_session_state({
+            'scenes': scenes,
+            'scene_images': scene_images,
+            'selected_scenario': scenario
+        }, scenario['book_name'], immediate=bool(errors))
+
+    ctx.progress("images", 0.0, "既存の画像を確認中")
+    report = _generate_scene_images(ctx, scenario, scenes, params.get('scene_images', {}), save_progress)
+
+    return {
+        **report,
+        'scene_images': {num: str(path) for num, path in report['scene_images'].items()},
+    }
+
+
+def _job_narration(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """ナレーション音声生成（画面5）"""
+    from . import tts_engine_v2, session_manager
+
+    scenario = params['scenario']
+    scenes = params['scenes']
+
+    scene_audio = tts_engine_v2.synthesize_narration_for_scenes(
+        scenes=scenes,
+        book_name=scenario['book_name'],
+        voice=params['voice_name'],
+        speed=params['voice_speed'],
+        model=params['voice_model'],
+        workspace=ctx.workspace,
+        progress_callback=ctx.stage_callback("tts", 0.0, 1.0)
+    )
+
+    voice_settings = {
+        'voice_name': params['voice_name'],
+        'voice_model': params['voice_model'],
+        'voice_speed': params['voice_speed']
+    }
+
+    session_manager.save_session_state({
+        'scenes': scenes,
+        'scene_images': params.get('scene_images', {}),
+        'scene_audio': scene_audio,
+        'selected_scenario': scenario,
+        'voice_settings': voice_settings
+    }, scenario['book_name'])
+
+    return {
+        'scene_audio': {num: str(path) for num, path in scene_audio.items()},
+        'voice_settings': voice_settings,
+    }
+
+
+def _job_render_video(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """最終動画の生成（画面6）: BGM付きの字幕なし動画（キャッシュ） → 字幕の焼き込み・多重化"""
+    from . import video_renderer_v2
+
+    return video_renderer_v2.render_final_video(
+        params['storyboard_data'],
+        params['render_settings'],
+        bgm=params.get('bgm'),
+        workspace=ctx.workspace,
+        progress_callback=ctx.stage_callback("render", 0.0, 1.0)
+    )
+
+
+JOB_FUNCTIONS: Dict[str, Callable[[JobContext, Dict[str, Any]], Any]] = {
+    "analyze_book": _job_analyze_book,
+    "storyboard": _job_storyboard,
+    "fill_images": _job_fill_images,
+    "narration": _job_narration,
+    "render_video": _job_render_video,
+}
+
+
+def register_job_function(kind: str, func: Callable[[JobContext, Dict[str, Any]], Any]) -> None:
+    """
+    ジョブの種類を追加登録
+
+    関数はワーカープロセスに参照として渡されるため、モジュールのトップレベル関数を登録すること。
+    """
+    JOB_FUNCTIONS[kind] = func
+
+
+def _execute_job(job_id: str, func: Callable[[JobContext, Dict[str, Any]], Any]) -> None:
+    """ワーカープロセスでジョブを実行し、結果をジョブテーブルに記録"""
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return
+        job = _row_to_job(row)
+        if job['cancel_requested'] or job['status'] != STATUS_QUEUED:
+            if job['status'] == STATUS_QUEUED:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_CANCELLED, _now(), _now(), job_id)
+                )
+            return
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker_pid = ?, started_at = ?, updated_at = ? WHERE id = ?",
+            (STATUS_RUNNING, os.getpid(), _now(), _now(), job_id)
+        )
+
+    kind = job['kind']
+    ctx = JobContext(job_id, get_workspace(job['workspace_job_id']))
+
+    print(f"🛠️ ジョブ開始: {kind} ({job_id})")
+
+    try:
+        # トレースIDはジョブIDと同じ（get_job_trace() で参照）
+        with tracing.span(f"job.{kind}", kind="job", trace_id=job_id, book=job['book']):
+            result = func(ctx, job['params'])
+    except JobCancelled:
+        status, result_json, error = STATUS_CANCELLED, None, None
+        print(f"⏹️ ジョブをキャンセルしました: {job_id}")
+    except Exception as e:
+        status, result_json, error = STATUS_FAILED, None, f"{e}\n\n{traceback.format_exc()}"
+        print(f"❌ ジョブ失敗: {job_id}: {e}")
+    else:
+        status, result_json, error = STATUS_SUCCEEDED, _to_json(result), None
+        print(f"✅ ジョブ完了: {kind} ({job_id})")
+
+    with _connect() as conn:
+        conn.execute(
+            """
+            UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ?,
+                progress = CASE WHEN ? = 'succeeded' THEN 1.0 ELSE progress END
+            WHERE id = ?
+            """,
+            (status, result_json, error, _now(), _now(), status, job_id)
+        )
+
+
+# ---------------------------------------------------------------------------
+# ジョブの投入・参照（Streamlit・CLI側）
+# ---------------------------------------------------------------------------
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def mark_orphaned_jobs() -> int:
+    """
+    実行元のプロセスが終了して実行中のまま残ったジョブを "orphaned" にする
+
+    Returns:
+        更新したジョブ数
+    """
+    with _connect() as conn:
+        rows = conn.execute(
+            f"SELECT id, runner_pid FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+            ACTIVE_STATUSES
+        ).fetchall()
+
+        orphaned = [
+            row['id'] for row in rows
+            if row['runner_pid'] != os.getpid() and not _pid_alive(row['runner_pid'])
+        ]
+        for job_id in orphaned:
+            conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+                (STATUS_ORPHANED, "アプリの再起動により中断されました", _now(), _now(), job_id)
+            )
+
+    if orphaned:
+        print(f"  ⚠️ 中断されたジョブ: {len(orphaned)}件")
+
+    return len(orphaned)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """プロセスプールを取得（初回は中断ジョブの整理も行う）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            mark_orphaned_jobs()
+            # Streamlitのスレッドからforkしないよう spawn を使用
+            _executor = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _on_future_done(job_id: str, future) -> None:
+    """ワーカーが異常終了した場合などに、ジョブを失敗として記録"""
+    global _executor
+    if future.cancelled():
+        error = None
+        status = STATUS_CANCELLED
+    else:
+        exc = future.exception()
+        if exc is None:
+            return
+        error = f"ワーカーが異常終了しました: {exc!r}"
+        status = STATUS_FAILED
+        # プールが壊れた場合は次回作り直す
+        from concurrent.futures.process import BrokenProcessPool
+        if isinstance(exc, BrokenProcessPool):
+            with _executor_lock:
+                _executor = None
+
+    with _connect() as conn:
+        conn.execute(
+            f"""
+            UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ?
+            WHERE id = ? AND status IN ({','.join('?' * len(ACTIVE_STATUSES))})
+            """,
+            (status, error, _now(), _now(), job_id, *ACTIVE_STATUSES)
+        )
+
+
+def submit_job(
+    kind: str,
+    params: Dict[str, Any],
+    book_name: str = "",
+    isolated: bool = False,
+    owner: str = ""
+) -> str:
+    """
+    ジョブを投入
+
+    Args:
+        kind: ジョブの種類（JOB_FUNCTIONS のキー）
+        params: ジョブのパラメータ（JSONに変換できる値）
+        book_name: 書籍名（一覧・検索用）
+        isolated: True の場合、ジョブ専用のワークスペース（data/jobs/<ID>/）で実行
+        owner: 投入元の識別子（ブラウザのセッションなど、find_pending_job の絞り込みに使う）
+
+    Returns:
+        ジョブID
+    """
+    if kind not in JOB_FUNCTIONS:
+        raise ValueError(f"不明なジョブの種類: {kind}")
+
+    job_id = f"{kind}-{uuid.uuid4().hex[:12]}"
+    now = _now()
+
+    with _connect() as conn:
+        conn.execute(
+            """
+            INSERT INTO jobs (id, kind, book, owner, status, params, workspace_job_id, runner_pid, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (job_id, kind, book_name, owner, STATUS_QUEUED, _to_json(params),
+             job_id if isolated else None, os.getpid(), now, now)
+        )
+
+    future = _get_executor().submit(_execute_job, job_id, JOB_FUNCTIONS[kind])
+    future.add_done_callback(lambda f: _on_future_done(job_id, f))
+
+    print(f"📥 ジョブを投入: {kind} ({job_id})")
+
+    return job_id
+
+
+def get_job_trace(job_id: str) -> List[Dict[str, Any]]:
+    """
+    ジョブの計測結果（区間名ごとの集計表）
+
+    Returns:
+        tracing.summarize_trace() の戻り値（計測結果がなければ空リスト）
+    """
+    return tracing.summarize_trace(tracing.read_trace(job_id))
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    ジョブの状態を取得
+
+    Returns:
+        ジョブ情報の辞書（status, stage, progress, message, result, error など）。見つからない場合はNone
+    """
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(
+    kind: Optional[str] = None,
+    book_name: Optional[str] = None,
+    active_only: bool = False,
+    limit: int = 20,
+    owner: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    ジョブの一覧を取得（新しい順）
+
+    Args:
+        kind: ジョブの種類で絞り込み
+        book_name: 書籍名で絞り込み
+        owner: 投入元で絞り込み
+        active_only: 待機中・実行中のジョブのみ
+        limit: 最大件数
+    """
+    query = "SELECT * FROM jobs WHERE 1 = 1"
+    params: list = []
+    if kind is not None:
+        query += " AND kind = ?"
+        params.append(kind)
+    if book_name is not None:
+        query += " AND book = ?"
+        params.append(book_name)
+    if owner is not None:
+        query += " AND owner = ?"
+        params.append(owner)
+    if active_only:
+        query += f" AND status IN ({','.join('?' * len(ACTIVE_STATUSES))})"
+        params.extend(ACTIVE_STATUSES)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+
+    with _connect() as conn:
+        return [_row_to_job(row) for row in conn.execute(query, params)]
+
+
+def find_pending_job(kind: str, book_name: Optional[str] = None, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    画面に反映されていない最新ジョブを取得（再接続時の復元用）
+
+    実行中のジョブ、または終了したが acknowledge_job() されていないジョブを返す。
+
+    Args:
+        kind: ジョブの種類
+        book_name: 書籍名（Noneの場合は絞り込まない）
+        owner: 投入元（Noneの場合は絞り込まない。画面からは自分のセッションのジョブだけを復元するため必ず指定する）
+    """
+    query = "SELECT * FROM jobs WHERE kind = ? AND acknowledged = 0"
+    params: list = [kind]
+    if owner is not None:
+        query += " AND owner = ?"
+        params.append(owner)
+    if book_name is not None:
+        query += " AND book = ?"
+        params.append(book_name)
+    query += " ORDER BY created_at DESC LIMIT 1"
+
+    with _connect() as conn:
+        row = conn.execute(query, params).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def acknowledge_job(job_id: str) -> None:
+    """終了したジョブの結果を画面に反映済みとして記録"""
+    with _connect() as conn:
+        conn.execute("UPDATE jobs SET acknowledged = 1 WHERE id = ?", (job_id,))
+
+
+def cancel_job(job_id: str) -> bool:
+    """
+    ジョブのキャンセルを要求
+
+    待機中のジョブはすぐにキャンセルされ、実行中のジョブは次の進捗報告時に中断される。
+
+    Returns:
+        キャンセルを要求できた場合True（既に終了している場合False）
+    """
+    with _connect() as conn:
+        cursor = conn.execute(
+            f"""
+            UPDATE jobs SET cancel_requested = 1, updated_at = ?
+            WHERE id = ? AND status IN ({','.join('?' * len(ACTIVE_STATUSES))})
+            """,
+            (_now(), job_id, *ACTIVE_STATUSES)
+        )
+        requested = cursor.rowcount > 0
+        if requested:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, _now(), job_id, STATUS_QUEUED)
+            )
+
+    if requested:
+        print(f"⏹️ ジョブのキャンセルを要求: {job_id}")
+
+    return requested
+
+
+def wait_for_job(job_id: str, timeout: Optional[float] = None, poll_interval: float = 1.0) -> Dict[str, Any]:
+    """
+    ジョブの終了を待つ（CLI・スクリプト用）
+
+    Args:
+        job_id: ジョブID
+        timeout: 最大待ち時間（秒）。Noneの場合は無制限
+        poll_interval: 状態確認の間隔（秒）
+
+    Returns:
+        終了したジョブの情報
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            raise KeyError(f"ジョブが見つかりません: {job_id}")
+        if job['status'] in FINISHED_STATUSES:
+            return job
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"ジョブが時間内に終了しませんでした: {job_id}")
+        time.sleep(poll_interval)
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+APIのレート制御モジュール（同一ホストの全プロセスで共有）
+
+Streamlitの複数セッションや一括処理のワーカーが同時にAPIを呼ぶと、
+それぞれは制限内でも合計で上限を超えて429（レート制限）になる。
+このモジュールはSQLite（data/internal/rate_limits.sqlite3）上のトークンバケットで、
+プロセスをまたいで呼び出しの間隔を揃える。
+
+- acquire(key): 呼び出し前に1回分の枠を取る（空きがなければ待つ）
+- report_rate_limited(key): 429を受けたら許可レートを半分にし、Retry-After（なければ指数的な待ち時間）の間止める
+- report_success(key): 成功するたびに許可レートを上限まで少しずつ戻す（AIMD）
+- utilization(): 直近1分の利用率・429の回数・待ち時間
+
+バケットのキーはサービス名（"gemini.gemini-2.5-flash-lite", "openai.images", "openai.tts"）。
+上限は RATE_LIMITS（1分あたりの呼び出し数）で、環境変数 RATE_LIMIT_<キー>（英数字以外は "_"、
+例: RATE_LIMIT_OPENAI_IMAGES=7）で変更できる。キーが RATE_LIMITS にない場合は
+先頭の "." までのプロバイダ名（"gemini" など）の設定を使う。
+"""
+
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List
+import os
+import random
+import re
+import sqlite3
+import time
+
+from .utils import get_project_root
+
+# 1分あたりの呼び出し数の上限（契約しているティアに合わせて環境変数で変更する）
+RATE_LIMITS = {
+    "gemini": 60.0,
+    "openai.images": 5.0,
+    "openai.tts": 50.0,
+    "openai": 60.0,
+}
+DEFAULT_LIMIT = 60.0
+
+# まとめて呼び出せる量（上限の何秒分か）
+BURST_SECONDS = 10.0
+# 429のときに下げる許可レートの下限（上限に対する割合）
+MIN_RATE_FRACTION = 0.05
+# 成功1回ごとに戻す許可レート（上限に対する割合）
+RECOVERY_STEP = 0.05
+# Retry-After がない場合の待ち時間（秒、連続した429ごとに2倍、最大 MAX_BACKOFF）
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 120.0
+# 待っている間に状態を確認し直す間隔（秒）
+MAX_SLEEP = 2.0
+# 利用状況の記録を残す期間（秒）
+EVENT_RETENTION = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    limit_rpm REAL NOT NULL,
+    rate_rpm REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    backoff_until REAL NOT NULL DEFAULT 0,
+    consecutive_429 INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    key TEXT NOT NULL,
+    at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    wait_seconds REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS events_key_at ON events (key, at);
+"""
+
+
+class RateLimitTimeout(Exception):
+    """max_wait 以内に呼び出し枠を取れなかった"""
+
+
+def get_db_path() -> Path:
+    """レート制御の状態を保存するファイルのパス"""
+    return get_project_root() / "data" / "internal" / "rate_limits.sqlite3"
+
+
+@contextmanager
+def _connect():
+    """状態テーブルに接続（BEGIN IMMEDIATE で他プロセスと排他）"""
+    db_path = get_db_path()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def get_limit(key: str) -> float:
+    """
+    1分あたりの呼び出し数の上限
+
+    Args:
+        key: バケットのキー（例: "openai.images"）
+
+    Returns:
+        上限（環境変数 → RATE_LIMITS → プロバイダ名の設定 → DEFAULT_LIMIT の順）
+    """
+    candidates = [key]
+    if "." in key:
+        candidates.append(key.split(".", 1)[0])
+
+    for candidate in candidates:
+        env_name = "RATE_LIMIT_" + re.sub(r"[^A-Za-z0-9]", "_", candidate).upper()
+        value = os.getenv(env_name)
+        if value:
+            try:
+                return max(0.1, float(value))
+            except ValueError:
+                print(f"⚠️ 環境変数 {env_name} の値が不正です（{value}）")
+        if candidate in RATE_LIMITS:
+            return RATE_LIMITS[candidate]
+    return DEFAULT_LIMIT
+
+
+def _capacity(limit_rpm: float) -> float:
+    return max(1.0, limit_rpm / 60.0 * BURST_SECONDS)
+
+
+def _load_bucket(conn: sqlite3.Connection, key: str, now: float) -> Dict[str, Any]:
+    """バケットを読み込み、経過時間の分だけ補充した状態を返す（なければ作成）"""
+    limit_rpm = get_limit(key)
+    row = conn.execute("SELECT * FROM buckets WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        bucket = {
+            "key": key,
+            "limit_rpm": limit_rpm,
+            "rate_rpm": limit_rpm,
+            "tokens": _capacity(limit_rpm),
+            "updated_at": now,
+            "backoff_until": 0.0,
+            "consecutive_429": 0,
+        }
+        conn.execute(
+            "INSERT INTO buckets (key, limit_rpm, rate_rpm, tokens, updated_at, backoff_until, consecutive_429) "
+            "VALUES (:key, :limit_rpm, :rate_rpm, :tokens, :updated_at, :backoff_until, :consecutive_429)",
+            bucket
+        )
+        return bucket
+
+    bucket = dict(row)
+    # 上限の設定が変わった場合
+    if bucket["limit_rpm"] != limit_rpm:
+        bucket["rate_rpm"] = min(bucket["rate_rpm"], limit_rpm) if bucket["consecutive_429"] else limit_rpm
+        bucket["limit_rpm"] = limit_rpm
+
+    elapsed = max(0.0, now - bucket["updated_at"])
+    bucket["tokens"] = min(_capacity(limit_rpm), bucket["tokens"] + elapsed * bucket["rate_rpm"] / 60.0)
+    bucket["updated_at"] = now
+    return bucket
+
+
+def _save_bucket(conn: sqlite3.Connection, bucket: Dict[str, Any]) -> None:
+    conn.execute(
+        "UPDATE buckets SET limit_rpm = :limit_rpm, rate_rpm = :rate_rpm, tokens = :tokens, "
+        "updated_at = :updated_at, backoff_until = :backoff_until, consecutive_429 = :consecutive_429 "
+        "WHERE key = :key",
+        bucket
+    )
+
+
+def _add_event(conn: sqlite3.Connection, key: str, now: float, kind: str, wait_seconds: float = 0.0) -> None:
+    conn.execute(
+        "INSERT INTO events (key, at, kind, wait_seconds) VALUES (?, ?, ?, ?)",
+        (key, now, kind, wait_seconds)
+    )
+    conn.execute("DELETE FROM events WHERE key = ? AND at < ?", (key, now - EVENT_RETENTION))
+
+
+def acquire(key: str, max_wait: Optional[float] = None) -> float:
+    """
+    呼び出し1回分の枠を取る（空くまで待つ）
+
+    Args:
+        key: バケットのキー
+        max_wait: 待つ時間の上限（秒、Noneの場合は無制限）
+
+    Returns:
+        待った時間（秒）
+
+    Raises:
+        RateLimitTimeout: max_wait 以内に枠を取れなかった場合
+    """
+    start = time.time()
+    while True:
+        now = time.time()
+        with _connect() as conn:
+            bucket = _load_bucket(conn, key, now)
+            if now >= bucket["backoff_until"] and bucket["tokens"] >= 1.0:
+                bucket["tokens"] -= 1.0
+                _save_bucket(conn, bucket)
+                waited = now - start
+                _add_event(conn, key, now, "grant", waited)
+                return waited
+
+            _save_bucket(conn, bucket)
+            if now < bucket["backoff_until"]:
+                wait = bucket["backoff_until"] - now
+            else:
+                wait = (1.0 - bucket["tokens"]) * 60.0 / bucket["rate_rpm"]
+
+        if max_wait is not None and now - start + wait > max_wait:
+            raise RateLimitTimeout(f"{key}: {max_wait}秒以内に呼び出し枠を取れませんでした")
+        # 同時に待っているプロセスが一斉に起きないように少しずらす
+        time.sleep(min(wait, MAX_SLEEP) * random.uniform(1.0, 1.2))
+
+
+def report_rate_limited(key: str, retry_after: Optional[float] = None) -> float:
+    """
+    429（レート制限）を受けたことを記録
+
+    許可レートを半分に下げ、retry_after（なければ連続回数に応じた待ち時間）の間、
+    全プロセスでこのキーの呼び出しを止める。
+
+    Args:
+        key: バケットのキー
+        retry_after: Retry-After ヘッダーの秒数
+
+    Returns:
+        呼び出しを止める時間（秒）
+    """
+    now = time.time()
+    with _connect() as conn:
+        bucket = _load_bucket(conn, key, now)
+        bucket["consecutive_429"] += 1
+        bucket["rate_rpm"] = max(bucket["limit_rpm"] * MIN_RATE_FRACTION, bucket["rate_rpm"] * 0.5)
+        bucket["tokens"] = 0.0
+        if retry_after is None:
+            backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (bucket["consecutive_429"] - 1))
+            backoff *= random.uniform(1.0, 1.25)
+        else:
+            backoff = min(MAX_BACKOFF, max(0.0, retry_after))
+        bucket["backoff_until"] = max(bucket["backoff_until"], now + backoff)
+        _save_bucket(conn, bucket)
+        _add_event(conn, key, now, "throttled")
+        return bucket["backoff_until"] - now
+
+
+def report_success(key: str) -> None:
+    """
+    呼び出しの成功を記録（許可レートを上限まで少しずつ戻す）
+
+    Args:
+        key: バケットのキー
+    """
+    now = time.time()
+    with _connect() as conn:
+        bucket = _load_bucket(conn, key, now)
+        if bucket["consecutive_429"] == 0 and bucket["rate_rpm"] >= bucket["limit_rpm"]:
+            return
+        bucket["consecutive_429"] = 0
+        bucket["rate_rpm"] = min(bucket["limit_rpm"], bucket["rate_rpm"] + bucket["limit_rpm"] * RECOVERY_STEP)
+        _save_bucket(conn, bucket)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    例外が429（レート制限）かどうか
+
+    openai.RateLimitError（status_code）、google.api_core の ResourceExhausted（code）と、
+    メッセージが "Resource has been exhausted" / "rate limit" を含むものを対象とする。
+    メッセージ中の数字の "429" では判定しない（"requested 4290 tokens" やリクエストIDにも含まれるため）。
+    """
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and value == 429:
+            return True
+    message = str(error)
+    return "Resource has been exhausted" in message or "rate limit" in message.lower()
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """例外に含まれる Retry-After（秒）。なければNone"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def utilization(window: float = 60.0) -> List[Dict[str, Any]]:
+    """
+    各キーの利用状況
+
+    Args:
+        window: 集計する期間（秒）
+
+    Returns:
+        [{'key', 'limit_rpm', 'rate_rpm', 'calls', 'utilization', 'throttled', 'avg_wait_seconds',
+          'backoff_seconds', 'tokens'}, ...]（キー順）
+        calls は直近 window 秒の呼び出し数、utilization は calls / 上限（window 秒換算）
+    """
+    db_path = get_db_path()
+    if not db_path.exists():
+        return []
+
+    now = time.time()
+    rows = []
+    with _connect() as conn:
+        buckets = conn.execute("SELECT key FROM buckets ORDER BY key").fetchall()
+        for (key,) in buckets:
+            bucket = _load_bucket(conn, key, now)
+            grants = conn.execute(
+                "SELECT COUNT(*), COALESCE(AVG(wait_seconds), 0) FROM events WHERE key = ? AND kind = 'grant' AND at >= ?",
+                (key, now - window)
+            ).fetchone()
+            throttled = conn.execute(
+                "SELECT COUNT(*) FROM events WHERE key = ? AND kind = 'throttled' AND at >= ?",
+                (key, now - window)
+            ).fetchone()[0]
+            allowed = bucket["limit_rpm"] * window / 60.0
+            rows.append({
+                "key": key,
+                "limit_rpm": bucket["limit_rpm"],
+                "rate_rpm": round(bucket["rate_rpm"], 2),
+                "calls": grants[0],
+                "utilization": round(grants[0] / allowed, 3) if allowed else 0.0,
+                "throttled": throttled,
+                "avg_wait_seconds": round(grants[1], 2),
+                "backoff_seconds": round(max(0.0, bucket["backoff_until"] - now), 1),
+                "tokens": round(bucket["tokens"], 2),
+            })
+    return rows
+
+
+def reset(key: Optional[str] = None) -> None:
+    """
+    状態を消去（key を省略した場合はすべて）
+
+    Args:
+        key: バケットのキー
+    """
+    with _connect() as conn:
+        if key is None:
+            conn.execute("DELETE FROM buckets")
+            conn.execute("DELETE FROM events")
+        else:
+            conn.execute("DELETE FROM buckets WHERE key = ?", (key,))
+            conn.execute("DELETE FROM events WHERE key = ?", (key,))
@@ -6,12 +6,12 @@
 """
 
 from pathlib import Path
-from typing import Dict, Any, List
-import google.generativeai as genai
-import os
+from typing import Dict, Any, List, Optional
 import json
 from dotenv import load_dotenv
-from .utils import save_json, get_project_root
+from .utils import save_json
+from .workspace import Workspace, resolve_workspace
+from . import api_clients, tracing
 
 load_dotenv()
 
@@ -29,12 +29,7 @@ def generate_scenarios_from_summary(book_name: str, summary: str, target_audienc
     Returns:
         3つのシナリオパターンのリスト
     """
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY環境変数が設定されていません")
-
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
+    model = api_clients.get_gemini_model('gemini-2.5-flash-lite')
 
     # 3つのパターンを定義
     patterns = [
@@ -137,13 +132,15 @@ JSON形式で出力してください。
 }}
 """
 
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,  # プロモーション用なので創造性を高め
-                "response_mime_type": "application/json"
-            }
-        )
+        with tracing.span("gemini.scenarios", kind="api", book=book_name):
+            response = model.generate_content(
+                prompt,
+                generation_config={
+                    "temperature": 0.7,  # プロモーション用なので創造性を高め
+                    "response_mime_type": "application/json"
+                }
+            )
+            tracing.record_gemini(response, 'gemini-2.5-flash-lite', prompt)
 
         result = json.loads(response.text)
 
@@ -165,22 +162,19 @@ JSON形式で出力してください。
     return scenario_patterns
 
 
-def save_scenarios(book_name: str, scenarios: List[Dict[str, Any]]) -> Path:
+def save_scenarios(book_name: str, scenarios: List[Dict[str, Any]], workspace: Optional[Workspace] = None) -> Path:
     """
     生成したシナリオパターンを保存
 
     Args:
         book_name: 書籍名
         scenarios: シナリオパターンのリスト
+        workspace: 保存先ワークスペース（Noneの場合はdata/internal/）
 
     Returns:
         保存先パス
     """
-    project_root = get_project_root()
-    internal_dir = project_root / "data" / "internal"
-    internal_dir.mkdir(parents=True, exist_ok=True)
-
-    scenarios_file = internal_dir / "scenarios.json"
+    scenarios_file = resolve_workspace(workspace).internal_file("scenarios.json")
 
     scenarios_data = {
         "book_name": book_name,
@@ -220,7 +214,13 @@ def regenerate_scenario(book_name: str, summary: str, pattern_id: int, target_au
     raise ValueError(f"パターンID {pattern_id} が見つかりません（1-3の範囲で指定してください）")
 
 
-def select_scenario(pattern_id: int, aspect_ratio: str = "9:16", visual_style: str = "Cinematic", num_scenes: int = 5) -> Dict[str, Any]:
+def select_scenario(
+    pattern_id: int,
+    aspect_ratio: str = "9:16",
+    visual_style: str = "Cinematic",
+    num_scenes: int = 5,
+    workspace: Optional[Workspace] = None
+) -> Dict[str, Any]:
     """
     選択されたシナリオパターンを保存
 
@@ -229,12 +229,13 @@ def select_scenario(pattern_id: int, aspect_ratio: str = "9:16", visual_style: s
         aspect_ratio: 動画の比率 (16:9, 9:16, 1:1)
         visual_style: ビジュアルスタイル
         num_scenes: シーン数（デフォルト5）
+        workspace: 読み書きするワークスペース（Noneの場合はdata/internal/）
 
     Returns:
         選択されたシナリオ情報
     """
-    project_root = get_project_root()
-    scenarios_file = project_root / "data" / "internal" / "scenarios.json"
+    workspace = resolve_workspace(workspace)
+    scenarios_file = workspace.internal_dir / "scenarios.json"
 
     if not scenarios_file.exists():
         raise FileNotFoundError("シナリオファイルが見つかりません。先にgenerate_scenarios_from_summary()を実行してください。")
@@ -261,7 +262,7 @@ def select_scenario(pattern_id: int, aspect_ratio: str = "9:16", visual_style: s
         "num_scenes": num_scenes
     }
 
-    scenario_file = project_root / "data" / "internal" / "scenario.json"
+    scenario_file = workspace.internal_file("scenario.json")
     save_json(scenario_file, scenario_data)
 
     return scenario_data
@@ -6,11 +6,11 @@
 """
 
 from pathlib import Path
-from typing import Dict, Any, List
-import google.generativeai as genai
-import os
+from typing import Dict, Any, List, Optional
 import json
 from dotenv import load_dotenv
+from .workspace import Workspace, resolve_workspace
+from . import api_clients, tracing
 
 # .envファイルから環境変数を読み込む
 load_dotenv()
@@ -31,12 +31,7 @@ def split_into_scenes(
     """
 
     # Gemini API設定
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY環境変数が設定されていません")
-
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash-lite")
+    model = api_clients.get_gemini_model("gemini-2.5-flash-lite")
 
     # シナリオテキスト
     summary = scenario["selected_pattern"]["summary"]
@@ -110,13 +105,15 @@ JSON形式で出力してください。
 """
 
     print(f"  🤖 Gemini APIでシーン分割中（{num_scenes}シーン）...")
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.7,
-            "response_mime_type": "application/json",
-        },
-    )
+    with tracing.span("gemini.split_scenes", kind="api", num_scenes=num_scenes):
+        response = model.generate_content(
+            prompt,
+            generation_config={
+                "temperature": 0.7,
+                "response_mime_type": "application/json",
+            },
+        )
+        tracing.record_gemini(response, "gemini-2.5-flash-lite", prompt)
 
     result = json.loads(response.text)
     scenes = result["scenes"]
@@ -126,24 +123,21 @@ JSON形式で出力してください。
     return scenes
 
 
-def save_scenes(scenes: List[Dict[str, Any]], book_name: str) -> Path:
+def save_scenes(scenes: List[Dict[str, Any]], book_name: str, workspace: Optional[Workspace] = None) -> Path:
     """
     シーンデータを保存
 
     Args:
         scenes: シーンリスト
         book_name: 書籍名
+        workspace: 保存先ワークスペース（Noneの場合はdata/internal/）
 
     Returns:
         保存先パス
     """
-    from .utils import get_project_root, save_json
-
-    project_root = get_project_root()
-    internal_dir = project_root / "data" / "internal"
-    internal_dir.mkdir(parents=True, exist_ok=True)
+    from .utils import save_json
 
-    scenes_file = internal_dir / "scenes.json"
+    scenes_file = resolve_workspace(workspace).internal_file("scenes.json")
 
     scenes_data = {
         "book_name": book_name,
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+セッションカタログモジュール
+
+保存済みセッションの一覧をSQLiteのインデックスで管理する
+（書籍名・保存日時・到達ステップ・成果物数）。
+
+セッションファイルを glob + stat で走査せずに、
+書籍一覧や最新セッションをインデックス検索で取得できる。
+"""
+
+from pathlib import Path
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from .utils import get_project_root
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    num_scenes INTEGER NOT NULL,
+    num_images INTEGER NOT NULL,
+    num_audio INTEGER NOT NULL,
+    latest_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS books_updated_at ON books (updated_at);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    book TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    step INTEGER NOT NULL,
+    num_scenes INTEGER NOT NULL,
+    num_images INTEGER NOT NULL,
+    num_audio INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_book_saved_at ON snapshots (book, saved_at);
+CREATE INDEX IF NOT EXISTS snapshots_saved_at ON snapshots (saved_at);
+"""
+
+# セッションに含まれるキーと、そこまで進んだときのステップ番号（app.pyのステップ表示に対応）
+STEP_KEYS = [
+    ('final_video', 6),
+    ('scene_audio', 5),
+    ('scene_images', 4),
+    ('selected_scenario', 3),
+    ('scenarios', 2),
+    ('book_analysis', 2),
+]
+
+
+def get_catalog_path() -> Path:
+    """カタログファイルのパス"""
+    return get_project_root() / "data" / "internal" / "sessions" / "catalog.sqlite3"
+
+
+@contextmanager
+def _connect():
+    """カタログに接続（初回はスキーマ作成と既存セッションの取り込み）"""
+    catalog_path = get_catalog_path()
+    is_new = not catalog_path.exists()
+    catalog_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(catalog_path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        if is_new:
+            _import_existing_sessions(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def summarize_session(session_data: Dict[str, Any]) -> Dict[str, int]:
+    """
+    セッション状態から到達ステップと成果物数を求める
+
+    Args:
+        session_data: セッション状態の辞書
+
+    Returns:
+        {'step', 'num_scenes', 'num_images', 'num_audio'}
+    """
+    step = 1
+    for key, key_step in STEP_KEYS:
+        if session_data.get(key):
+            step = key_step
+            break
+
+    return {
+        'step': step,
+        'num_scenes': len(session_data.get('scenes') or []),
+        'num_images': len(session_data.get('scene_images') or {}),
+        'num_audio': len(session_data.get('scene_audio') or {}),
+    }
+
+
+def record_session(
+    book_name: str,
+    session_data: Dict[str, Any],
+    latest_path: Path,
+    snapshot_path: Optional[Path] = None,
+    conn: Optional[sqlite3.Connection] = None
+) -> None:
+    """
+    セッションの保存をカタログに記録
+
+    Args:
+        book_name: 書籍名
+        session_data: 保存したセッション状態
+        latest_path: 最新セッションファイルのパス
+        snapshot_path: スナップショットを作成した場合はそのパス
+        conn: 既存の接続（省略時は新しく接続）
+    """
+    if conn is None:
+        with _connect() as new_conn:
+            record_session(book_name, session_data, latest_path, snapshot_path, new_conn)
+        return
+
+    summary = summarize_session(session_data)
+    now = datetime.now().isoformat(timespec='microseconds')
+
+    conn.execute(
+        """
+        INSERT INTO books (book, updated_at, step, num_scenes, num_images, num_audio, latest_path)
+        VALUES (:book, :now, :step, :num_scenes, :num_images, :num_audio, :latest_path)
+        ON CONFLICT(book) DO UPDATE SET
+            updated_at = excluded.updated_at,
+            step = excluded.step,
+            num_scenes = excluded.num_scenes,
+            num_images = excluded.num_images,
+            num_audio = excluded.num_audio,
+            latest_path = excluded.latest_path
+        """,
+        {'book': book_name, 'now': now, 'latest_path': str(latest_path), **summary}
+    )
+
+    if snapshot_path is not None:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO snapshots (book, saved_at, path, step, num_scenes, num_images, num_audio)
+            VALUES (:book, :now, :path, :step, :num_scenes, :num_images, :num_audio)
+            """,
+            {'book': book_name, 'now': now, 'path': str(snapshot_path), **summary}
+        )
+
+
+def list_books(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    セッションが保存されている書籍の一覧を取得（更新が新しい順）
+
+    Args:
+        limit: 最大件数
+
+    Returns:
+        [{'book', 'updated_at', 'step', 'num_scenes', 'num_images', 'num_audio', 'latest_path'}, ...]
+    """
+    query = "SELECT * FROM books ORDER BY updated_at DESC"
+    params = ()
+    if limit is not None:
+        query += " LIMIT ?"
+        params = (limit,)
+
+    with _connect() as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def get_latest(book_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    最新のセッション情報を取得
+
+    Args:
+        book_name: 書籍名（省略時はすべての書籍で最も新しいもの）
+
+    Returns:
+        書籍のカタログ情報。見つからない場合はNone
+    """
+    with _connect() as conn:
+        if book_name is None:
+            row = conn.execute("SELECT * FROM books ORDER BY updated_at DESC LIMIT 1").fetchone()
+        else:
+            row = conn.execute("SELECT * FROM books WHERE book = ?", (book_name,)).fetchone()
+
+    return dict(row) if row else None
+
+
+def list_snapshots(book_name: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    スナップショットの一覧を取得（新しい順）
+
+    Args:
+        book_name: 書籍名（指定した場合、その書籍のみ）
+        limit: 最大件数
+
+    Returns:
+        [{'book', 'saved_at', 'path', 'step', 'num_scenes', 'num_images', 'num_audio'}, ...]
+    """
+    query = "SELECT * FROM snapshots"
+    params = []
+    if book_name is not None:
+        query += " WHERE book = ?"
+        params.append(book_name)
+    query += " ORDER BY saved_at DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    with _connect() as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def _import_existing_sessions(conn: sqlite3.Connection) -> None:
+    """カタログ導入前に保存されたセッションファイルを取り込む（初回のみ）"""
+    import json
+
+    sessions_dir = get_catalog_path().parent
+    count = 0
+
+    for latest_path in sessions_dir.glob("session_*_latest.json"):
+        book_name = latest_path.name[len("session_"):-len("_latest.json")]
+        try:
+            with open(latest_path, 'r', encoding='utf-8') as f:
+                session_data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+        summary = summarize_session(session_data)
+        mtime = datetime.fromtimestamp(latest_path.stat().st_mtime).isoformat(timespec='microseconds')
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO books (book, updated_at, step, num_scenes, num_images, num_audio, latest_path)
+            VALUES (:book, :mtime, :step, :num_scenes, :num_images, :num_audio, :latest_path)
+            """,
+            {'book': book_name, 'mtime': mtime, 'latest_path': str(latest_path), **summary}
+        )
+
+        prefix = f"session_{book_name}_"
+        for snapshot_path in sessions_dir.glob(f"{prefix}*.json"):
+            stamp = snapshot_path.stem[len(prefix):]
+            try:
+                saved_at = datetime.strptime(stamp, "%Y%m%d_%H%M%S").isoformat(timespec='microseconds')
+            except ValueError:
+                continue
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO snapshots (book, saved_at, path, step, num_scenes, num_images, num_audio)
+                VALUES (:book, :saved_at, :path, :step, :num_scenes, :num_images, :num_audio)
+                """,
+                {'book': book_name, 'saved_at': saved_at, 'path': str(snapshot_path), **summary}
+            )
+        count += 1
+
+    if count:
+        print(f"  📇 セッションカタログを作成: {count}冊")
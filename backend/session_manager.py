@@ -3,38 +3,53 @@
 セッション管理モジュール
 
 Streamlitのセッション状態を保存・復元する
+
+保存形式:
+- journal_<書籍名>.jsonl: 変更差分（キー単位・シーン単位）を1行ずつ追記するジャーナル
+- session_<書籍名>_<タイムスタンプ>.json: 定期的にジャーナルをまとめたスナップショット
+- session_<書籍名>_latest.json: 最新スナップショット
+
+復元時は最新スナップショットにジャーナルの未反映分を適用する。
 """
 
 from pathlib import Path
+import atexit
 import json
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, List
 from datetime import datetime
-from .utils import get_project_root
+from .utils import get_project_root, atomic_write_text
+from . import session_catalog
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-def save_session_state(session_data: Dict[str, Any], book_name: str) -> Path:
-    """
-    セッション状態をJSONファイルに保存
+# これだけ差分が溜まったらスナップショットにまとめる
+JOURNAL_COMPACT_EVERY = 50
 
-    Args:
-        session_data: セッション状態の辞書
-        book_name: 書籍名
+# スナップショットに埋め込むメタデータのキー（復元時に除去）
+_SEQ_KEY = "__journal_seq__"
 
-    Returns:
-        保存先パス
-    """
-    project_root = get_project_root()
-    save_dir = project_root / "data" / "internal" / "sessions"
-    save_dir.mkdir(parents=True, exist_ok=True)
+_lock = threading.RLock()
+_states: Dict[str, Dict[str, Any]] = {}
+_journal_info: Dict[str, Dict[str, Any]] = {}
+_write_stats = {"requested": 0, "records": 0, "snapshots": 0}
 
-    # タイムスタンプ付きファイル名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"session_{book_name}_{timestamp}.json"
-    save_path = save_dir / filename
 
-    # 最新セッションファイルも保存（上書き）
-    latest_path = save_dir / f"session_{book_name}_latest.json"
+def _get_sessions_dir() -> Path:
+    """セッション保存先ディレクトリ"""
+    return get_project_root() / "data" / "internal" / "sessions"
+
+
+def _journal_path(book_name: str) -> Path:
+    """ジャーナルファイルのパス"""
+    return _get_sessions_dir() / f"journal_{book_name}.jsonl"
 
+
+def _to_serializable(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """セッション状態をJSONシリアライズ可能な形に変換"""
     # パスオブジェクトを文字列に変換
     serializable_data = {}
     for key, value in session_data.items():
@@ -49,48 +64,355 @@ def save_session_state(session_data: Dict[str, Any], book_name: str) -> Path:
         else:
             serializable_data[key] = value
 
-    # JSON保存
-    with open(save_path, 'w', encoding='utf-8') as f:
-        json.dump(serializable_data, f, ensure_ascii=False, indent=2)
+    # 辞書のキー（シーン番号など）をJSONと同じ形に揃えて差分を取れるようにする
+    return json.loads(json.dumps(serializable_data, ensure_ascii=False))
+
+
+class _JournalLock:
+    """ジャーナルへの追記・スナップショット作成をプロセス間で排他するロック"""
+
+    def __init__(self, book_name: str):
+        self.lock_path = _get_sessions_dir() / f".journal_{book_name}.lock"
+        self.handle = None
+
+    def __enter__(self):
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        self.handle = open(self.lock_path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.handle.close()
+
+
+def _diff_states(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    2つのセッション状態の差分をジャーナルレコードのリストで返す
+
+    辞書の値（scene_images, scene_audio など）は要素単位の差分にする。
+    """
+    records = []
+
+    for key in old:
+        if key not in new:
+            records.append({"op": "del", "key": key})
+
+    for key, value in new.items():
+        if key not in old:
+            records.append({"op": "set", "key": key, "value": value})
+            continue
+
+        old_value = old[key]
+        if old_value == value:
+            continue
+
+        if isinstance(old_value, dict) and isinstance(value, dict):
+            for item in old_value:
+                if item not in value:
+                    records.append({"op": "del_item", "key": key, "item": item})
+            for item, item_value in value.items():
+                if item not in old_value or old_value[item] != item_value:
+                    records.append({"op": "set_item", "key": key, "item": item, "value": item_value})
+        else:
+            records.append({"op": "set", "key": key, "value": value})
+
+    return records
+
+
+def _apply_record(state: Dict[str, Any], record: Dict[str, Any]) -> None:
+    """ジャーナルレコードを状態に適用"""
+    op = record["op"]
+    key = record["key"]
 
-    with open(latest_path, 'w', encoding='utf-8') as f:
-        json.dump(serializable_data, f, ensure_ascii=False, indent=2)
+    if op == "set":
+        state[key] = record["value"]
+    elif op == "del":
+        state.pop(key, None)
+    elif op == "set_item":
+        if not isinstance(state.get(key), dict):
+            state[key] = {}
+        state[key][record["item"]] = record["value"]
+    elif op == "del_item":
+        if isinstance(state.get(key), dict):
+            state[key].pop(record["item"], None)
+
+
+def _read_snapshot(snapshot_file: Path) -> tuple:
+    """スナップショットを読み込み、(状態, 反映済みジャーナル番号) を返す"""
+    if not snapshot_file.exists():
+        return None, 0
+
+    with open(snapshot_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+
+    seq = state.pop(_SEQ_KEY, 0)
+    return state, seq
+
+
+def _replay(book_name: str, snapshot_file: Path) -> tuple:
+    """
+    スナップショットにジャーナルの未反映分を適用
+
+    Returns:
+        (状態 or None, 最後のジャーナル番号, スナップショット以降のレコード数)
+    """
+    state, seq = _read_snapshot(snapshot_file)
+    snapshot_seq = seq
+
+    journal_file = _journal_path(book_name)
+    pending = 0
+    if journal_file.exists():
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 書き込み途中で落ちた最終行は無視
+                    continue
+                if record["seq"] <= snapshot_seq:
+                    continue
+                if state is None:
+                    state = {}
+                _apply_record(state, record)
+                seq = record["seq"]
+                pending += 1
+
+    return state, seq, pending
+
+
+def _file_signature(file_path: Path) -> Optional[tuple]:
+    """ファイルの変更検出用の値（inode・サイズ・更新時刻）。ファイルがない場合はNone"""
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _disk_signature(book_name: str) -> tuple:
+    """ジャーナルと最新スナップショットの変更検出用の値"""
+    latest_file = _get_sessions_dir() / f"session_{book_name}_latest.json"
+    return (_file_signature(_journal_path(book_name)), _file_signature(latest_file))
+
+
+def _journal_follows(book_name: str, snapshot_seq: int) -> bool:
+    """ジャーナルの未反映分がスナップショットの続き（snapshot_seq + 1 から始まる）かどうか"""
+    journal_file = _journal_path(book_name)
+    if not journal_file.exists():
+        return True
+
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record["seq"] > snapshot_seq:
+                return record["seq"] == snapshot_seq + 1
+    return True
+
+
+def _load_known_state(book_name: str) -> Dict[str, Any]:
+    """
+    書籍の現在の状態（メモリ上）を取得
+
+    他のプロセスがジャーナルに追記した・スナップショットを作成した場合は読み直す
+    （スナップショット作成後のジャーナルは空になりサイズだけでは区別できないため、
+    ジャーナルと最新スナップショットの inode・サイズ・更新時刻で判定する）。
+    ジャーナル番号も読み直した値を使う。ジャーナルのロックを保持した状態で呼ぶ。
+    """
+    signature = _disk_signature(book_name)
+    info = _journal_info.get(book_name)
+
+    if info is None or info["signature"] != signature:
+        latest_file = _get_sessions_dir() / f"session_{book_name}_latest.json"
+        state, seq, pending = _replay(book_name, latest_file)
+        _states[book_name] = state or {}
+        _journal_info[book_name] = {
+            "seq": seq,
+            "pending": pending,
+            "signature": signature,
+            "has_snapshot": latest_file.exists(),
+        }
+
+    return _states[book_name]
+
+
+def save_session_state(session_data: Dict[str, Any], book_name: str, immediate: bool = False) -> Path:
+    """
+    セッション状態を保存
+
+    前回の状態との差分だけをジャーナルに追記する（書き込み量は変更量に比例）。
+    差分が JOURNAL_COMPACT_EVERY 件溜まるとスナップショットにまとめる。
+
+    Args:
+        session_data: セッション状態の辞書
+        book_name: 書籍名
+        immediate: True の場合、すぐにスナップショットを作成する
+
+    Returns:
+        保存先パス（最新セッションファイル）
+    """
+    serializable_data = _to_serializable(session_data)
+    latest_path = _get_sessions_dir() / f"session_{book_name}_latest.json"
+
+    with _lock, _JournalLock(book_name):
+        _write_stats["requested"] += 1
+
+        old_state = _load_known_state(book_name)
+        info = _journal_info[book_name]
+        records = _diff_states(old_state, serializable_data)
+
+        if records:
+            timestamp = datetime.now().isoformat(timespec='seconds')
+            lines = []
+            for record in records:
+                info["seq"] += 1
+                record = {"seq": info["seq"], "ts": timestamp, **record}
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                _apply_record(old_state, record)
+
+            journal_file = _journal_path(book_name)
+            with open(journal_file, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+
+            info["pending"] += len(records)
+            info["signature"] = _disk_signature(book_name)
+            _write_stats["records"] += len(records)
+
+            print(f"  💾 セッション差分を保存: {len(records)}件")
+
+        snapshot_path = None
+        if immediate or not info["has_snapshot"] or info["pending"] >= JOURNAL_COMPACT_EVERY:
+            snapshot_path = _compact_locked(book_name)
+
+        if records and snapshot_path is None:
+            session_catalog.record_session(book_name, old_state, latest_path)
+
+    return latest_path
+
+
+def _compact_locked(book_name: str) -> Optional[Path]:
+    """スナップショットを作成してジャーナルを空にする（ロックを保持した状態で呼ぶ）"""
+    state = _load_known_state(book_name)
+    info = _journal_info[book_name]
+
+    if info["has_snapshot"] and info["pending"] == 0:
+        return None
+
+    save_dir = _get_sessions_dir()
+    save_dir.mkdir(parents=True, exist_ok=True)
+
+    # タイムスタンプ付きファイル名
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    save_path = save_dir / f"session_{book_name}_{timestamp}.json"
+
+    # 最新セッションファイルも保存（上書き）
+    latest_path = save_dir / f"session_{book_name}_latest.json"
+
+    # スナップショットに反映済みのジャーナル番号を埋め込む（途中で落ちても二重適用しない）
+    text = json.dumps({**state, _SEQ_KEY: info["seq"]}, ensure_ascii=False, separators=(',', ':'))
+    atomic_write_text(save_path, text)
+    atomic_write_text(latest_path, text)
+
+    # 反映済みのジャーナルを空にする
+    atomic_write_text(_journal_path(book_name), "")
+
+    info["pending"] = 0
+    info["signature"] = _disk_signature(book_name)
+    info["has_snapshot"] = True
+    _write_stats["snapshots"] += 1
+
+    session_catalog.record_session(book_name, state, latest_path, snapshot_path=save_path)
 
     print(f"  💾 セッション保存: {save_path}")
 
     return save_path
 
 
+def flush_session(book_name: str) -> Optional[Path]:
+    """
+    ジャーナルの未反映分をスナップショットにまとめる
+
+    Args:
+        book_name: 書籍名
+
+    Returns:
+        作成したスナップショットのパス。未反映分がない場合はNone
+    """
+    with _lock, _JournalLock(book_name):
+        return _compact_locked(book_name)
+
+
+def flush_all_sessions() -> None:
+    """このプロセスで保存したすべての書籍のジャーナルをスナップショットにまとめる"""
+    with _lock:
+        for book_name in list(_journal_info.keys()):
+            if _journal_info[book_name]["pending"] > 0:
+                flush_session(book_name)
+
+
+def get_write_stats() -> Dict[str, int]:
+    """
+    セッション保存の統計を取得
+
+    Returns:
+        {'requested': 保存要求回数, 'records': 追記した差分件数, 'snapshots': スナップショット作成回数}
+    """
+    with _lock:
+        return dict(_write_stats)
+
+
+atexit.register(flush_all_sessions)
+
+
 def load_session_state(book_name: str, use_latest: bool = True) -> Optional[Dict[str, Any]]:
     """
     セッション状態をJSONファイルから復元
 
+    スナップショットを読み込み、ジャーナルの未反映分を適用して返す。
+    スナップショットのファイルがない場合は、カタログにある残っているスナップショットのうち
+    最新のものを使う（ジャーナルだけを空の状態に適用すると、一部のキーしかない状態になるため）。
+    ジャーナルがそのスナップショットの続きでない（より新しいスナップショットに対する差分の）場合は、
+    ジャーナルを適用せずスナップショットの時点まで巻き戻して返す。
+
     Args:
         book_name: 書籍名
         use_latest: True の場合、最新のセッションファイルを使用
 
     Returns:
-        セッション状態の辞書。ファイルがない場合はNone
+        セッション状態の辞書。スナップショットがない場合はNone
     """
-    project_root = get_project_root()
-    save_dir = project_root / "data" / "internal" / "sessions"
-
+    candidates = []
     if use_latest:
-        session_file = save_dir / f"session_{book_name}_latest.json"
-    else:
-        # 最新のタイムスタンプ付きファイルを検索
-        session_files = list(save_dir.glob(f"session_{book_name}_*.json"))
-        if not session_files:
-            return None
-        session_file = max(session_files, key=lambda p: p.stat().st_mtime)
+        candidates.append(_get_sessions_dir() / f"session_{book_name}_latest.json")
+    # タイムスタンプ付きファイルをカタログから新しい順に検索
+    candidates.extend(Path(row['path']) for row in session_catalog.list_snapshots(book_name))
 
-    if not session_file.exists():
+    session_file = next((path for path in candidates if path.exists()), None)
+    if session_file is None:
         return None
 
-    with open(session_file, 'r', encoding='utf-8') as f:
-        session_data = json.load(f)
+    _, snapshot_seq = _read_snapshot(session_file)
+    if not _journal_follows(book_name, snapshot_seq):
+        session_data, _ = _read_snapshot(session_file)
+        print(f"  ⚠️ ジャーナルが新しいスナップショットに対する差分のため適用しません（{session_file.name} の時点に巻き戻し）")
+        print(f"  📂 セッション復元: {session_file}")
+        return session_data
+
+    session_data, _, pending = _replay(book_name, session_file)
 
-    print(f"  📂 セッション復元: {session_file}")
+    if session_data is None:
+        return None
+
+    print(f"  📂 セッション復元: {session_file}" + (f"（差分{pending}件を適用）" if pending else ""))
 
     return session_data
 
@@ -111,7 +433,10 @@ def _convert_paths_to_strings(obj: Any) -> Any:
 
 def get_saved_sessions(book_name: Optional[str] = None) -> list[Path]:
     """
-    保存されているセッションファイルのリストを取得
+    保存されているセッションファイル（スナップショット）のリストを取得
+
+    ファイルを走査せず、セッションカタログから新しい順に取得する。
+    書籍ごとの最新状態は session_catalog.list_books() を使う。
 
     Args:
         book_name: 書籍名（指定した場合、その書籍のセッションのみ）
@@ -119,19 +444,7 @@ def get_saved_sessions(book_name: Optional[str] = None) -> list[Path]:
     Returns:
         セッションファイルのパスリスト
     """
-    project_root = get_project_root()
-    save_dir = project_root / "data" / "internal" / "sessions"
-
-    if not save_dir.exists():
+    if not _get_sessions_dir().exists():
         return []
 
-    if book_name:
-        pattern = f"session_{book_name}_*.json"
-    else:
-        pattern = "session_*.json"
-
-    session_files = list(save_dir.glob(pattern))
-    # 新しい順にソート
-    session_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-
-    return session_files
+    return [Path(row['path']) for row in session_catalog.list_snapshots(book_name)]
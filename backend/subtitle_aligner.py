@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+字幕タイミング整列モジュール
+
+ナレーション音声のエネルギー（無音区間）を解析し、
+文字単位の表示タイミングを推定する（オフライン処理、API不要）
+
+- ffmpegで音声を16kHzモノラルPCMにデコード
+- NumPyでフレームごとのエネルギーを計算し、発話区間と間（ポーズ）を検出
+- 発話時間のみに文字を割り当てるため、句読点での間や話速の変化に追従する
+- 結果は音声ファイルの隣に <音声ファイル名>.align.json としてキャッシュ
+"""
+
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import hashlib
+import json
+import subprocess
+
+import numpy as np
+
+from . import tracing
+
+ALIGNMENT_VERSION = 1
+
+# 発話時間を割り当てない文字（読み上げられない記号）
+SILENT_CHARS = set(" 　\n\t、。，．,.！？!?「」『』（）()【】・…‥―〜~:：;；\"'“”‘’")
+
+DEFAULT_PARAMS = {
+    "sample_rate": 16000,
+    "frame_ms": 10,
+    "min_pause_ms": 120,
+    "min_speech_ms": 40,
+}
+
+
+def decode_audio_pcm(audio_file: Path, sample_rate: int = 16000) -> np.ndarray:
+    """
+    音声ファイルをモノラルPCM（float32, -1.0～1.0）にデコード
+
+    Args:
+        audio_file: 音声ファイルのパス
+        sample_rate: サンプリングレート
+
+    Returns:
+        サンプル配列
+    """
+    ffmpeg_cmd = [
+        'ffmpeg',
+        '-v', 'error',
+        '-i', str(audio_file),
+        '-f', 's16le',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-'
+    ]
+
+    with tracing.span("ffmpeg.decode_audio", kind="render") as sp:
+        result = subprocess.run(ffmpeg_cmd, capture_output=True)
+        sp.add(bytes_in=tracing.file_size(audio_file), bytes_out=len(result.stdout))
+    if result.returncode != 0:
+        raise RuntimeError(f"音声のデコードに失敗しました: {result.stderr.decode(errors='ignore')[:200]}")
+
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def compute_frame_energy(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """
+    フレームごとのエネルギー（dB）を計算
+
+    Args:
+        samples: PCMサンプル
+        frame_len: 1フレームのサンプル数
+
+    Returns:
+        フレームごとのエネルギー（dB）
+    """
+    num_frames = int(np.ceil(len(samples) / frame_len))
+    padded = np.zeros(num_frames * frame_len, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(num_frames, frame_len)
+    return 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ブール配列のTrue区間の [開始, 終了) インデックスを返す"""
+    diff = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(diff == 1), np.flatnonzero(diff == -1)
+
+
+def _fill_runs(mask: np.ndarray, starts: np.ndarray, ends: np.ndarray, value: bool) -> np.ndarray:
+    """指定区間をまとめてvalueで塗りつぶす（累積和で一括処理）"""
+    if len(starts) == 0:
+        return mask
+    delta = np.zeros(len(mask) + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends, -1)
+    covered = np.cumsum(delta[:-1]) > 0
+    result = mask.copy()
+    result[covered] = value
+    return result
+
+
+def detect_speech_frames(
+    energy_db: np.ndarray,
+    min_pause_frames: int,
+    min_speech_frames: int
+) -> np.ndarray:
+    """
+    エネルギーから発話フレームを判定
+
+    Args:
+        energy_db: フレームごとのエネルギー（dB）
+        min_pause_frames: これより短い無音は発話中の揺らぎとみなして埋める
+        min_speech_frames: これより短い発話はノイズとみなして除去する
+
+    Returns:
+        発話フレームのブール配列
+    """
+    noise_floor = np.percentile(energy_db, 10)
+    speech_level = np.percentile(energy_db, 90)
+    threshold = max(noise_floor + (speech_level - noise_floor) * 0.25, speech_level - 35.0)
+    speech = energy_db > threshold
+
+    # 発話中の短い無音（子音・促音など）を埋める（先頭・末尾の無音は対象外）
+    starts, ends = _runs(~speech)
+    inner = (starts > 0) & (ends < len(speech)) & (ends - starts < min_pause_frames)
+    speech = _fill_runs(speech, starts[inner], ends[inner], True)
+
+    # 孤立した短いノイズを除去
+    starts, ends = _runs(speech)
+    short = (ends - starts) < min_speech_frames
+    speech = _fill_runs(speech, starts[short], ends[short], False)
+
+    return speech
+
+
+def _char_weights(text: str) -> np.ndarray:
+    """各文字に割り当てる発話時間の重み（記号は0）"""
+    return np.array([0.0 if c in SILENT_CHARS else 1.0 for c in text], dtype=np.float64)
+
+
+def _match_pauses_to_punctuation(
+    fractions: np.ndarray,
+    weights: np.ndarray,
+    speech: np.ndarray,
+    speech_cum: np.ndarray,
+    tolerance: float = 0.15
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    音声中の間（ポーズ）とテキスト中の記号位置を対応付け、区分線形の対応点を返す
+
+    Returns:
+        (文字位置の割合, 発話時間) の対応点配列
+    """
+    total_speech = speech_cum[-1]
+
+    # 発話中の無音区間（先頭・末尾を除く）の位置を発話時間の割合で表す
+    starts, ends = _runs(~speech)
+    inner = (starts > 0) & (ends < len(speech))
+    pause_fracs = speech_cum[starts[inner]] / total_speech
+
+    # 記号の直後の文字境界（記号が連続する場合は最初の1つ）
+    silent = weights == 0
+    punct_idx = np.flatnonzero(silent & ~np.concatenate(([True], silent[:-1])))
+    punct_fracs = fractions[punct_idx]
+
+    anchor_x = [0.0]
+    anchor_y = [0.0]
+    if len(pause_fracs) and len(punct_fracs):
+        # 各ポーズに最も近い記号位置（単調増加を保つ）
+        nearest = np.abs(pause_fracs[:, None] - punct_fracs[None, :]).argmin(axis=1)
+        last_j = -1
+        for pause_frac, j in zip(pause_fracs, nearest):
+            if j <= last_j or abs(pause_frac - punct_fracs[j]) > tolerance:
+                continue
+            if punct_fracs[j] <= anchor_x[-1] or pause_frac <= anchor_y[-1] / total_speech:
+                continue
+            anchor_x.append(punct_fracs[j])
+            anchor_y.append(pause_frac * total_speech)
+            last_j = j
+
+    anchor_x.append(1.0)
+    anchor_y.append(total_speech)
+    return np.array(anchor_x), np.array(anchor_y)
+
+
+def align_text_to_speech(
+    text: str,
+    speech: np.ndarray,
+    frame_sec: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    発話フレームに文字を割り当て、文字ごとの開始・終了時刻を算出
+
+    Args:
+        text: ナレーションテキスト
+        speech: 発話フレームのブール配列
+        frame_sec: 1フレームの秒数
+
+    Returns:
+        (開始時刻の配列, 終了時刻の配列)
+    """
+    weights = _char_weights(text)
+    num_frames = len(speech)
+    duration = num_frames * frame_sec
+
+    # 累積発話時間（フレーム境界ごと）
+    speech_cum = np.concatenate(([0.0], np.cumsum(speech.astype(np.float64)))) * frame_sec
+    total_speech = speech_cum[-1]
+
+    if total_speech <= 0 or weights.sum() <= 0:
+        # 発話を検出できない場合は均等割り
+        bounds = np.linspace(0.0, duration, len(text) + 1)
+        return bounds[:-1], bounds[1:]
+
+    # 文字境界を発話時間軸上に配置（0～1の割合）
+    fractions = np.concatenate(([0.0], np.cumsum(weights))) / weights.sum()
+
+    # 句読点などの記号を音声中の間（ポーズ）に合わせる
+    anchor_x, anchor_y = _match_pauses_to_punctuation(fractions, weights, speech, speech_cum)
+    bounds = np.interp(fractions, anchor_x, anchor_y)
+
+    def speech_to_time(values: np.ndarray, side: str) -> np.ndarray:
+        # side="right": 無音区間の後（次の発話の開始）、side="left": 無音区間の前（直前の発話の終了）
+        idx = np.clip(np.searchsorted(speech_cum, values, side=side), 1, num_frames)
+        frac = np.clip(values - speech_cum[idx - 1], 0.0, frame_sec)
+        return (idx - 1) * frame_sec + frac
+
+    starts = speech_to_time(bounds[:-1], "right")
+    ends = speech_to_time(bounds[1:], "left")
+
+    # 記号は直前の発話の終わりに置く（表示上は長さ0）
+    silent = weights == 0
+    before = speech_to_time(bounds[:-1], "left")
+    starts = np.where(silent, before, starts)
+    ends = np.where(silent, before, np.maximum(ends, starts))
+
+    return starts, ends
+
+
+def _cache_file(audio_file: Path) -> Path:
+    """整列結果のキャッシュファイルパス"""
+    return audio_file.parent / f"{audio_file.name}.align.json"
+
+
+def _cache_key(audio_file: Path, text: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """キャッシュの有効性判定に使う値"""
+    stat = audio_file.stat()
+    return {
+        "version": ALIGNMENT_VERSION,
+        "audio_size": stat.st_size,
+        "audio_mtime": stat.st_mtime,
+        "text_sha1": hashlib.sha1(text.encode('utf-8')).hexdigest(),
+        "params": params,
+    }
+
+
+def align_narration(
+    audio_file: Path,
+    text: str,
+    use_cache: bool = True,
+    params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    ナレーション音声とテキストを整列（キャッシュ付き）
+
+    Args:
+        audio_file: ナレーション音声ファイル
+        text: ナレーションテキスト
+        use_cache: キャッシュを使用するか
+        params: 解析パラメータ（DEFAULT_PARAMSを上書き）
+
+    Returns:
+        {'duration': 音声の長さ(秒), 'char_starts': [...], 'char_ends': [...]}
+    """
+    audio_file = Path(audio_file)
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    key = _cache_key(audio_file, text, params)
+    cache_file = _cache_file(audio_file)
+
+    if use_cache and cache_file.exists():
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                return cached["alignment"]
+        except (json.JSONDecodeError, KeyError, OSError):
+            pass
+
+    sample_rate = params["sample_rate"]
+    frame_len = sample_rate * params["frame_ms"] // 1000
+    frame_sec = frame_len / sample_rate
+
+    samples = decode_audio_pcm(audio_file, sample_rate)
+    duration = len(samples) / sample_rate
+
+    if len(samples) == 0:
+        bounds = np.linspace(0.0, duration, len(text) + 1)
+        starts, ends = bounds[:-1], bounds[1:]
+    else:
+        energy_db = compute_frame_energy(samples, frame_len)
+        speech = detect_speech_frames(
+            energy_db,
+            min_pause_frames=max(1, params["min_pause_ms"] // params["frame_ms"]),
+            min_speech_frames=max(1, params["min_speech_ms"] // params["frame_ms"])
+        )
+        starts, ends = align_text_to_speech(text, speech, frame_sec)
+        starts = np.minimum(starts, duration)
+        ends = np.minimum(ends, duration)
+
+    alignment = {
+        "duration": duration,
+        "char_starts": np.round(starts, 3).tolist(),
+        "char_ends": np.round(ends, 3).tolist(),
+    }
+
+    if use_cache:
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({"key": key, "alignment": alignment}, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    return alignment
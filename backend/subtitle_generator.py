@@ -6,13 +6,132 @@ ASS字幕生成モジュール
 """
 
 from pathlib import Path
-from typing import List, Dict, Any
-from moviepy import AudioFileClip
+from typing import List, Dict, Any, Optional
+
+from . import subtitle_aligner
+
+
+# 行頭に来てはいけない文字（句読点・閉じ括弧・小書き文字など）
+NO_LINE_START = set("、。，．,.！？!?」』）)】〉》…‥ーゝゞヽヾ々ぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮヵヶ・：；")
+# 行末に来てはいけない文字（開き括弧）
+NO_LINE_END = set("「『（(【〈《")
+
+# 区切り位置のスコア（直前の文字による）
+CLOSE_BRACKETS = set("」』）)】〉》")
+BREAK_AFTER_SCORES = {
+    **{c: 10.0 for c in "。！？!?"},
+    **{c: 9.0 for c in CLOSE_BRACKETS},
+    **{c: 7.0 for c in "…‥"},
+    **{c: 6.0 for c in "、，,"},
+}
+BREAK_BEFORE_OPEN_BRACKET = 5.0
+BREAK_AT_SPACE = 8.0
+FORBIDDEN = float('-inf')
+
+
+def _char_class(char: str) -> str:
+    """文字種を判定（区切り位置のスコア計算用）"""
+    code = ord(char)
+    if char.isspace():
+        return "space"
+    if 0x3041 <= code <= 0x309F:
+        return "hiragana"
+    if 0x30A0 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF or 0xFF66 <= code <= 0xFF9F:
+        return "katakana"
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or char in "々〆ヶ":
+        return "kanji"
+    if char.isascii() and char.isalnum() or 0xFF10 <= code <= 0xFF5A:
+        return "alnum"
+    return "symbol"
+
+
+# 文字種の変わり目のスコア（(直前, 直後) → スコア）
+SCRIPT_CHANGE_SCORES = {
+    ("hiragana", "kanji"): 3.0,      # 助詞の後など、文節の切れ目になりやすい
+    ("hiragana", "katakana"): 3.0,
+    ("hiragana", "alnum"): 3.0,
+    ("katakana", "hiragana"): 2.0,
+    ("katakana", "kanji"): 2.0,
+    ("alnum", "hiragana"): 2.0,
+    ("alnum", "kanji"): 2.0,
+    ("kanji", "katakana"): 1.5,
+    ("kanji", "alnum"): 1.5,
+    ("kanji", "hiragana"): 0.5,      # 送り仮名の前は避けたい
+}
+# 同じ文字種が続く中での区切り（カタカナ語・英数字の途中では区切らない）
+SAME_SCRIPT_SCORES = {
+    "hiragana": 0.0,
+    "kanji": 0.0,
+    "katakana": FORBIDDEN,
+    "alnum": FORBIDDEN,
+    "symbol": 0.0,
+    "space": 0.0,
+}
+
+
+def compute_break_scores(text: str) -> List[float]:
+    """
+    各位置で区切った場合のスコアを1パスで計算
+
+    scores[i] は text[i-1] と text[i] の間で区切るスコア（scores[0] は未使用）。
+    句読点・括弧・空白・文字種の変わり目を高く評価し、禁則（行頭の句読点、
+    行末の開き括弧）やカタカナ語・英数字の途中は区切り不可（-inf）とする。
+
+    Args:
+        text: テキスト
+
+    Returns:
+        スコアのリスト（長さ len(text)）
+    """
+    scores = [FORBIDDEN] * len(text)
+    if not text:
+        return scores
+
+    prev_char = text[0]
+    prev_class = _char_class(prev_char)
+    space_run_start = -1
+
+    for i in range(1, len(text)):
+        char = text[i]
+        char_class = _char_class(char)
+
+        if char_class == "space":
+            if prev_class != "space":
+                space_run_start = i
+        elif prev_class == "space" and char in NO_LINE_START and space_run_start > 0:
+            # 空白を挟んでも次の文字が行頭禁則文字なら、空白の前でも区切らない
+            for j in range(space_run_start, i):
+                scores[j] = FORBIDDEN
+
+        if char in NO_LINE_START or prev_char in NO_LINE_END:
+            score = FORBIDDEN
+        elif prev_class == "space" or char_class == "space":
+            score = BREAK_AT_SPACE
+        elif prev_char in CLOSE_BRACKETS and char_class == "hiragana":
+            # 「〜」は のように閉じ括弧に助詞が続く場合は区切らない方がよい
+            score = 1.0
+        elif prev_char in BREAK_AFTER_SCORES:
+            score = BREAK_AFTER_SCORES[prev_char]
+        elif char in NO_LINE_END:
+            score = BREAK_BEFORE_OPEN_BRACKET
+        elif prev_class == char_class:
+            score = SAME_SCRIPT_SCORES[char_class]
+        else:
+            score = SCRIPT_CHANGE_SCORES.get((prev_class, char_class), 1.0)
+
+        scores[i] = score
+        prev_char = char
+        prev_class = char_class
+
+    return scores
 
 
 def split_text_into_chunks(text: str, max_chars: int = 15) -> List[str]:
     """
-    テキストを読みやすいチャンクに分割（句読点考慮）
+    テキストを読みやすいチャンクに分割（句読点・括弧・文字種を考慮）
+
+    区切り候補のスコアを1パスで計算し、各チャンクで max_chars 以内の
+    最もスコアの高い位置（同程度なら長い方）で区切る。処理量はテキスト長に比例する。
 
     Args:
         text: テキスト
@@ -21,29 +140,50 @@ def split_text_into_chunks(text: str, max_chars: int = 15) -> List[str]:
     Returns:
         チャンクのリスト
     """
+    scores = compute_break_scores(text)
+    text_len = len(text)
+    min_chars = max(1, int(max_chars * 0.4))
+
     chunks = []
     current_pos = 0
 
-    while current_pos < len(text):
-        # 次のチャンクを取得
-        chunk_end = min(current_pos + max_chars, len(text))
-        chunk_text = text[current_pos:chunk_end]
+    while current_pos < text_len:
+        # 先頭の空白は読み飛ばす
+        while current_pos < text_len and text[current_pos].isspace():
+            current_pos += 1
+        if current_pos >= text_len:
+            break
 
-        # まだテキストが残っている場合、句読点で区切る
-        if chunk_end < len(text):
-            # 後ろから句読点を探す
+        limit = current_pos + max_chars
+        if limit >= text_len:
+            chunk_end = text_len
+        else:
+            # max_chars以内で最もスコアの高い区切り位置を探す（長いチャンクを少し優遇）
             best_cut = -1
-            for delimiter in ['。', '、', '！', '？']:
-                idx = chunk_text.rfind(delimiter)
-                if idx != -1 and idx > len(chunk_text) * 0.4:  # 後半40%以降にあればOK
-                    best_cut = idx + 1
-                    break
+            best_score = FORBIDDEN
+            for i in range(current_pos + min_chars, limit + 1):
+                score = scores[i]
+                if score == FORBIDDEN:
+                    continue
+                score += 2.0 * (i - current_pos) / max_chars
+                if score >= best_score:
+                    best_score = score
+                    best_cut = i
+
+            if best_cut == -1:
+                # 短いチャンクになっても区切れる位置を優先し、なければ強制的に区切る
+                for i in range(current_pos + min_chars - 1, current_pos, -1):
+                    if scores[i] != FORBIDDEN:
+                        best_cut = i
+                        break
+                else:
+                    best_cut = limit
 
-            if best_cut != -1:
-                chunk_text = chunk_text[:best_cut]
-                chunk_end = current_pos + best_cut
+            chunk_end = best_cut
 
-        chunks.append(chunk_text.strip())
+        chunk_text = text[current_pos:chunk_end].strip()
+        if chunk_text:
+            chunks.append(chunk_text)
         current_pos = chunk_end
 
     return chunks
@@ -66,12 +206,174 @@ def format_time(seconds: float) -> str:
     return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
 
 
+def _get_scene_duration(scene: Dict[str, Any]) -> float:
+    """シーンの長さ（秒）を音声ファイルまたはduration_secondsから取得"""
+    if 'audio_file' in scene and Path(scene['audio_file']).exists():
+        from moviepy import AudioFileClip
+        audio_clip = AudioFileClip(str(scene['audio_file']))
+        duration = audio_clip.duration
+        audio_clip.close()
+        return duration
+
+    # フォールバック: duration_secondsを使用
+    return scene.get('duration_seconds', 5.0)
+
+
+def _find_chunk_offsets(text: str, chunks: List[str]) -> List[int]:
+    """各チャンクが元テキストの何文字目から始まるかを求める"""
+    offsets = []
+    pos = 0
+    for chunk in chunks:
+        idx = text.find(chunk, pos) if chunk else -1
+        if idx == -1:
+            idx = pos
+        offsets.append(idx)
+        pos = idx + len(chunk)
+    return offsets
+
+
+def _align_scene(scene: Dict[str, Any], text: str) -> Optional[Dict[str, Any]]:
+    """音声解析によるタイミング整列（失敗時はNone）"""
+    if 'audio_file' not in scene or not Path(scene['audio_file']).exists():
+        return None
+
+    try:
+        return subtitle_aligner.align_narration(Path(scene['audio_file']), text)
+    except Exception as e:
+        print(f"  ⚠️ 字幕タイミング整列に失敗（均等割りで続行）: {str(e)[:200]}")
+        return None
+
+
+def compute_scene_timings(
+    scene: Dict[str, Any],
+    max_chars: int,
+    use_alignment: bool = True
+) -> tuple:
+    """
+    シーン内の各チャンクの表示タイミングを計算
+
+    use_alignment=True かつ音声ファイルがある場合は、ナレーション音声の
+    無音区間解析から文字単位のタイミングを求める。それ以外はシーンの長さを
+    チャンク数・文字数で均等に割る。
+
+    Args:
+        scene: シーン情報
+        max_chars: 1チャンクの最大文字数
+        use_alignment: 音声解析による整列を使うか
+
+    Returns:
+        (シーンの長さ, チャンク情報のリスト)
+        チャンク情報: {'text', 'start', 'end', 'lead_in', 'char_durations'}（時刻はシーン先頭からの秒数）
+    """
+    text = scene['narration']
+    chunks = split_text_into_chunks(text, max_chars)
+
+    alignment = _align_scene(scene, text) if use_alignment else None
+
+    timings = []
+
+    if alignment is None:
+        duration = _get_scene_duration(scene)
+        chunk_duration = duration / len(chunks) if len(chunks) > 0 else duration
+
+        for idx, chunk in enumerate(chunks):
+            char_duration = chunk_duration / len(chunk) if chunk else 0.0
+            timings.append({
+                'text': chunk,
+                'start': idx * chunk_duration,
+                'end': (idx + 1) * chunk_duration,
+                'lead_in': 0.0,
+                'char_durations': [char_duration] * len(chunk)
+            })
+
+        return duration, timings
+
+    duration = alignment['duration']
+    char_starts = alignment['char_starts']
+    char_ends = alignment['char_ends']
+    offsets = _find_chunk_offsets(text, chunks)
+
+    for idx, (chunk, offset) in enumerate(zip(chunks, offsets)):
+        # 前のチャンクの終了から表示し、次のチャンクの発話開始まで表示し続ける
+        chunk_start = timings[-1]['end'] if timings else 0.0
+        if idx + 1 < len(chunks):
+            chunk_end = max(char_starts[offsets[idx + 1]], chunk_start)
+        else:
+            chunk_end = duration
+
+        char_durations = []
+        for char_idx in range(offset, offset + len(chunk)):
+            if char_idx + 1 < offset + len(chunk):
+                # 文字間の間（句読点でのポーズ）はその文字に含める
+                char_durations.append(max(char_starts[char_idx + 1] - char_starts[char_idx], 0.0))
+            else:
+                char_durations.append(max(char_ends[char_idx] - char_starts[char_idx], 0.0))
+
+        lead_in = max(char_starts[offset] - chunk_start, 0.0) if chunk else 0.0
+
+        timings.append({
+            'text': chunk,
+            'start': chunk_start,
+            'end': chunk_end,
+            'lead_in': lead_in,
+            'char_durations': char_durations
+        })
+
+    return duration, timings
+
+
+def build_karaoke_tag_text(
+    chunk: str,
+    char_durations: List[float],
+    colors: tuple = ("FFFFFF", "00FFFF"),
+    karaoke_tag: str = "kf",
+    lead_in: float = 0.0
+) -> str:
+    """
+    1チャンク分のカラオケ字幕テキストを\\k/\\kfタグで生成
+
+    未読部分はSecondaryColour（白）、読み上げ済み部分はPrimaryColour（ハイライト色）で
+    表示されるため、1チャンク1イベントでハイライトを表現できる。
+
+    Args:
+        chunk: チャンクテキスト
+        char_durations: 各文字のハイライト時間（秒）
+        colors: (通常色, ハイライト色) のタプル（BBGGRR形式）
+        karaoke_tag: "k"（文字単位で切り替え）または "kf"（滑らかに塗りつぶし）
+        lead_in: 表示開始から最初の文字のハイライト開始までの時間（秒）
+
+    Returns:
+        ASSのDialogueテキスト部分
+    """
+    white_color = colors[0]
+    highlight_color = colors[1]
+
+    parts = [f"{{\\1c&H{highlight_color}&\\2c&H{white_color}&}}"]
+
+    # 丸め誤差が蓄積しないよう、累積時間から各文字の長さ（センチ秒）を算出
+    elapsed = lead_in
+    prev_cs = int(round(elapsed * 100))
+    if prev_cs > 0:
+        parts.append(f"{{\\k{prev_cs}}}")
+
+    for char, char_duration in zip(chunk, char_durations):
+        elapsed += char_duration
+        end_cs = int(round(elapsed * 100))
+        parts.append(f"{{\\{karaoke_tag}{end_cs - prev_cs}}}{char}")
+        prev_cs = end_cs
+
+    return ''.join(parts)
+
+
 def create_karaoke_subtitle_file(
     scenes: List[Dict[str, Any]],
     output_file: Path,
     max_chars: int = 15,
     aspect_ratio: str = "9:16",
-    colors: tuple = ("FFFFFF", "00FFFF")
+    colors: tuple = ("FFFFFF", "00FFFF"),
+    karaoke_mode: str = "tags",
+    karaoke_tag: str = "kf",
+    use_alignment: bool = True
 ) -> None:
     """
     ASS形式のカラオケ字幕ファイルを作成
@@ -82,7 +384,17 @@ def create_karaoke_subtitle_file(
         output_file: 出力字幕ファイルパス
         max_chars: 1チャンクの最大文字数
         aspect_ratio: アスペクト比（9:16 or 16:9）
+        colors: (通常色, ハイライト色) のタプル（BBGGRR形式）
+        karaoke_mode: "tags"（1チャンク1イベント、\\k/\\kfタグ使用）
+            または "events"（文字ごとにイベントを生成する旧方式）
+        karaoke_tag: karaoke_mode="tags" の場合のタグ（"k" or "kf"）
+        use_alignment: ナレーション音声の解析でタイミングを合わせるか
     """
+    if karaoke_mode not in ("tags", "events"):
+        raise ValueError(f"不明なカラオケモード: {karaoke_mode}")
+    if karaoke_tag not in ("k", "kf"):
+        raise ValueError(f"不明なカラオケタグ: {karaoke_tag}")
+
     # アスペクト比に応じた解像度設定
     if aspect_ratio == "9:16":
         play_res_x = 1080
@@ -116,46 +428,42 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     current_time = 0.0
 
     for scene in scenes:
-        text = scene['narration']
-
-        # 音声ファイルから実際の長さを取得
-        if 'audio_file' in scene and Path(scene['audio_file']).exists():
-            audio_clip = AudioFileClip(str(scene['audio_file']))
-            duration = audio_clip.duration
-            audio_clip.close()
-        else:
-            # フォールバック: duration_secondsを使用
-            duration = scene.get('duration_seconds', 5.0)
-
-        # テキストをチャンクに分割
-        chunks = split_text_into_chunks(text, max_chars)
-
         # 各チャンクの表示時間を計算
-        chunk_duration = duration / len(chunks) if len(chunks) > 0 else duration
-
-        chunk_start_time = current_time
+        duration, chunk_timings = compute_scene_timings(scene, max_chars, use_alignment)
 
-        for chunk in chunks:
-            chunk_start = chunk_start_time
-            chunk_end = chunk_start + chunk_duration
+        for timing in chunk_timings:
+            chunk = timing['text']
+            chunk_start = current_time + timing['start']
+            chunk_end = current_time + timing['end']
 
             # カラオケ効果: 文字ごとに色を変える
             total_chars = len(chunk)
             if total_chars == 0:
-                chunk_start_time = chunk_end
                 continue
 
-            char_duration = chunk_duration / total_chars
+            if karaoke_mode == "tags":
+                # 1チャンク1イベント（ハイライトはlibassが\k/\kfタグで描画）
+                subtitle_text = build_karaoke_tag_text(
+                    chunk, timing['char_durations'], colors, karaoke_tag, timing['lead_in']
+                )
+                event = f"Dialogue: 0,{format_time(chunk_start)},{format_time(chunk_end)},Default,,0,0,0,,{subtitle_text}"
+                events.append(event)
+                continue
+
+            # 各文字のハイライト開始時刻
+            char_times = [chunk_start + timing['lead_in']]
+            for char_duration in timing['char_durations']:
+                char_times.append(char_times[-1] + char_duration)
 
             # 各文字の状態ごとにイベントを作成
             for char_idx in range(total_chars + 1):
-                event_start = chunk_start + (char_idx * char_duration)
+                event_start = chunk_start if char_idx == 0 else char_times[char_idx]
 
                 if char_idx == total_chars:
                     # 最後のイベント（全部黄色）は次のチャンク開始まで
                     event_end = chunk_end
                 else:
-                    event_end = event_start + char_duration
+                    event_end = char_times[char_idx + 1]
 
                 # 字幕テキスト生成（カラオケ効果）
                 white_color = colors[0]
@@ -179,8 +487,6 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                 event = f"Dialogue: 0,{event_start_str},{event_end_str},Default,,0,0,0,,{subtitle_text}"
                 events.append(event)
 
-            chunk_start_time = chunk_end
-
         current_time += duration
 
     # イベントをファイルに書き込み
@@ -195,7 +501,8 @@ def create_normal_subtitle_file(
     scenes: List[Dict[str, Any]],
     output_file: Path,
     max_chars: int = 20,
-    aspect_ratio: str = "9:16"
+    aspect_ratio: str = "9:16",
+    use_alignment: bool = True
 ) -> None:
     """
     ASS形式の通常字幕ファイルを作成（ハイライトなし）
@@ -205,6 +512,7 @@ def create_normal_subtitle_file(
         output_file: 出力字幕ファイルパス
         max_chars: 1チャンクの最大文字数
         aspect_ratio: アスペクト比
+        use_alignment: ナレーション音声の解析でタイミングを合わせるか
     """
     # アスペクト比に応じた解像度設定
     if aspect_ratio == "9:16":
@@ -239,37 +547,23 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     current_time = 0.0
 
     for scene in scenes:
-        text = scene['narration']
-
-        # 音声ファイルから実際の長さを取得
-        if 'audio_file' in scene and Path(scene['audio_file']).exists():
-            audio_clip = AudioFileClip(str(scene['audio_file']))
-            duration = audio_clip.duration
-            audio_clip.close()
-        else:
-            # フォールバック: duration_secondsを使用
-            duration = scene.get('duration_seconds', 5.0)
-
-        # テキストをチャンクに分割
-        chunks = split_text_into_chunks(text, max_chars)
-
         # 各チャンクの表示時間を計算
-        chunk_duration = duration / len(chunks) if len(chunks) > 0 else duration
+        duration, chunk_timings = compute_scene_timings(scene, max_chars, use_alignment)
 
-        for chunk in chunks:
-            chunk_start = current_time
-            chunk_end = current_time + chunk_duration
+        for timing in chunk_timings:
+            chunk_start = current_time + timing['start']
+            chunk_end = current_time + timing['end']
 
             event_start_str = format_time(chunk_start)
             event_end_str = format_time(chunk_end)
 
             # 通常字幕（白色固定）
-            subtitle_text = chunk
+            subtitle_text = timing['text']
 
             event = f"Dialogue: 0,{event_start_str},{event_end_str},Default,,0,0,0,,{subtitle_text}"
             events.append(event)
 
-            current_time = chunk_end
+        current_time += duration
 
     # イベントをファイルに書き込み
     ass_content += '\n'.join(events)
@@ -277,3 +571,56 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     output_file.parent.mkdir(parents=True, exist_ok=True)
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(ass_content)
+
+
+def format_srt_time(seconds: float) -> str:
+    """
+    秒数をSRT形式の時刻に変換
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        SRT形式の時刻文字列（hh:mm:ss,mmm）
+    """
+    total_ms = int(round(seconds * 1000))
+    h = total_ms // 3600000
+    m = (total_ms % 3600000) // 60000
+    s = (total_ms % 60000) // 1000
+    ms = total_ms % 1000
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def create_srt_subtitle_file(
+    scenes: List[Dict[str, Any]],
+    output_file: Path,
+    max_chars: int = 20,
+    use_alignment: bool = True
+) -> None:
+    """
+    SRT形式の字幕ファイルを作成（ソフト字幕・別ファイル出力用）
+
+    Args:
+        scenes: シーン情報のリスト
+        output_file: 出力字幕ファイルパス
+        max_chars: 1チャンクの最大文字数
+        use_alignment: ナレーション音声の解析でタイミングを合わせるか
+    """
+    entries = []
+    current_time = 0.0
+
+    for scene in scenes:
+        duration, chunk_timings = compute_scene_timings(scene, max_chars, use_alignment)
+
+        for timing in chunk_timings:
+            if not timing['text']:
+                continue
+            start_str = format_srt_time(current_time + timing['start'])
+            end_str = format_srt_time(current_time + timing['end'])
+            entries.append(f"{len(entries) + 1}\n{start_str} --> {end_str}\n{timing['text']}\n")
+
+        current_time += duration
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(entries))
@@ -3,18 +3,31 @@
 書籍概要生成モジュール
 
 EPUBから抽出したテキストから、論文形式の客観的な概要を生成
+
+長い書籍は、各章から均等に抜き出した抜粋（層化抽出）を1回のAPI呼び出しで要約する。
+冒頭だけでなく書籍全体を反映した概要を、チャンクまとめ（book_analyzer）より短い時間で作れる。
 """
 
 from pathlib import Path
-from typing import Dict, Any
-import google.generativeai as genai
-import os
+from typing import Dict, Any, Optional, List
 import json
+import math
 from dotenv import load_dotenv
+from .workspace import Workspace, resolve_workspace
+from . import api_clients, tracing
 
 # .envファイルから環境変数を読み込む
 load_dotenv()
 
+# 抜粋の上限（文字数、1回のAPI呼び出しに入れる量）
+EXCERPT_MAX_CHARS = 50000
+# 1か所から抜き出す長さの目安（文字数）
+EXCERPT_WINDOW_CHARS = 600
+# 短い章にも割り当てる最低文字数
+EXCERPT_MIN_CHAPTER_CHARS = 300
+# 抜粋の区切り
+EXCERPT_GAP = "\n（中略）\n"
+
 
 def chunk_text(text: str, chunk_size: int = 2000) -> list[str]:
     """
@@ -76,38 +89,159 @@ def summarize_chunk(chunk: str, chunk_index: int, model) -> str:
 200-300文字の要約のみを出力してください。
 """
 
-    response = model.generate_content(
-        prompt,
-        generation_config={"temperature": 0.3}
-    )
+    with tracing.span("gemini.summarize_chunk", kind="api"):
+        response = model.generate_content(
+            prompt,
+            generation_config={"temperature": 0.3}
+        )
+        tracing.record_gemini(response, 'gemini-2.5-flash-lite', prompt)
 
     return response.text.strip()
 
 
-def generate_book_summary(book_name: str, full_text: str, target_length: int = 800) -> Dict[str, Any]:
+def chapters_from_text(text: str) -> List[Dict[str, Any]]:
+    """
+    抽出済みテキストから章の位置を求める
+
+    extract_text_from_epub はEPUBのドキュメントを空行（\\n\\n）で区切って結合するため、
+    その区切りを章の境界とみなす（epub_parser.extract_text_with_chapters の結果がない場合に使う）。
+
+    Args:
+        text: 書籍の全文テキスト
+
+    Returns:
+        [{'index', 'title', 'start', 'end'}, ...]
+    """
+    chapters = []
+    start = 0
+    for part in text.split('\n\n'):
+        if part.strip():
+            chapters.append({
+                "index": len(chapters),
+                "title": part.strip().split('\n', 1)[0][:40],
+                "start": start,
+                "end": start + len(part),
+            })
+        start += len(part) + 2
+    return chapters
+
+
+def _sample_chapter(text: str, start: int, end: int, budget: int) -> List[str]:
+    """章 [start, end) を budget 文字ぶん、均等な間隔の抜粋に分ける（先頭は必ず含める）"""
+    length = end - start
+    if length <= budget:
+        return [text[start:end]]
+
+    windows = max(1, math.ceil(budget / EXCERPT_WINDOW_CHARS))
+    window = budget // windows
+    stride = length / windows
+
+    samples = []
+    for k in range(windows):
+        stratum_start = start + int(k * stride)
+        sample_start = stratum_start
+        if k > 0:
+            # 行の途中から始めないよう、層の中の次の行頭に合わせる
+            newline = text.find('\n', stratum_start, stratum_start + min(200, int(stride) - window))
+            if newline != -1:
+                sample_start = newline + 1
+        samples.append(text[sample_start:min(sample_start + window, end)].strip())
+    return [sample for sample in samples if sample]
+
+
+def build_stratified_excerpt(
+    full_text: str,
+    chapters: Optional[List[Dict[str, Any]]] = None,
+    max_chars: int = EXCERPT_MAX_CHARS
+) -> Dict[str, Any]:
+    """
+    各章から均等に抜き出した、上限つきの抜粋を作る（層化抽出）
+
+    章を層とし、上限の文字数を章の長さに比例して割り当てる（短い章にも最低限を割り当てる）。
+    各章の中では先頭（章題・導入）と、章を等分した各区間の先頭から抜き出す。
+
+    Args:
+        full_text: 書籍の全文テキスト
+        chapters: 章の位置（epub_parser.extract_text_with_chapters の結果、Noneの場合はテキストから求める）
+        max_chars: 抜粋の上限（文字数）
+
+    Returns:
+        {'text': 抜粋, 'characters': 抜粋の文字数, 'coverage': 全文に対する抜粋の割合,
+         'num_chapters': 抜粋に含めた章の数, 'num_samples': 抜き出した箇所の数}
+    """
+    if len(full_text) <= max_chars:
+        return {"text": full_text, "characters": len(full_text), "coverage": 1.0,
+                "num_chapters": len(chapters) if chapters else 1, "num_samples": 1}
+
+    chapters = [c for c in (chapters or chapters_from_text(full_text)) if c["end"] > c["start"]]
+    total = sum(c["end"] - c["start"] for c in chapters)
+
+    # 見出しと区切りの分を差し引いた本文の予算
+    budget = int(max_chars * 0.9)
+    floor = min(EXCERPT_MIN_CHAPTER_CHARS, budget // (2 * len(chapters)))
+    floors = [min(floor, c["end"] - c["start"]) for c in chapters]
+    spare = budget - sum(floors)
+
+    sections = []
+    num_samples = 0
+    sampled = 0
+    for chapter, chapter_floor in zip(chapters, floors):
+        length = chapter["end"] - chapter["start"]
+        allotment = chapter_floor + int(spare * length / total)
+        if allotment <= 0:
+            continue
+        samples = _sample_chapter(full_text, chapter["start"], chapter["end"], allotment)
+        if not samples:
+            continue
+        position = chapter["start"] * 100 // len(full_text)
+        sections.append(f"【{chapter['title']}（全体の{position}%地点）】\n" + EXCERPT_GAP.join(samples))
+        num_samples += len(samples)
+        sampled += sum(len(sample) for sample in samples)
+
+    text = '\n\n'.join(sections)[:max_chars]
+    return {
+        "text": text,
+        "characters": len(text),
+        "coverage": round(sampled / len(full_text), 3),
+        "num_chapters": len(sections),
+        "num_samples": num_samples,
+    }
+
+
+def generate_book_summary(
+    book_name: str,
+    full_text: str,
+    target_length: int = 800,
+    chapters: Optional[List[Dict[str, Any]]] = None,
+    max_chars: int = EXCERPT_MAX_CHARS
+) -> Dict[str, Any]:
     """
-    書籍の客観的な概要を生成（論文形式）
+    書籍の客観的な概要を生成（論文形式、API呼び出し1回）
+
+    テキストが max_chars を超える場合は、build_stratified_excerpt で各章から均等に抜き出した抜粋を使う。
 
     Args:
         book_name: 書籍名
         full_text: 書籍の全文テキスト
         target_length: 目標文字数（デフォルト800文字）
+        chapters: 章の位置（epub_parser.extract_text_with_chapters の結果、Noneの場合はテキストから求める）
+        max_chars: APIに送るテキストの上限（文字数）
 
     Returns:
-        概要情報を含む辞書
+        概要情報を含む辞書（'excerpt' に抜粋の文字数・割合・章数を含む）
     """
 
     # Gemini API設定
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY環境変数が設定されていません")
+    model = api_clients.get_gemini_model('gemini-2.5-flash-lite')
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
-
-    # テキストが長すぎる場合は最初の部分のみ使用（トークン制限対策）
-    max_chars = 50000
-    text_for_analysis = full_text[:max_chars] if len(full_text) > max_chars else full_text
+    # テキストが長すぎる場合は各章から均等に抜粋（トークン制限対策）
+    with tracing.span("summary.excerpt", book=book_name) as sp:
+        excerpt = build_stratified_excerpt(full_text, chapters, max_chars)
+        sp.set(coverage=excerpt["coverage"], num_samples=excerpt["num_samples"])
+    text_for_analysis = excerpt["text"]
+    if excerpt["coverage"] < 1.0:
+        print(f"  ✂️ {excerpt['num_chapters']}章から{excerpt['num_samples']}か所を抜粋"
+              f"（{excerpt['characters']:,}文字・全体の{excerpt['coverage']:.0%}）")
 
     prompt = f"""
 あなたは学術論文の要旨を書く専門家です。
@@ -119,6 +253,8 @@ def generate_book_summary(book_name: str, full_text: str, target_length: int = 8
 ## 書籍テキスト（抜粋）
 {text_for_analysis}
 
+（長い書籍の場合、各章の先頭と章内の複数箇所から均等に抜き出している。「（中略）」は省略箇所、【】は章の見出しと全体での位置を示す）
+
 ---
 
 ## タスク
@@ -172,39 +308,39 @@ JSON形式で出力してください。
 """
 
     print(f"  🤖 Gemini APIで書籍概要を生成中（目標{target_length}文字）...")
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.3,  # 客観性を保つため低めに設定
-            "response_mime_type": "application/json"
-        }
-    )
+    with tracing.span("gemini.book_summary", kind="api", book=book_name):
+        response = model.generate_content(
+            prompt,
+            generation_config={
+                "temperature": 0.3,  # 客観性を保つため低めに設定
+                "response_mime_type": "application/json"
+            }
+        )
+        tracing.record_gemini(response, 'gemini-2.5-flash-lite', prompt)
 
     result = json.loads(response.text)
+    result["excerpt"] = {k: v for k, v in excerpt.items() if k != "text"}
 
     print(f"  ✓ 書籍概要生成完了（{result['character_count']}文字）")
 
     return result
 
 
-def save_summary(summary: Dict[str, Any], book_name: str) -> Path:
+def save_summary(summary: Dict[str, Any], book_name: str, workspace: Optional[Workspace] = None) -> Path:
     """
     生成した概要を保存
 
     Args:
         summary: 概要データ
         book_name: 書籍名
+        workspace: 保存先ワークスペース（Noneの場合はdata/internal/）
 
     Returns:
         保存先パス
     """
-    from .utils import get_project_root, save_json
-
-    project_root = get_project_root()
-    internal_dir = project_root / "data" / "internal"
-    internal_dir.mkdir(parents=True, exist_ok=True)
+    from .utils import save_json
 
-    summary_file = internal_dir / "book_summary.json"
+    summary_file = resolve_workspace(workspace).internal_file("book_summary.json")
 
     summary_data = {
         "book_name": book_name,
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+テキストの指紋（似た内容のテキストの検出）
+
+MinHash: 文字5-gram（空白を除く）の集合の Jaccard 類似度を、NUM_PERMUTATIONS 個の
+ハッシュの最小値の一致率で推定する。NumPy でまとめて計算する。
+SimHash: 同じ n-gram のハッシュ値をビットごとに多数決した64ビットの値。似たテキストほど
+ハミング距離が小さく、1つの整数で比べられるので章ごとの指紋として保存しておける。
+
+用途:
+- チャンクまとめ（book_analyzer.summarize_chunks）で、ほぼ同じ内容のチャンク
+  （繰り返しの章見出し・エピグラフ・連載のあらすじ・本文と重複する付録など）の
+  まとめを再利用し、API呼び出しを省く
+- 書籍の指紋インデックス（book_index）で、新しい版の本のうち内容が変わっていない章を見つける
+"""
+
+from typing import Dict, List, Optional, Tuple
+import re
+
+import numpy as np
+
+# n-gram の長さ（文字）
+SHINGLE_SIZE = 5
+# MinHash のハッシュ関数の数（推定誤差はおよそ 1/√NUM_PERMUTATIONS）
+NUM_PERMUTATIONS = 128
+# これ以上似ているチャンクを重複とみなす（Jaccard 類似度の推定値）
+SIMILARITY_THRESHOLD = 0.85
+# SimHash のビット数
+SIMHASH_BITS = 64
+
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240607)  # 実行ごとに同じ指紋になるよう固定
+_A = _rng.integers(1, (1 << 31) - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 31) - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    文字 n-gram のハッシュ値の集合（空白を除いたテキストから作る）
+
+    Args:
+        text: テキスト
+        size: n-gram の長さ
+
+    Returns:
+        31ビットのハッシュ値の配列（重複なし、uint64）
+    """
+    compact = _WHITESPACE.sub('', text)
+    codes = np.frombuffer(compact.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    if len(codes) < size:
+        size = len(codes)
+
+    # 多項式ハッシュ（2^64 で自然に折り返す）を n-gram ごとにまとめて計算
+    hashes = np.zeros(len(codes) - size + 1, dtype=np.uint64)
+    base = np.uint64(1_000_003)
+    with np.errstate(over='ignore'):
+        for offset in range(size):
+            hashes = hashes * base + codes[offset:len(codes) - size + 1 + offset]
+        hashes ^= hashes >> np.uint64(29)
+    return np.unique(hashes & _PRIME)
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    MinHash の署名
+
+    Args:
+        text: テキスト
+
+    Returns:
+        NUM_PERMUTATIONS 個の最小ハッシュ値（空のテキストは全要素が最大値）
+    """
+    hashes = shingle_hashes(text)
+    if len(hashes) == 0:
+        return np.full(NUM_PERMUTATIONS, _PRIME, dtype=np.uint64)
+
+    signature = np.full(NUM_PERMUTATIONS, _PRIME, dtype=np.uint64)
+    # (ハッシュ関数の数 × n-gram の数) の行列が大きくなりすぎないよう区切って計算
+    for start in range(0, len(hashes), 8192):
+        block = hashes[start:start + 8192]
+        permuted = (_A[:, None] * block[None, :] + _B[:, None]) % _PRIME
+        signature = np.minimum(signature, permuted.min(axis=1))
+    return signature
+
+
+def estimate_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """2つの MinHash 署名から Jaccard 類似度を推定"""
+    return float(np.mean(signature_a == signature_b))
+
+
+def find_near_duplicates(
+    texts: List[str],
+    threshold: float = SIMILARITY_THRESHOLD,
+    signatures: Optional[List[np.ndarray]] = None
+) -> Dict[int, Tuple[int, float]]:
+    """
+    前に出てきたテキストとほぼ同じ内容のテキストを探す
+
+    Args:
+        texts: テキストのリスト
+        threshold: 重複とみなす類似度
+        signatures: 計算済みの MinHash 署名（Noneの場合は texts から計算）
+
+    Returns:
+        {重複しているテキストの番号: (元のテキストの番号, 類似度)}
+        元のテキストは、重複ではないテキストのうち最も前にあって閾値以上に似ているもの
+    """
+    if signatures is None:
+        signatures = [minhash_signature(text) for text in texts]
+    if len(signatures) < 2:
+        return {}
+
+    matrix = np.stack(signatures)
+    empty = np.all(matrix == _PRIME, axis=1)
+    duplicates: Dict[int, Tuple[int, float]] = {}
+    originals: List[int] = []
+
+    for i in range(len(signatures)):
+        if originals and not empty[i]:
+            similarities = np.mean(matrix[originals] == matrix[i], axis=1)
+            best = int(np.argmax(similarities >= threshold)) if np.any(similarities >= threshold) else None
+            if best is not None:
+                duplicates[i] = (originals[best], float(similarities[best]))
+                continue
+        originals.append(i)
+    return duplicates
+
+
+def simhash(text: str) -> int:
+    """
+    SimHash（64ビット）
+
+    文字 n-gram のハッシュ値をビットごとに多数決して1つの値にまとめる。
+    似た内容のテキストはハミング距離（違うビットの数）が小さくなる。
+
+    Args:
+        text: テキスト
+
+    Returns:
+        64ビットの整数（空のテキストは0）
+    """
+    hashes = shingle_hashes(text)
+    if len(hashes) == 0:
+        return 0
+
+    # 31ビットのハッシュ値を64ビットに広げる（splitmix64 の混ぜ方）
+    with np.errstate(over='ignore'):
+        mixed = hashes * np.uint64(0x9E3779B97F4A7C15)
+        mixed ^= mixed >> np.uint64(31)
+        mixed *= np.uint64(0xBF58476D1CE4E5B9)
+        mixed ^= mixed >> np.uint64(27)
+
+    bits = np.arange(SIMHASH_BITS, dtype=np.uint64)
+    counts = np.zeros(SIMHASH_BITS, dtype=np.uint64)
+    for start in range(0, len(mixed), 8192):
+        block = mixed[start:start + 8192]
+        counts += ((block[:, None] >> bits[None, :]) & np.uint64(1)).sum(axis=0)
+
+    value = 0
+    for bit in np.flatnonzero(counts * 2 > len(mixed)):
+        value |= 1 << int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """2つの SimHash の違うビットの数"""
+    return bin(a ^ b).count('1')
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+計測モジュール（ステージ・シーンごとの時間とAPIコスト）
+
+処理を span() で囲むと、終了時に以下を記録した1行を
+data/internal/traces/<トレースID>.jsonl に追記する。
+
+- wall_seconds: 経過時間
+- cpu_seconds: このプロセスのCPU時間（他スレッドの分も含む）
+- child_cpu_seconds: 終了した子プロセス（ffmpegなど）のCPU時間
+- bytes_in / bytes_out: 読み込み・書き出したバイト数
+- api_calls / tokens_in / tokens_out / characters / images: API呼び出しの量
+- cost_usd: PRICING による推定コスト
+
+カウンタ（bytes_*, api_calls, tokens_*, characters, images, cost_usd）は終了時に親のspanに
+合算されるため、ステージのspanにはその中のシーンやAPI呼び出しの分も含まれる。
+
+使い方:
+    with tracing.span("tts.synthesize", kind="api", scene=3) as sp:
+        response = client.audio.speech.create(...)
+        tracing.record_tts(model, text)
+"""
+
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterator
+import json
+import os
+import threading
+import time
+import uuid
+
+from .utils import get_project_root
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# API料金（USD、推定用。料金改定時はここを更新）
+PRICING = {
+    "gemini": {
+        # 100万トークンあたり
+        "gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40},
+    },
+    "images": {
+        # 1枚あたり（品質_サイズ）
+        "dall-e-3": {
+            "standard_1024x1024": 0.040,
+            "standard_1024x1792": 0.080,
+            "standard_1792x1024": 0.080,
+            "hd_1024x1024": 0.080,
+            "hd_1024x1792": 0.120,
+            "hd_1792x1024": 0.120,
+        },
+    },
+    "tts": {
+        # 100万文字あたり
+        "tts-1": 15.0,
+        "tts-1-hd": 30.0,
+    },
+}
+
+COUNTERS = ("bytes_in", "bytes_out", "api_calls", "tokens_in", "tokens_out", "characters", "images", "cost_usd")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("tracing_current_span", default=None)
+_write_lock = threading.Lock()
+
+
+def get_traces_dir() -> Path:
+    """トレースの保存先"""
+    return get_project_root() / "data" / "internal" / "traces"
+
+
+def _child_cpu_seconds() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Span:
+    """
+    計測中の区間
+
+    Attributes:
+        name: 区間名（例: "render.video"）
+        kind: 種類（"job" / "stage" / "api" / "render" / "io"）
+        trace_id: トレースID
+        span_id: 区間ID
+        parent: 親の区間
+        attrs: 任意の属性（book, scene など）
+        counters: バイト数・API呼び出し数などのカウンタ
+    """
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:12]
+        self.parent = parent
+        self.attrs = attrs
+        self.counters = {counter: 0 for counter in COUNTERS}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._child_cpu_start = _child_cpu_seconds()
+
+    def add(self, **counters: float) -> None:
+        """カウンタを加算（例: sp.add(bytes_out=1024)、子のspanが別スレッドで終了してもよい）"""
+        for counter in counters:
+            if counter not in self.counters:
+                raise ValueError(f"不明なカウンタ: {counter}")
+        with self._lock:
+            for counter, value in counters.items():
+                self.counters[counter] += value or 0
+
+    def set(self, **attrs: Any) -> None:
+        """属性を設定"""
+        self.attrs.update(attrs)
+
+    def _finish(self, error: Optional[BaseException]) -> Dict[str, Any]:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(timespec='milliseconds'),
+            "wall_seconds": round(time.perf_counter() - self._wall_start, 4),
+            "cpu_seconds": round(time.process_time() - self._cpu_start, 4),
+            "child_cpu_seconds": round(_child_cpu_seconds() - self._child_cpu_start, 4),
+            **{counter: round(value, 6) if counter == "cost_usd" else value for counter, value in self.counters.items()},
+            "attrs": self.attrs,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+        }
+
+        if self.parent is not None:
+            self.parent.add(**self.counters)
+
+        return record
+
+
+def _write_record(record: Dict[str, Any]) -> None:
+    trace_file = get_traces_dir() / f"{record['trace_id']}.jsonl"
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _write_lock:
+        trace_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def new_trace_id(prefix: str = "trace") -> str:
+    """新しいトレースIDを作成"""
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", trace_id: Optional[str] = None, **attrs: Any) -> Iterator[Span]:
+    """
+    区間を計測
+
+    Args:
+        name: 区間名
+        kind: 種類（"job" / "stage" / "api" / "render" / "io"）
+        trace_id: トレースID（省略時は親のトレース。親がなければその日の "adhoc_<日付>"）
+        **attrs: 記録する属性（book, scene など）
+
+    Yields:
+        Span
+    """
+    parent = _current_span.get()
+    if trace_id is None:
+        trace_id = parent.trace_id if parent else f"adhoc_{datetime.now().strftime('%Y%m%d')}"
+    elif parent is not None and parent.trace_id != trace_id:
+        parent = None
+
+    current = Span(name, kind, trace_id, parent, attrs)
+    token = _current_span.set(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        try:
+            _write_record(current._finish(error))
+        except OSError as e:
+            print(f"⚠️ トレースの書き込みに失敗: {e}")
+
+
+def current_span() -> Optional[Span]:
+    """実行中の区間（なければNone）"""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """実行中のトレースID（なければNone）"""
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+def add(**counters: float) -> None:
+    """実行中の区間のカウンタを加算（区間の外では何もしない）"""
+    current = _current_span.get()
+    if current is not None:
+        current.add(**counters)
+
+
+def file_size(path) -> int:
+    """ファイルサイズ（存在しない場合は0）"""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+# ---------------------------------------------------------------------------
+# API呼び出しの記録
+# ---------------------------------------------------------------------------
+
+def record_gemini(response, model: str = "gemini-2.5-flash-lite", prompt: str = "") -> None:
+    """
+    Geminiの呼び出しを記録
+
+    Args:
+        response: generate_content() の戻り値（usage_metadata からトークン数を取得）
+        model: モデル名
+        prompt: プロンプト（送信バイト数の記録用）
+    """
+    usage = getattr(response, "usage_metadata", None)
+    tokens_in = getattr(usage, "prompt_token_count", 0) or 0
+    tokens_out = getattr(usage, "candidates_token_count", 0) or 0
+    try:
+        text = response.text or ""
+    except (ValueError, AttributeError):
+        text = ""
+
+    price = PRICING["gemini"].get(model, {"input": 0.0, "output": 0.0})
+    add(
+        api_calls=1,
+        tokens_in=tokens_in,
+        tokens_out=tokens_out,
+        bytes_out=len(prompt.encode('utf-8')),
+        bytes_in=len(text.encode('utf-8')),
+        cost_usd=(tokens_in * price["input"] + tokens_out * price["output"]) / 1_000_000
+    )
+
+
+def record_image(model: str, size: str, quality: str = "standard", prompt: str = "") -> None:
+    """
+    画像生成APIの呼び出しを記録
+
+    Args:
+        model: モデル名（例: "dall-e-3"）
+        size: 画像サイズ（例: "1024x1792"）
+        quality: 品質（"standard" / "hd"）
+        prompt: プロンプト
+    """
+    price = PRICING["images"].get(model, {}).get(f"{quality}_{size}", 0.0)
+    add(api_calls=1, images=1, bytes_out=len(prompt.encode('utf-8')), cost_usd=price)
+
+
+def record_tts(model: str, text: str) -> None:
+    """
+    音声合成APIの呼び出しを記録
+
+    Args:
+        model: TTSモデル（tts-1 / tts-1-hd）
+        text: 読み上げたテキスト
+    """
+    price = PRICING["tts"].get(model, 0.0)
+    add(
+        api_calls=1,
+        characters=len(text),
+        bytes_out=len(text.encode('utf-8')),
+        cost_usd=len(text) * price / 1_000_000
+    )
+
+
+# ---------------------------------------------------------------------------
+# 読み込み・集計
+# ---------------------------------------------------------------------------
+
+def read_trace(trace_id: str) -> List[Dict[str, Any]]:
+    """
+    トレースの全区間を読み込む（終了順）
+
+    Args:
+        trace_id: トレースID
+
+    Returns:
+        区間のリスト（存在しない場合は空リスト）
+    """
+    trace_file = get_traces_dir() / f"{trace_id}.jsonl"
+    if not trace_file.exists():
+        return []
+
+    spans = []
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 書き込み途中の行
+                continue
+    return spans
+
+
+def list_traces(limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    保存済みのトレース一覧（新しい順）
+
+    Returns:
+        [{'trace_id', 'updated_at', 'size'}, ...]
+    """
+    traces_dir = get_traces_dir()
+    if not traces_dir.exists():
+        return []
+
+    files = sorted(traces_dir.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    return [
+        {
+            "trace_id": path.stem,
+            "updated_at": datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds'),
+            "size": path.stat().st_size,
+        }
+        for path in files
+    ]
+
+
+def summarize_trace(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    区間名ごとに集計した表
+
+    Args:
+        spans: read_trace() の戻り値
+
+    Returns:
+        [{'name', 'kind', 'count', 'wall_seconds', 'cpu_seconds', 'child_cpu_seconds',
+          'api_calls', 'tokens_in', 'tokens_out', 'characters', 'images', 'bytes_in', 'bytes_out',
+          'cost_usd', 'errors'}, ...]（最初に開始した順）
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    for record in sorted(spans, key=lambda s: (s["started_at"], -s["wall_seconds"])):
+        row = rows.setdefault(record["name"], {
+            "name": record["name"],
+            "kind": record["kind"],
+            "count": 0,
+            "wall_seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "child_cpu_seconds": 0.0,
+            **{counter: 0 for counter in COUNTERS},
+            "errors": 0,
+        })
+        row["count"] += 1
+        for field in ("wall_seconds", "cpu_seconds", "child_cpu_seconds", *COUNTERS):
+            row[field] += record.get(field, 0) or 0
+        if record.get("error"):
+            row["errors"] += 1
+
+    for row in rows.values():
+        for field in ("wall_seconds", "cpu_seconds", "child_cpu_seconds"):
+            row[field] = round(row[field], 2)
+        row["cost_usd"] = round(row["cost_usd"], 4)
+
+    return list(rows.values())
@@ -6,11 +6,10 @@ OpenAI TTSを直接使用してナレーション音声を生成
 """
 
 from pathlib import Path
-from typing import Dict, Any, List
-import openai
-import os
+from typing import Dict, Any, List, Optional, Callable
 from dotenv import load_dotenv
-from .utils import get_project_root
+from .workspace import Workspace, resolve_workspace
+from . import api_clients, tracing
 
 load_dotenv()
 
@@ -20,7 +19,9 @@ def synthesize_narration_for_scenes(
     book_name: str,
     voice: str = "alloy",
     speed: float = 1.0,
-    model: str = "tts-1"
+    model: str = "tts-1",
+    workspace: Optional[Workspace] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None
 ) -> Dict[int, Path]:
     """
     各シーンのナレーションから音声を生成（OpenAI TTS）
@@ -31,41 +32,44 @@ def synthesize_narration_for_scenes(
         voice: 音声タイプ (alloy, echo, fable, onyx, nova, shimmer)
         speed: 音声速度 (0.25 - 4.0, デフォルト 1.0)
         model: TTSモデル (tts-1 or tts-1-hd)
+        workspace: 保存先ワークスペース（Noneの場合はdata/output/）
+        progress_callback: 進捗通知 (メッセージ, 0.0～1.0) を受け取る関数
 
     Returns:
         {シーン番号: 音声ファイルパス} の辞書
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY環境変数が設定されていません")
+    client = api_clients.get_openai_client()
 
-    client = openai.OpenAI(api_key=api_key)
-
-    project_root = get_project_root()
-    output_dir = project_root / "data" / "output" / "audio" / book_name
-    output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = resolve_workspace(workspace).output_subdir("audio", book_name)
 
     scene_audio = {}
 
-    for scene in scenes:
+    for idx, scene in enumerate(scenes):
         scene_num = scene['scene_number']
         narration = scene['narration']
 
         print(f"  🎤 シーン{scene_num}のナレーション生成中... (速度: {speed}x)")
-
-        # OpenAI TTSで音声生成
-        response = client.audio.speech.create(
-            model=model,
-            voice=voice,
-            input=narration,
-            speed=speed
-        )
-
-        # 音声ファイルを保存
-        audio_filename = f"scene_{scene_num:02d}_narration.mp3"
-        audio_path = output_dir / audio_filename
-
-        response.stream_to_file(audio_path)
+        if progress_callback:
+            progress_callback(f"シーン{scene_num}のナレーション生成中", idx / len(scenes))
+
+        with tracing.span("tts.synthesize", kind="api", book=book_name, scene=scene_num, voice=voice, model=model) as sp:
+            # OpenAI TTSで音声生成
+            response = api_clients.call(
+                "openai.tts",
+                client.audio.speech.create,
+                model=model,
+                voice=voice,
+                input=narration,
+                speed=speed
+            )
+            tracing.record_tts(model, narration)
+
+            # 音声ファイルを保存
+            audio_filename = f"scene_{scene_num:02d}_narration.mp3"
+            audio_path = output_dir / audio_filename
+
+            response.stream_to_file(audio_path)
+            sp.add(bytes_in=tracing.file_size(audio_path))
 
         scene_audio[scene_num] = audio_path
         print(f"  ✓ シーン{scene_num}: {audio_path}")
@@ -77,7 +81,8 @@ def synthesize_single_narration(
     text: str,
     book_name: str,
     filename: str = "narration.mp3",
-    voice: str = "alloy"
+    voice: str = "alloy",
+    workspace: Optional[Workspace] = None
 ) -> Path:
     """
     単一のテキストから音声を生成
@@ -87,32 +92,32 @@ def synthesize_single_narration(
         book_name: 書籍名
         filename: 出力ファイル名
         voice: 音声タイプ
+        workspace: 保存先ワークスペース（Noneの場合はdata/output/）
 
     Returns:
         生成された音声ファイルのパス
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY環境変数が設定されていません")
+    client = api_clients.get_openai_client()
 
-    client = openai.OpenAI(api_key=api_key)
-
-    project_root = get_project_root()
-    output_dir = project_root / "data" / "output" / "audio" / book_name
-    output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = resolve_workspace(workspace).output_subdir("audio", book_name)
 
     print(f"  🎤 ナレーション生成中...")
 
-    # OpenAI TTSで音声生成
-    response = client.audio.speech.create(
-        model="tts-1",
-        voice=voice,
-        input=text
-    )
+    with tracing.span("tts.synthesize", kind="api", book=book_name, voice=voice, model="tts-1") as sp:
+        # OpenAI TTSで音声生成
+        response = api_clients.call(
+            "openai.tts",
+            client.audio.speech.create,
+            model="tts-1",
+            voice=voice,
+            input=text
+        )
+        tracing.record_tts("tts-1", text)
 
-    # 音声ファイルを保存
-    audio_path = output_dir / filename
-    response.stream_to_file(audio_path)
+        # 音声ファイルを保存
+        audio_path = output_dir / filename
+        response.stream_to_file(audio_path)
+        sp.add(bytes_in=tracing.file_size(audio_path))
 
     print(f"  ✓ 音声生成完了: {audio_path}")
 
@@ -7,6 +7,8 @@ import subprocess
 from pathlib import Path
 from typing import Tuple, Optional
 import json
+import os
+import tempfile
 
 
 def run_script(script_path: str, *args, cwd: Optional[Path] = None) -> Tuple[bool, str]:
@@ -56,11 +58,33 @@ def load_json(file_path: Path) -> dict:
         return json.load(f)
 
 
-def save_json(file_path: Path, data: dict, indent: int = 2):
-    """JSONファイルに保存"""
+def atomic_write_text(file_path: Path, text: str):
+    """
+    テキストファイルをアトミックに書き込む
+
+    同じディレクトリの一時ファイルに書き込んでから置き換えるため、
+    書き込み途中でプロセスが落ちても既存ファイルが壊れない。
+    """
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=indent)
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def save_json(file_path: Path, data: dict, indent: Optional[int] = 2):
+    """JSONファイルに保存（アトミック書き込み、indent=Noneでコンパクト形式）"""
+    if indent is None:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=indent)
+    atomic_write_text(file_path, text)
 
 
 def ensure_dir(path: Path) -> Path:
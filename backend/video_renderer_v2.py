@@ -7,21 +7,31 @@ v1スクリプトには依存しない
 """
 
 from pathlib import Path
-from typing import Dict, Any, List
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable
+import hashlib
 import json
+import os
+import shutil
 import subprocess
+import time
 
-# moviepy 2.x
-from moviepy import (
-    ImageClip, AudioFileClip, CompositeVideoClip,
-    concatenate_videoclips, TextClip, CompositeAudioClip,
-    VideoFileClip
-)
-from moviepy import vfx
-
-from . import subtitle_generator
+from . import artifact_dag, subtitle_generator
+from .workspace import Workspace, resolve_workspace
+from . import tracing
 import random
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 字幕なしマスター動画のキャッシュ
+MASTER_CACHE_VERSION = 2
+MAX_CACHED_MASTERS = 3
+# 使用後この秒数が経っていないマスター動画は削除しない（他のジョブがBGMのミックスなどに使っている間に消さない）
+MASTER_PRUNE_GRACE_SECONDS = 600
+
 
 def get_project_root() -> Path:
     """プロジェクトルートを取得"""
@@ -40,6 +50,8 @@ def apply_ken_burns_effect(clip, effect_type: str = "zoom_in", intensity: float
     Returns:
         エフェクト適用後のクリップ
     """
+    from moviepy import CompositeVideoClip
+
     if effect_type == "random":
         effect_type = random.choice(["zoom_in", "zoom_out", "pan_left", "pan_right"])
 
@@ -76,49 +88,117 @@ def apply_ken_burns_effect(clip, effect_type: str = "zoom_in", intensity: float
     return clip
 
 
-def render_video(
-    storyboard_data: Dict[str, Any],
-    subtitle_type: str = "normal",
-    subtitle_colors: tuple = ("FFFFFF", "00FFFF"),
-    use_ken_burns: bool = False,
-    ken_burns_type: str = "random",
-    ken_burns_intensity: float = 1.15,
-    transition_type: str = "クロスフェード",
-    transition_duration: float = 0.8
-) -> Dict[str, Any]:
+def compute_master_key(
+    scenes: List[Dict[str, Any]],
+    aspect_ratio: str,
+    use_ken_burns: bool,
+    ken_burns_type: str,
+    ken_burns_intensity: float,
+    transition_type: str,
+    transition_duration: float,
+    bgm_file: Optional[str] = None,
+    bgm_volume: float = 0.15
+) -> str:
     """
-    ストーリーボードから動画を作成（字幕付き）
+    字幕なしマスター動画のキャッシュキーを計算
+
+    画像・音声ファイル（パス・サイズ・更新日時）と映像設定、BGM（ファイル内容のハッシュ・音量）から求める。
+    字幕設定は含まないため、字幕だけを変更した場合は同じキーになる。
 
     Args:
-        storyboard_data: シーン情報
-            {
-                'book_name': str,
-                'total_scenes': int,
-                'scenes': [
-                    {
-                        'scene_number': int,
-                        'narration': str,
-                        'image_file': str,
-                        'audio_file': str,
-                        'duration': float
-                    }
-                ]
-            }
-        subtitle_type: 字幕タイプ ("karaoke" or "normal")
+        bgm_file: マスター動画にミックスするBGMファイル（Noneの場合はBGMなし）
+        bgm_volume: BGM音量
 
     Returns:
-        生成された動画情報
+        キャッシュキー（16進文字列）
     """
-    project_root = get_project_root()
-    book_name = storyboard_data['book_name']
-    scenes = storyboard_data['scenes']
+    def file_signature(path_str: str) -> list:
+        path = Path(path_str)
+        if not path.exists():
+            raise FileNotFoundError(f"素材ファイルが見つかりません: {path}")
+        stat = path.stat()
+        return [str(path.resolve()), stat.st_size, stat.st_mtime_ns]
+
+    key_source = {
+        "version": MASTER_CACHE_VERSION,
+        "scenes": [
+            [scene['scene_number'], file_signature(scene['image_file']), file_signature(scene['audio_file'])]
+            for scene in scenes
+        ],
+        "aspect_ratio": aspect_ratio,
+        "ken_burns": [use_ken_burns, ken_burns_type, ken_burns_intensity] if use_ken_burns else None,
+        "transition": [transition_type, transition_duration],
+        "bgm": [artifact_dag.file_digest(bgm_file), bgm_volume] if bgm_file else None,
+    }
 
-    print(f"🎬 動画生成開始: {book_name}")
-    print(f"   シーン数: {len(scenes)}")
+    serialized = json.dumps(key_source, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:24]
 
-    # 出力ディレクトリ
-    output_dir = project_root / "data" / "output" / "videos" / book_name
-    output_dir.mkdir(parents=True, exist_ok=True)
+
+@contextmanager
+def _master_cache_lock(master_dir: Path):
+    """マスター動画のキャッシュの確認・出力へのリンク・削除をプロセス間で排他するロック"""
+    master_dir.mkdir(parents=True, exist_ok=True)
+    with open(master_dir / ".lock", 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _prune_masters(master_dir: Path, keep: int = MAX_CACHED_MASTERS) -> None:
+    """
+    古いマスター動画を削除（最近使用したものをkeep個残す。_master_cache_lock を保持した状態で呼ぶ）
+
+    使用後 MASTER_PRUNE_GRACE_SECONDS 秒以内のものは残す。他のプロセスが先に削除したファイルは無視する。
+    """
+    masters = []
+    for path in master_dir.glob("*.mp4"):
+        if path.name.endswith(".tmp.mp4"):
+            continue
+        try:
+            masters.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    masters.sort(reverse=True)
+
+    cutoff = time.time() - MASTER_PRUNE_GRACE_SECONDS
+    for mtime, old_master in masters[keep:]:
+        if mtime < cutoff:
+            old_master.unlink(missing_ok=True)
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """dstをsrcのハードリンクにする（できない場合はコピー）"""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _render_master(
+    scenes: List[Dict[str, Any]],
+    master_file: Path,
+    use_ken_burns: bool,
+    ken_burns_type: str,
+    ken_burns_intensity: float,
+    transition_type: str,
+    transition_duration: float,
+    workspace: Workspace
+) -> None:
+    """
+    シーン画像と音声から字幕なし動画を書き出す
+
+    Args:
+        scenes: シーン情報のリスト
+        master_file: 出力先（字幕なしマスター動画）
+        workspace: 一時ファイルの置き場所
+    """
+    from moviepy import ImageClip, AudioFileClip, CompositeVideoClip, concatenate_videoclips, vfx
 
     # 各シーンのクリップを作成
     clips = []
@@ -235,28 +315,191 @@ def render_video(
         print("   全シーンを連結中（カット）...")
         final_clip = concatenate_videoclips(clips, method="compose")
 
-    # 出力ファイル名
-    output_file = output_dir / f"{book_name}_promotional_video.mp4"
+    # 書き出し途中のファイルがキャッシュとして使われないよう、一時ファイルに書いてから置き換える
+    tmp_file = master_file.parent / f"{master_file.stem}.{os.getpid()}.tmp.mp4"
+    temp_audio_file = workspace.temp_file(suffix=".m4a", prefix="temp-audio-")
 
     # 動画を書き出し
-    print(f"   動画を書き出し中: {output_file.name}")
-    final_clip.write_videofile(
-        str(output_file),
-        fps=24,
-        codec='libx264',
-        audio_codec='aac',
-        temp_audiofile='temp-audio.m4a',
-        remove_temp=True,
-        threads=4,
-        preset='medium'
-    )
+    print(f"   動画を書き出し中: {master_file.name}")
+    with tracing.span("moviepy.encode_master", kind="render", scenes=len(scenes), transition=transition_type,
+                      ken_burns=use_ken_burns) as sp:
+        final_clip.write_videofile(
+            str(tmp_file),
+            fps=24,
+            codec='libx264',
+            audio_codec='aac',
+            temp_audiofile=str(temp_audio_file),
+            remove_temp=True,
+            threads=4,
+            preset='medium'
+        )
+        sp.add(
+            bytes_in=sum(tracing.file_size(s['image_file']) + tracing.file_size(s['audio_file']) for s in scenes),
+            bytes_out=tracing.file_size(tmp_file)
+        )
 
     # クリップを解放
     final_clip.close()
     for clip in clips:
         clip.close()
 
-    print(f"✅ 動画生成完了（字幕なし): {output_file}")
+    os.replace(tmp_file, master_file)
+
+    print(f"✅ 動画生成完了（字幕なし): {master_file}")
+
+
+def _mix_bgm_into_master(source_file: Path, master_file: Path, bgm_file: Path, volume: float) -> None:
+    """
+    字幕なし動画のナレーションにBGMをミックスしてマスター動画を書き出す（映像は再エンコードしない）
+
+    Args:
+        source_file: BGMなしのマスター動画
+        master_file: 出力先（BGM付きのマスター動画）
+        bgm_file: BGMファイル（動画より短い場合はループ）
+        volume: BGM音量 (0.0 - 1.0)
+    """
+    if not bgm_file.exists():
+        raise FileNotFoundError(f"BGMファイルが見つかりません: {bgm_file}")
+
+    print(f"🎵 BGMをミックス中: {bgm_file.name}")
+    tmp_file = master_file.parent / f"{master_file.stem}.{os.getpid()}.tmp.mp4"
+    ffmpeg_cmd = [
+        'ffmpeg', '-v', 'error',
+        '-i', str(source_file),
+        '-stream_loop', '-1', '-i', str(bgm_file),
+        '-filter_complex',
+        f"[1:a]volume={volume}[bgm];[0:a][bgm]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[aout]",
+        '-map', '0:v', '-map', '[aout]',
+        '-c:v', 'copy',
+        '-c:a', 'aac',
+        '-y',
+        str(tmp_file)
+    ]
+    with tracing.span("ffmpeg.mix_bgm", kind="render") as sp:
+        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        sp.add(
+            bytes_in=tracing.file_size(source_file) + tracing.file_size(bgm_file),
+            bytes_out=tracing.file_size(tmp_file)
+        )
+
+    if result.returncode != 0:
+        tmp_file.unlink(missing_ok=True)
+        raise RuntimeError(f"BGMのミックスに失敗しました: {result.stderr[:500]}")
+
+    os.replace(tmp_file, master_file)
+    print(f"✅ BGMミックス完了: {master_file}")
+
+
+def render_video(
+    storyboard_data: Dict[str, Any],
+    subtitle_type: str = "normal",
+    subtitle_colors: tuple = ("FFFFFF", "00FFFF"),
+    use_ken_burns: bool = False,
+    ken_burns_type: str = "random",
+    ken_burns_intensity: float = 1.15,
+    transition_type: str = "クロスフェード",
+    transition_duration: float = 0.8,
+    subtitle_output: str = "burn",
+    soft_container: str = "mp4",
+    bgm: Optional[Dict[str, Any]] = None,
+    workspace: Optional[Workspace] = None
+) -> Dict[str, Any]:
+    """
+    ストーリーボードから動画を作成（BGM・字幕付き）
+
+    BGMは字幕なしマスター動画にミックスしてキャッシュし、字幕は最後に1回だけ
+    焼き込む・多重化する（字幕だけを変更した場合は動画・BGMの書き出しをしない）。
+
+    Args:
+        storyboard_data: シーン情報
+            {
+                'book_name': str,
+                'total_scenes': int,
+                'scenes': [
+                    {
+                        'scene_number': int,
+                        'narration': str,
+                        'image_file': str,
+                        'audio_file': str,
+                        'duration': float
+                    }
+                ]
+            }
+        subtitle_type: 字幕タイプ ("karaoke" or "normal")
+        subtitle_output: 字幕の出力方法
+            "burn"（焼き込み）, "soft"（字幕ストリームとして多重化）, "sidecar"（字幕ファイルを別出力）
+        soft_container: subtitle_output="soft" の場合のコンテナ ("mp4" or "mkv")
+        bgm: BGM設定 {'file': BGMファイルのパス, 'volume': 音量}（Noneの場合はBGMなし）
+        workspace: 出力先ワークスペース（Noneの場合はdata/output/）
+
+    Returns:
+        生成された動画情報
+    """
+    workspace = resolve_workspace(workspace)
+    book_name = storyboard_data['book_name']
+    scenes = storyboard_data['scenes']
+
+    print(f"🎬 動画生成開始: {book_name}")
+    print(f"   シーン数: {len(scenes)}")
+
+    # 出力ディレクトリ
+    output_dir = workspace.output_subdir("videos", book_name)
+
+    # 字幕なしマスター動画（素材・映像設定・BGMが同じならキャッシュを再利用）
+    # BGMなしのマスターも残しておき、BGMだけを変更した場合は映像を書き出さずにミックスし直す
+    video_settings = (
+        scenes,
+        storyboard_data.get('aspect_ratio', '9:16'),
+        use_ken_burns,
+        ken_burns_type,
+        ken_burns_intensity,
+        transition_type,
+        transition_duration
+    )
+    base_key = compute_master_key(*video_settings)
+    master_key = compute_master_key(*video_settings, bgm['file'], bgm.get('volume', 0.15)) if bgm else base_key
+    master_dir = output_dir / "masters"
+    master_dir.mkdir(parents=True, exist_ok=True)
+    base_file = master_dir / f"{base_key}.mp4"
+    master_file = master_dir / f"{master_key}.mp4"
+
+    # 出力ファイル名
+    output_file = output_dir / f"{book_name}_promotional_video.mp4"
+
+    # キャッシュの確認と出力へのリンクは、他のジョブの _prune_masters と排他する
+    # （使用時刻を更新したマスター動画は MASTER_PRUNE_GRACE_SECONDS の間削除されない）
+    with _master_cache_lock(master_dir):
+        master_cached = master_file.exists()
+        base_cached = not master_cached and base_file.exists()
+        if master_cached:
+            master_file.touch()
+            _link_or_copy(master_file, output_file)
+        elif base_cached:
+            base_file.touch()
+
+    if master_cached:
+        print(f"   ♻️ キャッシュ済みの字幕なし動画を再利用: {master_file.name}")
+    else:
+        if base_cached:
+            print(f"   ♻️ キャッシュ済みのBGMなし動画を再利用: {base_file.name}")
+        else:
+            _render_master(
+                scenes,
+                base_file,
+                use_ken_burns,
+                ken_burns_type,
+                ken_burns_intensity,
+                transition_type,
+                transition_duration,
+                workspace
+            )
+        if bgm:
+            _mix_bgm_into_master(base_file, master_file, Path(bgm['file']), bgm.get('volume', 0.15))
+        with _master_cache_lock(master_dir):
+            _link_or_copy(master_file, output_file)
+            _prune_masters(master_dir)
+
+    print(f"✅ 字幕なし動画を出力: {output_file}")
 
     # 字幕を追加
     if subtitle_type in ["normal", "karaoke"]:
@@ -265,17 +508,30 @@ def render_video(
             scenes,
             subtitle_type,
             storyboard_data.get('aspect_ratio', '9:16'),
-            subtitle_colors
+            subtitle_colors,
+            output_mode=subtitle_output,
+            soft_container=soft_container
         )
+        subtitle_files = [
+            str(path) for path in get_subtitle_paths(output_file).values() if path.exists()
+        ] if subtitle_output != "burn" else []
     else:
         final_output_file = output_file
+        subtitle_files = []
+
+    from moviepy import AudioFileClip
 
     # 動画情報を返す
     video_data = {
         "book_name": book_name,
         "video_file": str(final_output_file),
         "subtitle_type": subtitle_type,
-        "has_bgm": False,
+        "subtitle_colors": list(subtitle_colors),
+        "master_key": master_key,
+        "subtitle_output": subtitle_output if subtitle_type in ["normal", "karaoke"] else None,
+        "subtitle_files": subtitle_files,
+        "soft_container": soft_container,
+        "has_bgm": bool(bgm),
         "total_scenes": len(scenes),
         "duration": sum([AudioFileClip(str(Path(s['audio_file']))).duration for s in scenes])
     }
@@ -283,12 +539,75 @@ def render_video(
     return video_data
 
 
+def get_subtitle_paths(video_file: Path) -> Dict[str, Path]:
+    """
+    動画ファイルに対応する字幕ファイルのパスを取得
+
+    Args:
+        video_file: 字幕なし動画のパス
+
+    Returns:
+        {"ass": ASS字幕のパス, "srt": SRT字幕のパス}
+    """
+    return {
+        "ass": video_file.parent / f"{video_file.stem}_subtitles.ass",
+        "srt": video_file.parent / f"{video_file.stem}_subtitles.srt",
+    }
+
+
+def mux_subtitles(video_file: Path, subtitle_file: Path, output_file: Path) -> Path:
+    """
+    字幕を字幕ストリームとして動画に多重化（再エンコードなし）
+
+    出力がMP4の場合はmov_text、MKVの場合はASSのまま格納する。
+
+    Args:
+        video_file: 入力動画ファイル
+        subtitle_file: 字幕ファイル（ASS or SRT）
+        output_file: 出力動画ファイル（.mp4 or .mkv）
+
+    Returns:
+        字幕付き動画のパス
+    """
+    subtitle_codec = 'ass' if output_file.suffix == '.mkv' else 'mov_text'
+
+    ffmpeg_cmd = [
+        'ffmpeg',
+        '-i', str(video_file),
+        '-i', str(subtitle_file),
+        '-map', '0:v',
+        '-map', '0:a?',
+        '-map', '1:0',
+        '-c:v', 'copy',
+        '-c:a', 'copy',
+        '-c:s', subtitle_codec,
+        '-metadata:s:s:0', 'language=jpn',
+        '-y',
+        str(output_file)
+    ]
+
+    with tracing.span("ffmpeg.mux_subtitles", kind="render", container=output_file.suffix.lstrip('.')) as sp:
+        result = subprocess.run(
+            ffmpeg_cmd,
+            capture_output=True,
+            text=True
+        )
+        sp.add(bytes_in=tracing.file_size(video_file), bytes_out=tracing.file_size(output_file))
+
+    if result.returncode != 0:
+        raise RuntimeError(f"字幕の多重化に失敗しました: {result.stderr[-200:]}")
+
+    return output_file
+
+
 def add_subtitles_to_video(
     video_file: Path,
     scenes: List[Dict[str, Any]],
     subtitle_type: str,
     aspect_ratio: str = "9:16",
-    subtitle_colors: tuple = ("FFFFFF", "00FFFF")
+    subtitle_colors: tuple = ("FFFFFF", "00FFFF"),
+    output_mode: str = "burn",
+    soft_container: str = "mp4"
 ) -> Path:
     """
     動画にASS字幕を追加
@@ -298,14 +617,24 @@ def add_subtitles_to_video(
         scenes: シーン情報のリスト
         subtitle_type: 字幕タイプ ("karaoke" or "normal")
         aspect_ratio: アスペクト比
+        output_mode: "burn"（焼き込み・再エンコード）, "soft"（字幕ストリームとして多重化）,
+            "sidecar"（字幕ファイルのみ出力し、動画はそのまま）
+        soft_container: output_mode="soft" の場合のコンテナ
+            "mp4"（mov_text、スタイルなし）または "mkv"（ASSのまま、カラオケ表示可）
 
     Returns:
-        字幕付き動画のパス
+        字幕付き動画のパス（sidecarの場合は入力動画のパス）
     """
-    print(f"📝 字幕を追加中（{subtitle_type}）...")
+    if output_mode not in ("burn", "soft", "sidecar"):
+        raise ValueError(f"不明な字幕出力方法: {output_mode}")
+    if soft_container not in ("mp4", "mkv"):
+        raise ValueError(f"不明なコンテナ: {soft_container}")
+
+    print(f"📝 字幕を追加中（{subtitle_type} / {output_mode}）...")
 
     # ASS字幕ファイルを生成
-    subtitle_file = video_file.parent / f"{video_file.stem}_subtitles.ass"
+    subtitle_paths = get_subtitle_paths(video_file)
+    subtitle_file = subtitle_paths["ass"]
 
     if subtitle_type == "karaoke":
         subtitle_generator.create_karaoke_subtitle_file(
@@ -325,6 +654,33 @@ def add_subtitles_to_video(
 
     print(f"   字幕ファイル生成完了: {subtitle_file.name}")
 
+    # プレーンテキスト字幕（MP4のmov_text・別ファイル出力用）
+    if output_mode == "sidecar" or (output_mode == "soft" and soft_container == "mp4"):
+        subtitle_generator.create_srt_subtitle_file(
+            scenes,
+            subtitle_paths["srt"],
+            max_chars=15 if subtitle_type == "karaoke" else 20
+        )
+        print(f"   字幕ファイル生成完了: {subtitle_paths['srt'].name}")
+
+    if output_mode == "sidecar":
+        print("✅ 字幕ファイルを別途出力しました（動画は字幕なし）")
+        return video_file
+
+    if output_mode == "soft":
+        output_file = video_file.parent / f"{video_file.stem}_with_subtitles.{soft_container}"
+        soft_source = subtitle_file if soft_container == "mkv" else subtitle_paths["srt"]
+
+        print("   字幕ストリームを多重化中（再エンコードなし）...")
+        try:
+            mux_subtitles(video_file, soft_source, output_file)
+        except RuntimeError as e:
+            print(f"⚠️ 字幕追加エラー（字幕なしで続行）: {str(e)[:200]}")
+            return video_file
+
+        print(f"✅ 字幕追加完了: {output_file.name}")
+        return output_file
+
     # ffmpegで字幕を焼き込み
     output_file = video_file.parent / f"{video_file.stem}_with_subtitles.mp4"
 
@@ -339,11 +695,13 @@ def add_subtitles_to_video(
     ]
 
     print(f"   字幕を動画に焼き込み中...")
-    result = subprocess.run(
-        ffmpeg_cmd,
-        capture_output=True,
-        text=True
-    )
+    with tracing.span("ffmpeg.burn_subtitles", kind="render", subtitle_type=subtitle_type) as sp:
+        result = subprocess.run(
+            ffmpeg_cmd,
+            capture_output=True,
+            text=True
+        )
+        sp.add(bytes_in=tracing.file_size(video_file), bytes_out=tracing.file_size(output_file))
 
     if result.returncode != 0:
         print(f"⚠️ 字幕追加エラー（字幕なしで続行）: {result.stderr[:200]}")
@@ -357,7 +715,8 @@ def add_subtitles_to_video(
 def add_bgm_to_video(
     video_file: Path,
     bgm_file: Path,
-    volume: float = 0.15
+    volume: float = 0.15,
+    workspace: Optional[Workspace] = None
 ) -> Path:
     """
     動画にBGMを追加
@@ -366,6 +725,7 @@ def add_bgm_to_video(
         video_file: 動画ファイルのパス
         bgm_file: BGMファイルのパス
         volume: BGM音量 (0.0 - 1.0)
+        workspace: 一時ファイルの置き場所（Noneの場合はdata/tmp/）
 
     Returns:
         BGM付き動画のパス
@@ -377,6 +737,8 @@ def add_bgm_to_video(
 
     print(f"🎵 BGMを追加中: {bgm_file.name}")
 
+    from moviepy import VideoFileClip, AudioFileClip, CompositeAudioClip, afx
+
     # 動画を読み込み
     video = VideoFileClip(str(video_file))
 
@@ -384,7 +746,6 @@ def add_bgm_to_video(
     bgm = AudioFileClip(str(bgm_file))
 
     # 音量調整
-    from moviepy import afx
     bgm = bgm.with_effects([afx.MultiplyVolume(volume)])
 
     # BGMをループ（動画の長さに合わせる）
@@ -407,18 +768,26 @@ def add_bgm_to_video(
     # 出力ファイル名
     output_file = video_file.parent / f"{video_file.stem}_with_bgm.mp4"
 
+    # 一時音声ファイルは並行処理と衝突しないよう一意な名前にする
+    temp_audio_file = resolve_workspace(workspace).temp_file(suffix=".m4a", prefix="temp-audio-bgm-")
+
     # 動画を書き出し
     print(f"   BGM付き動画を書き出し中: {output_file.name}")
-    video.write_videofile(
-        str(output_file),
-        fps=24,
-        codec='libx264',
-        audio_codec='aac',
-        temp_audiofile='temp-audio-bgm.m4a',
-        remove_temp=True,
-        threads=4,
-        preset='medium'
-    )
+    with tracing.span("moviepy.encode_bgm", kind="render") as sp:
+        video.write_videofile(
+            str(output_file),
+            fps=24,
+            codec='libx264',
+            audio_codec='aac',
+            temp_audiofile=str(temp_audio_file),
+            remove_temp=True,
+            threads=4,
+            preset='medium'
+        )
+        sp.add(
+            bytes_in=tracing.file_size(video_file) + tracing.file_size(bgm_file),
+            bytes_out=tracing.file_size(output_file)
+        )
 
     # クリップを解放
     video.close()
@@ -427,3 +796,35 @@ def add_bgm_to_video(
     print(f"✅ BGM追加完了: {output_file}")
 
     return output_file
+
+
+def render_final_video(
+    storyboard_data: Dict[str, Any],
+    render_settings: Optional[Dict[str, Any]] = None,
+    bgm: Optional[Dict[str, Any]] = None,
+    workspace: Optional[Workspace] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None
+) -> Dict[str, Any]:
+    """
+    最終動画を作成（BGM付きの字幕なしマスター動画 → 字幕の焼き込み・多重化）
+
+    BGMはマスター動画にミックスしてキャッシュするため、字幕だけを変更した場合は
+    字幕の生成と、キャッシュ済みのマスター動画への焼き込み（または多重化）1回だけになる。
+
+    Args:
+        storyboard_data: シーン情報（render_video() と同じ形式）
+        render_settings: render_video() に渡す設定（subtitle_type, use_ken_burns など）
+        bgm: BGM設定 {'file': BGMファイルのパス, 'volume': 音量}（Noneの場合はBGMなし）
+        workspace: 出力先ワークスペース（Noneの場合はdata/output/）
+        progress_callback: 進捗通知 (メッセージ, 0.0～1.0) を受け取る関数
+
+    Returns:
+        生成された動画情報（render_video() の戻り値）
+    """
+    render_settings = render_settings or {}
+
+    if progress_callback:
+        progress_callback("動画を生成中", 0.0)
+    with tracing.span("render.video", book=storyboard_data.get('book_name'),
+                      subtitle_output=render_settings.get('subtitle_output', 'burn'), bgm=bool(bgm)):
+        return render_video(storyboard_data, bgm=bgm, workspace=workspace, **render_settings)
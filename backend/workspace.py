@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+ワークスペース管理モジュール
+
+処理ごとの作業ディレクトリ（中間ファイル・出力・一時ファイル）をまとめて扱う。
+
+- 既定のワークスペース: 従来どおり data/raw, data/internal, data/output を使用
+- ジョブのワークスペース: data/jobs/<ジョブID>/ 以下に同じ構成を作成
+
+ジョブごとにワークスペースを分けることで、複数の書籍を同じホストで並行処理しても
+basic_info.json や scenes.json、動画書き出し時の一時音声ファイルが衝突しない。
+"""
+
+from pathlib import Path
+from typing import Optional
+import re
+import uuid
+from .utils import get_project_root
+
+
+class Workspace:
+    """
+    1つの処理（ジョブ）が使う作業ディレクトリ
+
+    Attributes:
+        job_id: ジョブID（既定のワークスペースはNone）
+        root: ワークスペースのルート（既定は data/）
+        raw_dir: アップロードされたEPUBと抽出テキスト
+        internal_dir: 中間データ（basic_info.json, scenes.json など）
+        output_dir: 生成物（画像・音声・動画）
+        temp_dir: 一時ファイル
+    """
+
+    def __init__(self, root: Path, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.root = Path(root)
+        self.raw_dir = self.root / "raw"
+        self.internal_dir = self.root / "internal"
+        self.output_dir = self.root / "output"
+        self.temp_dir = self.root / "tmp"
+
+    def __repr__(self) -> str:
+        return f"Workspace(job_id={self.job_id!r}, root={str(self.root)!r})"
+
+    def internal_file(self, name: str) -> Path:
+        """
+        中間データファイルのパス（ディレクトリは作成済み）
+
+        Args:
+            name: ファイル名（例: "scenes.json"）
+
+        Returns:
+            ファイルパス
+        """
+        self.internal_dir.mkdir(parents=True, exist_ok=True)
+        return self.internal_dir / name
+
+    def output_subdir(self, *parts: str) -> Path:
+        """
+        出力先サブディレクトリ（例: output_subdir("images", book_name)）
+
+        Returns:
+            作成済みのディレクトリパス
+        """
+        path = self.output_dir.joinpath(*parts)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def temp_file(self, suffix: str = "", prefix: str = "tmp-") -> Path:
+        """
+        他の処理と衝突しない一時ファイルのパスを払い出す
+
+        Args:
+            suffix: 拡張子（例: ".m4a"）
+            prefix: ファイル名の接頭辞
+
+        Returns:
+            一時ファイルのパス（ファイル自体は作成しない）
+        """
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        return self.temp_dir / f"{prefix}{uuid.uuid4().hex}{suffix}"
+
+
+def _validate_job_id(job_id: str) -> str:
+    """ジョブIDをディレクトリ名として安全な形か確認"""
+    if not re.fullmatch(r"[0-9A-Za-z_\-\.]+", job_id) or job_id in (".", ".."):
+        raise ValueError(f"ジョブIDに使用できない文字が含まれています: {job_id!r}")
+    return job_id
+
+
+def get_jobs_dir() -> Path:
+    """ジョブのワークスペースを置くディレクトリ"""
+    return get_project_root() / "data" / "jobs"
+
+
+def get_workspace(job_id: Optional[str] = None) -> Workspace:
+    """
+    ワークスペースを取得
+
+    Args:
+        job_id: ジョブID（Noneの場合は従来のdata/直下を使う既定のワークスペース）
+
+    Returns:
+        Workspace
+    """
+    if job_id is None:
+        return Workspace(get_project_root() / "data")
+
+    return Workspace(get_jobs_dir() / _validate_job_id(job_id), job_id=job_id)
+
+
+def new_job_id(book_name: str = "") -> str:
+    """
+    新しいジョブIDを発行
+
+    Args:
+        book_name: 書籍名（IDの先頭に含めて識別しやすくする）
+
+    Returns:
+        ジョブID
+    """
+    suffix = uuid.uuid4().hex[:12]
+    safe_name = re.sub(r"[^0-9A-Za-z_\-]+", "_", book_name).strip("_")[:40]
+    return f"{safe_name}-{suffix}" if safe_name else suffix
+
+
+def resolve_workspace(workspace: Optional[Workspace]) -> Workspace:
+    """workspace引数がNoneなら既定のワークスペースを返す"""
+    return workspace if workspace is not None else get_workspace()
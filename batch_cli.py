@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+書籍プロモーション動画の一括生成（コマンドライン）
+
+EPUBを置いたディレクトリ、またはマニフェストを指定して、
+書籍分析から動画生成までをUIなしで実行する。
+
+使い方:
+    python batch_cli.py data/raw/ --bgm yume.mp3 --max-books 2 --api-concurrency 4
+    python batch_cli.py books.jsonl --run-id 2026fall      # 変更のない成果物は再利用される
+
+マニフェスト（.json / .jsonl / .csv）の各行:
+    {"epub": "走れメロス.epub", "pattern_id": 2, "visual_style": "Watercolor",
+     "aspect_ratio": "16:9", "voice": "shimmer", "bgm": "yume.mp3", "summary_mode": "fast"}
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backend import batch_runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="書籍プロモーション動画の一括生成")
+    parser.add_argument("source", type=Path, help="EPUBのディレクトリ、またはマニフェスト（.json / .jsonl / .csv）")
+    parser.add_argument("--run-id", default=None, help="実行ID（省略時は日時。レポートとワークスペースの名前に使う）")
+    parser.add_argument("--max-books", type=int, default=2, help="同時に処理する書籍数")
+    parser.add_argument("--api-concurrency", type=int, default=4, help="全書籍で同時に実行するAPIステージ数")
+    parser.add_argument("--output-dir", type=Path, default=None, help="完成動画のコピー先")
+    parser.add_argument("--force", action="store_true", help="保存済みの成果物を使わずにすべて再計算する")
+
+    # 全書籍共通の設定（マニフェストの値が優先）
+    defaults = batch_runner.DEFAULT_BOOK_SETTINGS
+    parser.add_argument("--summary-mode", default=defaults["summary_mode"], choices=["full", "fast", "offline"],
+                        help="書籍分析のモード（full: 全文をチャンクごとにまとめる / fast: 各章の抜粋から1回で概要 / offline: APIなし）")
+    parser.add_argument("--pattern-id", type=int, default=defaults["pattern_id"], help="シナリオパターン (1-3)")
+    parser.add_argument("--aspect-ratio", default=defaults["aspect_ratio"], choices=["9:16", "16:9", "1:1"])
+    parser.add_argument("--visual-style", default=defaults["visual_style"])
+    parser.add_argument("--num-scenes", type=int, default=defaults["num_scenes"])
+    parser.add_argument("--voice", default=defaults["voice"])
+    parser.add_argument("--voice-model", default=defaults["voice_model"], choices=["tts-1-hd", "tts-1"])
+    parser.add_argument("--voice-speed", type=float, default=defaults["voice_speed"])
+    parser.add_argument("--bgm", default=defaults["bgm"], help="BGMのファイル名またはパス")
+    parser.add_argument("--bgm-volume", type=float, default=defaults["bgm_volume"])
+    parser.add_argument("--subtitle-type", default=defaults["subtitle_type"], choices=["normal", "karaoke", "none"])
+    parser.add_argument("--subtitle-output", default=defaults["subtitle_output"], choices=["burn", "soft", "sidecar"])
+    args = parser.parse_args()
+
+    run_id = args.run_id or datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+
+    books = batch_runner.load_manifest(args.source, {
+        "summary_mode": args.summary_mode,
+        "pattern_id": args.pattern_id,
+        "aspect_ratio": args.aspect_ratio,
+        "visual_style": args.visual_style,
+        "num_scenes": args.num_scenes,
+        "voice": args.voice,
+        "voice_model": args.voice_model,
+        "voice_speed": args.voice_speed,
+        "bgm": args.bgm,
+        "bgm_volume": args.bgm_volume,
+        "subtitle_type": args.subtitle_type,
+        "subtitle_output": args.subtitle_output,
+    })
+
+    if not books:
+        print(f"⚠️ 処理対象のEPUBがありません: {args.source}")
+        sys.exit(1)
+
+    report = batch_runner.run_batch(
+        books,
+        run_id,
+        max_books=args.max_books,
+        api_concurrency=args.api_concurrency,
+        output_dir=args.output_dir,
+        force=args.force
+    )
+
+    sys.exit(0 if report["failed"] == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
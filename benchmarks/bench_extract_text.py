@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+EPUBテキスト抽出のベンチマーク（ルビ・改行・正規化の効果）
+
+旧方式（soup.get_text(separator='\\n', strip=True)）と現在の epub_parser の抽出を比べ、
+書籍ごとに削減できた文字数・行数・推定トークン数と、抽出にかかった時間を表示する。
+
+旧方式では <ruby> や <span> などインライン要素の境界でも改行が入り、
+（BeautifulSoup のバージョンによっては）ルビの読みと括弧が本文に混ざる。
+
+使い方:
+    python benchmarks/bench_extract_text.py
+    python benchmarks/bench_extract_text.py --sizes small,medium,large
+    python benchmarks/bench_extract_text.py data/raw/走れメロス.epub --json extract_text.json
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fixtures import EPUB_SIZES, make_epub_fixtures
+
+
+def legacy_extract_text(epub_path: Path) -> str:
+    """旧方式の抽出（比較用）"""
+    import ebooklib
+    from ebooklib import epub
+    from bs4 import BeautifulSoup
+
+    book = epub.read_epub(str(epub_path))
+    text_content = []
+    for item in book.get_items():
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            soup = BeautifulSoup(item.get_content(), 'html.parser')
+            text = soup.get_text(separator='\n', strip=True)
+            if text:
+                text_content.append(text)
+    return '\n\n'.join(text_content)
+
+
+def measure(epub_path: Path) -> dict:
+    """1冊分を旧方式・現在の方式（ルビを除く / 残す）で抽出して比べる"""
+    from backend import chunk_planner, epub_parser
+
+    start = time.perf_counter()
+    legacy = legacy_extract_text(epub_path)
+    legacy_seconds = time.perf_counter() - start
+
+    variants = {"旧方式": {"text": legacy, "seconds": legacy_seconds}}
+    for ruby in epub_parser.RUBY_MODES:
+        start = time.perf_counter()
+        text = epub_parser.extract_text_from_epub(epub_path, ruby=ruby)
+        variants[f"ruby={ruby}"] = {"text": text, "seconds": time.perf_counter() - start}
+
+    legacy_tokens = chunk_planner.estimate_tokens(legacy)
+    result = {}
+    for name, variant in variants.items():
+        text = variant["text"]
+        tokens = chunk_planner.estimate_tokens(text)
+        result[name] = {
+            "characters": len(text),
+            "lines": text.count('\n') + 1,
+            "tokens": tokens,
+            "characters_saved": len(legacy) - len(text),
+            "tokens_saved": legacy_tokens - tokens,
+            "seconds": round(variant["seconds"], 3),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EPUBテキスト抽出のベンチマーク")
+    parser.add_argument("epubs", nargs="*", type=Path, help="計測するEPUB（省略時は合成EPUB）")
+    parser.add_argument("--sizes", default="small,medium", help=f"合成EPUBのサイズ（{','.join(EPUB_SIZES)}）")
+    parser.add_argument("--json", type=Path, default=None, help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    work_dir = None
+    books = {path.name: path for path in args.epubs}
+    if not books:
+        work_dir = Path(tempfile.mkdtemp(prefix="bench-extract-"))
+        print("📚 合成EPUBを準備中...")
+        books = {f"bench_{size}": path for size, path in
+                 make_epub_fixtures(work_dir, [s for s in args.sizes.split(",") if s]).items()}
+
+    results = {}
+    print("\n📊 テキスト抽出の比較（旧方式との差）")
+    print(f"  {'書籍':24s} {'方式':12s} {'文字数':>12s} {'削減文字数':>12s} {'削減率':>7s} {'行数':>9s} {'削減トークン':>12s} {'時間':>8s}")
+    for name, path in books.items():
+        results[name] = measure(path)
+        legacy_chars = results[name]["旧方式"]["characters"]
+        for variant, m in results[name].items():
+            print(f"  {name[:24]:24s} {variant:12s} {m['characters']:12,d} {m['characters_saved']:12,d} "
+                  f"{m['characters_saved'] / max(1, legacy_chars):7.1%} {m['lines']:9,d} {m['tokens_saved']:12,d} "
+                  f"{m['seconds']:7.2f}s")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\n💾 結果を保存: {args.json}")
+
+    if work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
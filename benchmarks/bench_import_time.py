@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+backend の読み込み時間のベンチマーク
+
+各画面・CLIが起動時に行う `from backend import ...` を新しいPythonプロセスで実行し、
+読み込みにかかった時間と、読み込まれた重いライブラリ（moviepy, google.generativeai など）を計測する。
+
+--ref を指定すると、そのコミットの backend/ を一時ディレクトリに取り出して同じ計測を行い、
+現在の作業ツリーと並べて表示する（変更前後の比較用）。
+
+使い方:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --ref HEAD~1 --repeat 7
+    python benchmarks/bench_import_time.py --json import_time.json
+"""
+
+import argparse
+import io
+import json
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 起動時の読み込み（画面・CLIごと）
+SCENARIOS = {
+    "import backend": "import backend",
+    "画面1/6 (job_runner)": "from backend import job_runner",
+    "画面2 (scenario_generator_v2)": "from backend import scenario_generator_v2",
+    "画面3 (image_generator_v2)": "from backend import image_generator_v2, job_runner",
+    "画面5 (bgm_manager_v2)": "from backend import bgm_manager_v2, job_runner",
+    "batch_cli (batch_runner)": "from backend import batch_runner",
+    "book_analyzer": "from backend import book_analyzer",
+    "video_renderer_v2": "from backend import video_renderer_v2",
+}
+
+HEAVY_MODULES = ["moviepy", "numpy", "google.generativeai", "openai", "ebooklib", "bs4", "requests"]
+
+_PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(root: Path, statement: str, repeat: int) -> Dict[str, Any]:
+    """
+    statement を新しいプロセスで repeat 回実行して計測
+
+    Args:
+        root: backend/ を含むディレクトリ
+        statement: 計測するimport文
+        repeat: 繰り返し回数（中央値を採用）
+
+    Returns:
+        {'ok', 'ms', 'heavy'} 失敗時は {'ok': False, 'error'}
+    """
+    code = _PROBE.format(root=str(root), statement=statement, heavy=HEAVY_MODULES)
+    samples = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=root, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return {"ok": False, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "失敗"}
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(data["seconds"])
+        heavy = data["heavy"]
+    return {"ok": True, "ms": statistics.median(samples) * 1000, "heavy": heavy}
+
+
+def checkout_ref(ref: str, destination: Path) -> Path:
+    """
+    指定したコミットの backend/ を destination に取り出す
+
+    Returns:
+        取り出し先（backend/ の親ディレクトリ）
+    """
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref, "backend"],
+        cwd=PROJECT_ROOT, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(destination)
+    return destination
+
+
+def run(roots: Dict[str, Path], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """全シナリオを各ツリーで計測"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, statement in SCENARIOS.items():
+        results[name] = {}
+        for label, root in roots.items():
+            print(f"  ⏱️ {name} [{label}]...", file=sys.stderr)
+            results[name][label] = measure(root, statement, repeat)
+    return results
+
+
+def format_table(results: Dict[str, Dict[str, Any]], labels: List[str]) -> str:
+    """結果を表形式の文字列にする"""
+    header = f"  {'読み込み':32s}" + "".join(f" {label:>12s}" for label in labels)
+    lines = [header]
+    for name, by_label in results.items():
+        cells = []
+        for label in labels:
+            result = by_label[label]
+            cells.append(f" {result['ms']:10.1f}ms" if result["ok"] else f" {'失敗':>12s}")
+        latest = by_label[labels[-1]]
+        heavy = ", ".join(latest.get("heavy", [])) or "-"
+        lines.append(f"  {name:32s}" + "".join(cells) + f"   重いライブラリ: {heavy}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backend の読み込み時間のベンチマーク")
+    parser.add_argument("--ref", help="比較するコミット（例: HEAD~1）")
+    parser.add_argument("--repeat", type=int, default=5, help="繰り返し回数（中央値を採用）")
+    parser.add_argument("--json", help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-import-") as temp_dir:
+        roots: Dict[str, Path] = {}
+        if args.ref:
+            roots[args.ref] = checkout_ref(args.ref, Path(temp_dir))
+        roots["現在"] = PROJECT_ROOT
+
+        results = run(roots, args.repeat)
+
+    print(f"\n📊 backend の読み込み時間（{args.repeat}回の中央値）")
+    print(format_table(results, list(roots)))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 保存しました: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
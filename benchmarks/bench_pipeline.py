@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+パイプライン全体のベンチマーク（APIキー不要）
+
+合成EPUBと合成シーン素材、外部APIの偽クライアント（fakes.py）を使い、
+以下のスループットとピークRSSを計測する。各ベンチマークは別プロセスで実行する。
+
+- extract:   EPUBからのテキスト抽出（サイズ別）
+- chunk:     チャンク分割（サイズ別）
+- subtitles: 字幕ファイル生成（カラオケASS / 通常ASS / SRT、音声解析あり・なし）
+- render:    動画レンダリング（字幕・トランジション・Ken Burns・出力方法ごと）
+- pipeline:  書籍1冊の一括処理（偽APIで書籍分析〜動画生成）
+
+使い方:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --suites extract,chunk --sizes small,medium,large
+    python benchmarks/bench_pipeline.py --suites pipeline --latency 0.2 --error-rate 0.05
+    python benchmarks/bench_pipeline.py --json results.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fakes import FakeConfig, install_fakes
+from fixtures import EPUB_SIZES, make_bgm, make_epub_fixtures, make_scene_assets
+from harness import run_isolated, format_results
+
+SUITES = ["extract", "chunk", "subtitles", "render", "pipeline"]
+
+# レンダリングのモード: (字幕タイプ, 字幕の出力方法, トランジション, Ken Burns, BGM)
+RENDER_MODES = {
+    "cut_nosub": ("none", "burn", "なし（カット）", False, False),
+    "crossfade_burn": ("normal", "burn", "クロスフェード", False, False),
+    "slide_burn": ("normal", "burn", "スライド", False, False),
+    "karaoke_burn": ("karaoke", "burn", "クロスフェード", False, False),
+    "kenburns_burn": ("normal", "burn", "クロスフェード", True, False),
+    "soft_mp4": ("normal", "soft", "クロスフェード", False, False),
+    "sidecar": ("normal", "sidecar", "クロスフェード", False, False),
+    "bgm_burn": ("normal", "burn", "クロスフェード", False, True),
+    "bgm_soft_mp4": ("normal", "soft", "クロスフェード", False, True),
+    "resubtitle_cached": ("karaoke", "burn", "クロスフェード", False, False),
+    "resubtitle_cached_bgm": ("karaoke", "burn", "クロスフェード", False, True),
+}
+
+
+# ---------------------------------------------------------------------------
+# ベンチマーク関数（別プロセスで実行される）
+# ---------------------------------------------------------------------------
+
+def _redirect_traces() -> None:
+    """
+    計測結果（tracing）・レート制御の状態・API呼び出しの記録を data/ ではなくベンチマークの作業ディレクトリに出す
+
+    --rate-limits real を指定しない場合、レート制御の上限は実質なしにする（偽APIには上限がないため）
+    """
+    from backend import api_clients, rate_governor, tracing
+
+    work_dir = Path(os.environ["BENCH_WORK_DIR"])
+    traces_dir = work_dir / "traces"
+    tracing.get_traces_dir = lambda: traces_dir
+    db_path = work_dir / f"rate_limits_{uuid.uuid4().hex[:8]}.sqlite3"
+    rate_governor.get_db_path = lambda: db_path
+    stats_path = work_dir / f"api_stats_{uuid.uuid4().hex[:8]}.sqlite3"
+    api_clients.get_stats_db_path = lambda: stats_path
+    if os.environ.get("BENCH_RATE_LIMITS") != "real":
+        rate_governor.get_limit = lambda key: 1e9
+
+
+def bench_extract(epub_path: str) -> dict:
+    _redirect_traces()
+    from backend.book_analyzer import extract_text_from_epub
+
+    start = time.perf_counter()
+    text = extract_text_from_epub(Path(epub_path))
+    return {"seconds": time.perf_counter() - start, "units": len(text), "unit": "文字"}
+
+
+def bench_chunk(text_file: str) -> dict:
+    _redirect_traces()
+    from backend.book_analyzer import chunk_text
+
+    text = Path(text_file).read_text(encoding='utf-8')
+    start = time.perf_counter()
+    chunks = chunk_text(text, chunk_size=2000)
+    return {"seconds": time.perf_counter() - start, "units": len(text), "unit": "文字", "chunks": len(chunks)}
+
+
+def bench_subtitles(kind: str, scenes: list, output_dir: str, use_alignment: bool) -> dict:
+    _redirect_traces()
+    from backend import subtitle_generator
+
+    # 音声解析のキャッシュを消して毎回解析させる
+    for scene in scenes:
+        Path(f"{scene['audio_file']}.align.json").unlink(missing_ok=True)
+
+    output_file = Path(output_dir) / f"bench_{kind}_{uuid.uuid4().hex[:6]}"
+    start = time.perf_counter()
+    if kind == "karaoke":
+        subtitle_generator.create_karaoke_subtitle_file(scenes, output_file.with_suffix(".ass"), use_alignment=use_alignment)
+    elif kind == "normal":
+        subtitle_generator.create_normal_subtitle_file(scenes, output_file.with_suffix(".ass"), use_alignment=use_alignment)
+    else:
+        subtitle_generator.create_srt_subtitle_file(scenes, output_file.with_suffix(".srt"), use_alignment=use_alignment)
+
+    return {"seconds": time.perf_counter() - start, "units": sum(len(scene["narration"]) for scene in scenes), "unit": "文字"}
+
+
+def bench_render(mode: str, scenes: list, aspect_ratio: str) -> dict:
+    _redirect_traces()
+    from backend import video_renderer_v2
+    from backend.workspace import get_workspace
+
+    subtitle_type, subtitle_output, transition_type, use_ken_burns, use_bgm = RENDER_MODES[mode]
+    workspace = get_workspace(f"bench-render-{uuid.uuid4().hex[:8]}")
+    storyboard_data = {
+        "book_name": "bench",
+        "scenes": scenes,
+        "total_scenes": len(scenes),
+        "aspect_ratio": aspect_ratio,
+    }
+    settings = {
+        "subtitle_type": subtitle_type,
+        "subtitle_output": subtitle_output,
+        "transition_type": transition_type,
+        "use_ken_burns": use_ken_burns,
+        "ken_burns_type": "zoom_in",
+    }
+    if use_bgm:
+        bgm_file = make_bgm(Path(scenes[0]["audio_file"]).parent / "bench_bgm.mp3")
+        settings["bgm"] = {"file": str(bgm_file), "volume": 0.15}
+
+    try:
+        if mode.startswith("resubtitle_cached"):
+            # 字幕なし動画をキャッシュしてから、字幕だけを変えて再生成する時間を計測
+            video_renderer_v2.render_video(storyboard_data, workspace=workspace, **{**settings, "subtitle_type": "normal"})
+
+        start = time.perf_counter()
+        video_data = video_renderer_v2.render_video(storyboard_data, workspace=workspace, **settings)
+        elapsed = time.perf_counter() - start
+        output_bytes = Path(video_data["video_file"]).stat().st_size
+    finally:
+        shutil.rmtree(workspace.root, ignore_errors=True)
+
+    return {
+        "seconds": elapsed,
+        "units": video_data["duration"],
+        "unit": "動画秒",
+        "output_mb": round(output_bytes / (1024 * 1024), 2),
+    }
+
+
+def bench_pipeline_book(epub_path: str, num_scenes: int, fake_config: dict, work_dir: str) -> dict:
+    from unittest import mock
+    from backend import artifact_dag, batch_runner, book_index, chunk_checkpoints, workspace
+
+    _redirect_traces()
+
+    settings = batch_runner.load_manifest(Path(epub_path).parent, {"num_scenes": num_scenes, "subtitle_output": "burn"})
+    settings = next(s for s in settings if s["epub"] == str(Path(epub_path).resolve()))
+
+    # ワークスペース・成果物・チャンクのチェックポイント・書籍の指紋インデックスはベンチマーク用の一時ディレクトリに出す
+    # （data/ の保存済みの分析結果を再利用させない）
+    run_dir = Path(work_dir) / f"pipeline-run-{uuid.uuid4().hex[:6]}"
+    artifacts_dir = run_dir / "artifacts"
+    run_id = f"bench-{uuid.uuid4().hex[:8]}"
+
+    with mock.patch.object(artifact_dag, "get_artifacts_dir", lambda: artifacts_dir), \
+            mock.patch.object(chunk_checkpoints, "get_checkpoints_root", lambda: run_dir / "checkpoints"), \
+            mock.patch.object(book_index, "get_index_root", lambda: run_dir / "book_index"), \
+            mock.patch.object(workspace, "get_jobs_dir", lambda: run_dir / "jobs"), \
+            install_fakes(FakeConfig(**fake_config)) as stats:
+        report = batch_runner.process_book(run_id, settings, force=True)
+
+    shutil.rmtree(report["workspace"], ignore_errors=True)
+    shutil.rmtree(run_dir, ignore_errors=True)
+
+    stage_seconds = report["stage_seconds"]
+    return {
+        "units": 1 if report["status"] == "succeeded" else 0,
+        "unit": "冊",
+        "status": report["status"],
+        "failed_stage": report["failed_stage"],
+        "stage_seconds": stage_seconds,
+        "estimated_cost_usd": report["cost_usd"],
+        "fake_calls": {
+            "gemini": stats.gemini_calls,
+            "images": stats.image_calls,
+            "tts": stats.tts_calls,
+            "errors": stats.errors,
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# 実行
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="パイプライン全体のベンチマーク（APIキー不要）")
+    parser.add_argument("--suites", default="extract,chunk,subtitles,render,pipeline",
+                        help=f"実行するベンチマーク（カンマ区切り: {','.join(SUITES)}）")
+    parser.add_argument("--sizes", default="small,medium",
+                        help=f"抽出・チャンク分割に使うEPUBサイズ（{','.join(EPUB_SIZES)}）")
+    parser.add_argument("--render-modes", default=",".join(RENDER_MODES), help="レンダリングのモード")
+    parser.add_argument("--scenes", type=int, default=3, help="レンダリング・字幕のシーン数")
+    parser.add_argument("--scene-seconds", type=float, default=2.0, help="1シーンの長さ（秒）")
+    parser.add_argument("--aspect-ratio", default="9:16", choices=["9:16", "16:9", "1:1"])
+    parser.add_argument("--pipeline-size", default="tiny", help="一括処理に使うEPUBサイズ")
+    parser.add_argument("--latency", type=float, default=0.0, help="偽APIの1回あたりの待ち時間（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="偽APIの待ち時間のばらつき（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="偽APIのエラー率 (0.0 - 1.0)")
+    parser.add_argument("--rate-limits", default="off", choices=["off", "real"],
+                        help="レート制御の上限（off: なし / real: backend/rate_governor.py の設定）")
+    parser.add_argument("--repeat", type=int, default=1, help="繰り返し回数（最良値を採用）")
+    parser.add_argument("--work-dir", type=Path, default=None, help="合成データの置き場所（省略時は一時ディレクトリ）")
+    parser.add_argument("--json", type=Path, default=None, help="結果をJSONで保存するパス")
+    parser.add_argument("--verbose", action="store_true", help="ベンチマーク中の処理ログを表示")
+    args = parser.parse_args()
+
+    suites = [s for s in args.suites.split(",") if s]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"不明なベンチマーク: {', '.join(sorted(unknown))}")
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="bench-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["BENCH_WORK_DIR"] = str(work_dir.resolve())
+    os.environ["BENCH_RATE_LIMITS"] = args.rate_limits
+    _redirect_traces()
+    sizes = [s for s in args.sizes.split(",") if s]
+    quiet = not args.verbose
+
+    print(f"📊 パイプラインベンチマーク（作業ディレクトリ: {work_dir}）")
+    results = []
+
+    def record(name: str, result: dict) -> None:
+        result["name"] = name
+        results.append(result)
+        print(format_results([result]).split("\n", 1)[1])
+
+    if "extract" in suites or "chunk" in suites:
+        print("📚 合成EPUBを準備中...")
+        fixtures = make_epub_fixtures(work_dir / "epub", sizes)
+
+    if "extract" in suites:
+        for size, epub_path in fixtures.items():
+            record(f"extract[{size}]", run_isolated(bench_extract, str(epub_path), repeat=args.repeat, quiet=quiet))
+
+    if "chunk" in suites:
+        from backend.book_analyzer import extract_text_from_epub
+        for size, epub_path in fixtures.items():
+            text_file = work_dir / "epub" / f"bench_{size}.txt"
+            if not text_file.exists():
+                text_file.write_text(extract_text_from_epub(epub_path), encoding='utf-8')
+            record(f"chunk[{size}]", run_isolated(bench_chunk, str(text_file), repeat=args.repeat, quiet=quiet))
+
+    if "subtitles" in suites or "render" in suites:
+        print("🎨 シーン素材を準備中...")
+        scenes = make_scene_assets(work_dir / "scenes", args.scenes, args.scene_seconds)
+
+    if "subtitles" in suites:
+        subtitle_dir = work_dir / "subtitles"
+        subtitle_dir.mkdir(exist_ok=True)
+        for kind in ("karaoke", "normal", "srt"):
+            for use_alignment in (False, True):
+                name = f"subtitles[{kind}{',align' if use_alignment else ''}]"
+                record(name, run_isolated(bench_subtitles, kind, scenes, str(subtitle_dir), use_alignment,
+                                          repeat=args.repeat, quiet=quiet))
+
+    if "render" in suites:
+        for mode in [m for m in args.render_modes.split(",") if m]:
+            if mode not in RENDER_MODES:
+                parser.error(f"不明なレンダリングモード: {mode}")
+            record(f"render[{mode}]", run_isolated(bench_render, mode, scenes, args.aspect_ratio, repeat=args.repeat, quiet=quiet))
+
+    if "pipeline" in suites:
+        pipeline_dir = work_dir / "pipeline"
+        epub_path = make_epub_fixtures(pipeline_dir, [args.pipeline_size])[args.pipeline_size]
+        fake_config = {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate}
+        result = run_isolated(bench_pipeline_book, str(epub_path), args.scenes, fake_config, str(work_dir), quiet=quiet)
+        record(f"pipeline[{args.pipeline_size}]", result)
+        if result["ok"]:
+            metrics = result["metrics"]
+            print(f"     状態: {metrics['status']}  偽API呼び出し: {metrics['fake_calls']}  "
+                  f"推定コスト: ${metrics['estimated_cost_usd']:.3f}")
+            print(f"     ステージ別: {metrics['stage_seconds']}")
+
+    print(f"\n{'='*100}")
+    print(format_results(results))
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "results": results},
+                                        ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 結果を保存: {args.json}")
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+字幕チャンク分割のベンチマーク
+
+書籍1冊分（デフォルト50万文字）の合成ナレーションを分割し、スループットを計測する。
+比較用に旧方式（固定幅ウィンドウ＋区切り文字ごとのrfind）も計測する。
+
+使い方:
+    python benchmarks/bench_subtitle_chunker.py [--chars 500000] [--max-chars 15] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.subtitle_generator import split_text_into_chunks
+
+SENTENCE_PARTS = [
+    "この本は", "主人公の", "「旅の終わり」と呼ばれる", "小さな町で", "コンピュータサイエンスを学ぶ",
+    "彼女は", "静かに", "問いかけます", "……", "そして", "AIとPythonを使って",
+    "新しい世界へ", "踏み出していくのです", "友情と信頼", "読者の心に", "深く残る物語",
+]
+SENTENCE_ENDS = ["。", "！", "？", "、", "」", "…"]
+
+
+def generate_narration(num_chars: int, seed: int = 0) -> str:
+    """合成ナレーションテキストを生成"""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < num_chars:
+        sentence = "".join(rng.choice(SENTENCE_PARTS) for _ in range(rng.randint(2, 6)))
+        sentence += rng.choice(SENTENCE_ENDS)
+        if rng.random() < 0.05:
+            sentence += "\n"
+        parts.append(sentence)
+        total += len(sentence)
+    return "".join(parts)[:num_chars]
+
+
+def legacy_split_text_into_chunks(text: str, max_chars: int = 15) -> list:
+    """旧方式のチャンク分割（比較用）"""
+    chunks = []
+    current_pos = 0
+    while current_pos < len(text):
+        chunk_end = min(current_pos + max_chars, len(text))
+        chunk_text = text[current_pos:chunk_end]
+        if chunk_end < len(text):
+            best_cut = -1
+            for delimiter in ['。', '、', '！', '？']:
+                idx = chunk_text.rfind(delimiter)
+                if idx != -1 and idx > len(chunk_text) * 0.4:
+                    best_cut = idx + 1
+                    break
+            if best_cut != -1:
+                chunk_text = chunk_text[:best_cut]
+                chunk_end = current_pos + best_cut
+        chunks.append(chunk_text.strip())
+        current_pos = chunk_end
+    return chunks
+
+
+def bench(func, text: str, max_chars: int, repeat: int) -> dict:
+    """最良値でスループットを計測"""
+    best = float('inf')
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = func(text, max_chars)
+        best = min(best, time.perf_counter() - start)
+
+    bad_starts = sum(1 for c in chunks if c and c[0] in "、。！？」…")
+    return {
+        "seconds": best,
+        "chars_per_sec": len(text) / best if best > 0 else float('inf'),
+        "num_chunks": len(chunks),
+        "avg_len": sum(len(c) for c in chunks) / max(len(chunks), 1),
+        "bad_line_starts": bad_starts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕チャンク分割のベンチマーク")
+    parser.add_argument("--chars", type=int, default=500000, help="ナレーションの文字数")
+    parser.add_argument("--max-chars", type=int, default=15, help="1チャンクの最大文字数")
+    parser.add_argument("--repeat", type=int, default=3, help="繰り返し回数（最良値を採用）")
+    args = parser.parse_args()
+
+    text = generate_narration(args.chars)
+
+    print(f"📊 字幕チャンク分割ベンチマーク（{len(text):,}文字, max_chars={args.max_chars}）")
+    for name, func in [("legacy", legacy_split_text_into_chunks), ("current", split_text_into_chunks)]:
+        result = bench(func, text, args.max_chars, args.repeat)
+        print(
+            f"  {name:8s} {result['seconds'] * 1000:9.1f} ms  "
+            f"{result['chars_per_sec'] / 1e6:6.2f} M文字/秒  "
+            f"チャンク数 {result['num_chunks']:,}  平均 {result['avg_len']:.1f}文字  "
+            f"行頭禁則違反 {result['bad_line_starts']:,}"
+        )
+
+
+if __name__ == '__main__':
+    main()
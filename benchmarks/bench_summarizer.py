@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+書籍分析の要約前処理（重要な文の抽出）のベンチマーク（APIキー不要）
+
+合成EPUBと偽のGemini（fakes.py）を使い、以下を計測する。
+
+- extract: extractive_summarizer.extract_summary の速度と、Geminiに送る文字数の削減率
+  （品質設定ごとのチャンクサイズ・抽出割合で、チャンクごとに実行）
+- analyze: book_analyzer.analyze_book の全体の時間・Gemini呼び出し回数・送った文字数
+  （品質設定ごとに、抽出あり / 抽出なし / オフライン要約を比較。各実行は別プロセス）
+- reuse: 書籍の指紋インデックス（book_index）による分析結果の再利用
+  （同じ本を初めて分析 → ファイル名を変えた同じ本 → 一部の章を書き換えた新しい版 の順に分析）
+
+偽のGeminiの待ち時間は「1回あたりの待ち時間 + プロンプトの文字数 ÷ 入力の処理速度」。
+
+使い方:
+    python benchmarks/bench_summarizer.py
+    python benchmarks/bench_summarizer.py --sizes medium,large --qualities balanced,fast --latency 1.0
+    python benchmarks/bench_summarizer.py --suites extract --json summarizer.json
+    python benchmarks/bench_summarizer.py --suites reuse --sizes large --revised-chapters 3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fakes import FakeConfig, install_fakes
+from fixtures import EPUB_SIZES, make_epub_fixtures
+from harness import run_isolated
+from bench_pipeline import _redirect_traces
+
+SUITES = ["extract", "analyze", "reuse"]
+
+# analyze の比較対象: (名前, 分析モード, 抽出を使うか)
+ANALYZE_VARIANTS = [
+    ("抽出なし", "full", False),
+    ("抽出あり", "full", True),
+    ("オフライン", "offline", True),
+]
+
+
+def bench_extract(text_file: str, quality: str) -> dict:
+    from backend import chunk_planner, extractive_summarizer
+    from backend.book_analyzer import chunk_text
+
+    text = Path(text_file).read_text(encoding='utf-8')
+    plan = chunk_planner.plan_chunks(text, quality=quality)
+    chunks = chunk_text(text, chunk_size=plan["chunk_size"])
+    ratio = plan["extract_ratio"]
+
+    start = time.perf_counter()
+    extracted = [extractive_summarizer.extract_summary(chunk, int(len(chunk) * ratio)) for chunk in chunks]
+    seconds = time.perf_counter() - start
+
+    chars_in = sum(len(chunk) for chunk in chunks)
+    chars_out = sum(len(chunk) for chunk in extracted)
+    return {
+        "seconds": seconds,
+        "units": chars_in,
+        "unit": "文字",
+        "chunks": len(chunks),
+        "extract_ratio": ratio,
+        "chars_in": chars_in,
+        "chars_out": chars_out,
+        "reduction": 1 - chars_out / max(1, chars_in),
+    }
+
+
+def bench_analyze(epub_path: str, quality: str, mode: str, use_extract: bool, fake_config: dict) -> dict:
+    from unittest import mock
+    from backend import book_analyzer, chunk_checkpoints, chunk_planner
+    from backend.workspace import Workspace
+
+    _redirect_traces()
+
+    # チェックポイントを毎回空の場所にして、前の実行のまとめを再利用させない
+    work_dir = Path(os.environ["BENCH_WORK_DIR"]) / f"analyze-{uuid.uuid4().hex[:8]}"
+    presets = {key: dict(value) for key, value in chunk_planner.QUALITY_PRESETS.items()}
+    if not use_extract:
+        presets[quality]["extract_ratio"] = 1.0
+
+    with mock.patch.object(chunk_checkpoints, "get_checkpoints_root", lambda: work_dir / "checkpoints"), \
+            mock.patch.object(chunk_planner, "QUALITY_PRESETS", presets), \
+            install_fakes(FakeConfig(**fake_config)) as stats:
+        start = time.perf_counter()
+        result = book_analyzer.analyze_book(
+            Path(epub_path), work_dir / "raw", workspace=Workspace(work_dir), quality=quality, mode=mode
+        )
+        seconds = time.perf_counter() - start
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "seconds": seconds,
+        "units": result["character_count"],
+        "unit": "文字",
+        "num_chunks": result["num_chunks"],
+        "gemini_calls": stats.gemini_calls,
+        "prompt_chars": stats.gemini_prompt_chars,
+    }
+
+
+def bench_reuse(epub_path: str, copy_path: str, revised_path: str, quality: str, fake_config: dict) -> dict:
+    from unittest import mock
+    from backend import book_analyzer, book_index, chunk_checkpoints
+    from backend.workspace import Workspace
+
+    _redirect_traces()
+
+    work_dir = Path(os.environ["BENCH_WORK_DIR"]) / f"reuse-{uuid.uuid4().hex[:8]}"
+    runs = {}
+    with mock.patch.object(chunk_checkpoints, "get_checkpoints_root", lambda: work_dir / "checkpoints"), \
+            mock.patch.object(book_index, "get_index_root", lambda: work_dir / "book_index"):
+        for name, path in [("初回", epub_path), ("ファイル名違い", copy_path), ("新しい版", revised_path)]:
+            with install_fakes(FakeConfig(**fake_config)) as stats:
+                start = time.perf_counter()
+                result = book_analyzer.analyze_book(
+                    Path(path), work_dir / "raw", workspace=Workspace(work_dir), quality=quality
+                )
+                seconds = time.perf_counter() - start
+            runs[name] = {
+                "seconds": seconds,
+                "gemini_calls": stats.gemini_calls,
+                "prompt_chars": stats.gemini_prompt_chars,
+                "num_chunks": result["num_chunks"],
+                "chunks_reused": result["summary_report"].get("chunks_reused", 0),
+                "match": (result.get("reused_from") or {}).get("match", "-"),
+            }
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "seconds": sum(run["seconds"] for run in runs.values()),
+        "units": result["character_count"],
+        "unit": "文字",
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="書籍分析の要約前処理のベンチマーク（APIキー不要）")
+    parser.add_argument("--suites", default="extract,analyze", help=f"実行するベンチマーク（カンマ区切り: {','.join(SUITES)}）")
+    parser.add_argument("--sizes", default="medium", help=f"EPUBサイズ（{','.join(EPUB_SIZES)}）")
+    parser.add_argument("--qualities", default="high,balanced,fast", help="品質設定（カンマ区切り）")
+    parser.add_argument("--latency", type=float, default=0.5, help="偽Geminiの1回あたりの待ち時間（秒）")
+    parser.add_argument("--input-chars-per-second", type=float, default=20000.0,
+                        help="偽Geminiの入力の処理速度（文字/秒）")
+    parser.add_argument("--revised-chapters", type=int, default=2, help="reuse の新しい版で書き換える章の数")
+    parser.add_argument("--repeat", type=int, default=1, help="extract の繰り返し回数（最良値を採用）")
+    parser.add_argument("--work-dir", type=Path, default=None, help="合成データの置き場所（省略時は一時ディレクトリ）")
+    parser.add_argument("--json", type=Path, default=None, help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    suites = [s for s in args.suites.split(",") if s]
+    sizes = [s for s in args.sizes.split(",") if s]
+    qualities = [q for q in args.qualities.split(",") if q]
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="bench-summarizer-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["BENCH_WORK_DIR"] = str(work_dir.resolve())
+    os.environ.setdefault("BENCH_RATE_LIMITS", "off")
+    _redirect_traces()
+
+    print(f"📊 要約前処理のベンチマーク（作業ディレクトリ: {work_dir}）")
+    print("📚 合成EPUBを準備中...")
+    fixtures = make_epub_fixtures(work_dir / "epub", sizes)
+    results = {"extract": [], "analyze": [], "reuse": []}
+
+    if "extract" in suites:
+        from backend.epub_parser import extract_text_from_epub
+        print("\n✂️ 重要な文の抽出")
+        print(f"  {'書籍':8s} {'品質':10s} {'チャンク':>8s} {'抽出割合':>8s} {'入力':>12s} {'出力':>12s} {'削減':>6s} {'時間':>9s}")
+        for size, epub_path in fixtures.items():
+            text_file = work_dir / "epub" / f"bench_{size}.txt"
+            if not text_file.exists():
+                text_file.write_text(extract_text_from_epub(epub_path), encoding='utf-8')
+            for quality in qualities:
+                result = run_isolated(bench_extract, str(text_file), quality, repeat=args.repeat)
+                result.update(size=size, quality=quality)
+                results["extract"].append(result)
+                if not result["ok"]:
+                    print(f"  {size:8s} {quality:10s} ❌ {result['error'].splitlines()[0]}")
+                    continue
+                m = result["metrics"]
+                print(f"  {size:8s} {quality:10s} {m['chunks']:8d} {m['extract_ratio']:8.0%} {m['chars_in']:12,d} "
+                      f"{m['chars_out']:12,d} {m['reduction']:6.0%} {result['seconds']:8.2f}s")
+
+    if "analyze" in suites:
+        fake_config = {"latency": args.latency, "input_chars_per_second": args.input_chars_per_second}
+        print(f"\n📝 書籍分析の全体（偽Gemini: {args.latency}秒/回 + {args.input_chars_per_second:,.0f}文字/秒）")
+        print(f"  {'書籍':8s} {'品質':10s} {'方式':10s} {'時間':>9s} {'Gemini':>7s} {'送った文字数':>14s}")
+        for size, epub_path in fixtures.items():
+            for quality in qualities:
+                for name, mode, use_extract in ANALYZE_VARIANTS:
+                    result = run_isolated(bench_analyze, str(epub_path), quality, mode, use_extract, fake_config)
+                    result.update(size=size, quality=quality, variant=name)
+                    results["analyze"].append(result)
+                    if not result["ok"]:
+                        print(f"  {size:8s} {quality:10s} {name:10s} ❌ {result['error'].splitlines()[0]}")
+                        continue
+                    m = result["metrics"]
+                    print(f"  {size:8s} {quality:10s} {name:10s} {result['seconds']:8.2f}s {m['gemini_calls']:7d} "
+                          f"{m['prompt_chars']:14,d}")
+
+    if "reuse" in suites:
+        from fixtures import make_epub
+        fake_config = {"latency": args.latency, "input_chars_per_second": args.input_chars_per_second}
+        print(f"\n♻️ 分析結果の再利用（偽Gemini: {args.latency}秒/回 + {args.input_chars_per_second:,.0f}文字/秒）")
+        print(f"  {'書籍':8s} {'品質':10s} {'分析':14s} {'一致':8s} {'時間':>9s} {'Gemini':>7s} {'送った文字数':>14s} {'再利用':>10s}")
+        for size, epub_path in fixtures.items():
+            # ファイル名だけ違う同じ本と、後ろの方の章を書き換えた新しい版
+            num_chars, num_chapters = EPUB_SIZES[size]
+            copy_path = work_dir / "epub" / f"copy_of_{size}.epub"
+            shutil.copy2(epub_path, copy_path)
+            revised = list(range(num_chapters - args.revised_chapters, num_chapters))
+            revised_path = make_epub(work_dir / "epub" / f"bench_{size}_2nd.epub", num_chars, num_chapters,
+                                     seed=num_chars, title=f"合成書籍_{size}_第2版", revised_chapters=revised)
+            for quality in qualities:
+                result = run_isolated(bench_reuse, str(epub_path), str(copy_path), str(revised_path), quality,
+                                      fake_config)
+                result.update(size=size, quality=quality)
+                results["reuse"].append(result)
+                if not result["ok"]:
+                    print(f"  {size:8s} {quality:10s} ❌ {result['error'].splitlines()[0]}")
+                    continue
+                for name, m in result["metrics"]["runs"].items():
+                    print(f"  {size:8s} {quality:10s} {name:14s} {m['match']:8s} {m['seconds']:8.2f}s "
+                          f"{m['gemini_calls']:7d} {m['prompt_chars']:14,d} {m['chunks_reused']:4d}/{m['num_chunks']:<4d}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "results": results},
+                                        ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"\n💾 結果を保存: {args.json}")
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
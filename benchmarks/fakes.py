@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク用の外部APIの代替（ローカルで完結する偽クライアント）
+
+install_fakes() の中では、以下がローカルの偽物に置き換わる。
+
+- google.generativeai: GenerativeModel.generate_content() がプロンプトの種類に応じた
+  定型のテキスト / JSON（全体概要・シナリオ・シーン分割）を返す
+- openai.OpenAI: images.generate() は fake:// のURLを返し、audio.speech.create() は
+  ナレーションの長さに応じたトーンのMP3（ffmpegで生成、長さごとにキャッシュ）を返す
+- requests.get / requests.Session.get: fake:// のURLに対してPNG画像を返す
+
+レイテンシとエラー率は FakeConfig で指定する（エラーはHTTP 429相当の FakeAPIError）。
+
+使い方:
+    with install_fakes(FakeConfig(latency=0.05, error_rate=0.1)) as stats:
+        book_analyzer.analyze_book(...)
+    print(stats)
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+import io
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from unittest import mock
+
+
+@dataclass
+class FakeConfig:
+    """
+    偽APIの設定
+
+    Attributes:
+        latency: 1回の呼び出しの待ち時間（秒）
+        input_chars_per_second: Geminiの入力の処理速度（プロンプトの文字数 ÷ この値を待ち時間に加える、0の場合は加えない）
+        jitter: 待ち時間のばらつき（秒、一様分布）
+        error_rate: 呼び出しが FakeAPIError で失敗する確率
+        seed: 乱数シード
+        chars_per_second: 音声の長さ（ナレーション文字数 ÷ この値）
+        image_size: 生成するPNGのサイズ（幅, 高さ）。Noneの場合は要求サイズの1/4
+    """
+    latency: float = 0.0
+    input_chars_per_second: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    chars_per_second: float = 8.0
+    image_size: Optional[tuple] = None
+
+
+@dataclass
+class FakeStats:
+    """偽APIの呼び出し回数"""
+    gemini_calls: int = 0
+    gemini_prompt_chars: int = 0
+    image_calls: int = 0
+    image_downloads: int = 0
+    tts_calls: int = 0
+    errors: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+
+class FakeAPIError(Exception):
+    """偽APIのエラー（レート制限を想定）"""
+
+    status_code = 429
+
+    def __init__(self, message: str = "429 Resource has been exhausted (fake)"):
+        super().__init__(message)
+
+
+class _Fake:
+    """偽クライアントの共通処理（待ち時間とエラー）"""
+
+    def __init__(self, config: FakeConfig, stats: FakeStats):
+        self.config = config
+        self.stats = stats
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+
+    def call(self, counter: str, extra_delay: float = 0.0) -> None:
+        self.stats.count(counter)
+        with self.lock:
+            delay = self.config.latency + extra_delay + self.rng.uniform(0, self.config.jitter)
+            fail = self.rng.random() < self.config.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self.stats.count("errors")
+            raise FakeAPIError()
+
+
+# ---------------------------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------------------------
+
+FILLER = "本書は架空の町を舞台に、人々の日常と小さな変化を丁寧に描いている。"
+
+
+class _FakeUsage:
+    def __init__(self, prompt: str, text: str):
+        # 日本語はおおよそ1文字1トークンとして概算
+        self.prompt_token_count = len(prompt)
+        self.candidates_token_count = len(text)
+        self.total_token_count = len(prompt) + len(text)
+
+
+class _FakeGeminiResponse:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.usage_metadata = _FakeUsage(prompt, text)
+
+
+def _repeat_text(length: int) -> str:
+    return (FILLER * (length // len(FILLER) + 1))[:length]
+
+
+def fake_gemini_text(prompt: str) -> str:
+    """プロンプトの種類に応じた定型の応答"""
+    if '"scenes": [' in prompt:
+        num_scenes = int(re.search(r"(\d+)つのシーンに分割", prompt).group(1))
+        summary_match = re.search(r"## シナリオ（全文）\n(.*?)\n\n## 動画設定", prompt, re.S)
+        summary = summary_match.group(1) if summary_match else _repeat_text(400)
+        size = max(1, len(summary) // num_scenes)
+        scenes = []
+        for i in range(num_scenes):
+            narration = summary[i * size:] if i == num_scenes - 1 else summary[i * size:(i + 1) * size]
+            scenes.append({
+                "scene_number": i + 1,
+                "narration": narration,
+                "image_prompt": f"A quiet town street, scene {i + 1}, soft light",
+                "duration_seconds": max(1, len(narration) // 10),
+            })
+        return json.dumps({"scenes": scenes}, ensure_ascii=False)
+
+    if '"key_messages"' in prompt:
+        summary = _repeat_text(400)
+        return json.dumps({
+            "summary": summary,
+            "character_count": len(summary),
+            "key_messages": ["日常", "変化", "再生"],
+            "hook": "ある朝、町の時計が止まった。",
+        }, ensure_ascii=False)
+
+    if '"main_topics"' in prompt:
+        summary = _repeat_text(800)
+        return json.dumps({
+            "summary": summary,
+            "character_count": len(summary),
+            "main_topics": ["日常", "共同体", "時間"],
+            "target_audience": "一般読者",
+            "book_type": "小説",
+        }, ensure_ascii=False)
+
+    return _repeat_text(1200)
+
+
+class FakeGenerativeModel(_Fake):
+    """google.generativeai.GenerativeModel の代替"""
+
+    def __init__(self, model_name: str = "", *args, config: FakeConfig, stats: FakeStats, **kwargs):
+        super().__init__(config, stats)
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        prompt = str(prompt)
+        rate = self.config.input_chars_per_second
+        self.call("gemini_calls", len(prompt) / rate if rate else 0.0)
+        self.stats.count("gemini_prompt_chars", len(prompt))
+        return _FakeGeminiResponse(prompt, fake_gemini_text(prompt))
+
+
+# ---------------------------------------------------------------------------
+# OpenAI（画像・音声）
+# ---------------------------------------------------------------------------
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _FakeImages(_Fake):
+    def generate(self, model: str = "", prompt: str = "", size: str = "1024x1792", quality: str = "standard", n: int = 1, **kwargs):
+        self.call("image_calls")
+        seed = zlib.crc32(prompt.encode('utf-8')) % 1_000_000
+        return _Obj(data=[_Obj(url=f"fake://image/{size}/{seed}.png", revised_prompt=prompt)])
+
+
+class _FakeSpeechResponse:
+    def __init__(self, audio_file: Path):
+        self.audio_file = audio_file
+
+    def stream_to_file(self, path) -> None:
+        shutil.copyfile(self.audio_file, path)
+
+    def write_to_file(self, path) -> None:
+        self.stream_to_file(path)
+
+    @property
+    def content(self) -> bytes:
+        return self.audio_file.read_bytes()
+
+
+class _FakeSpeech(_Fake):
+    def __init__(self, config: FakeConfig, stats: FakeStats, tone_cache: "ToneCache"):
+        super().__init__(config, stats)
+        self.tone_cache = tone_cache
+
+    def create(self, model: str = "tts-1", voice: str = "alloy", input: str = "", speed: float = 1.0, **kwargs):
+        self.call("tts_calls")
+        duration = max(0.5, len(input) / self.config.chars_per_second / max(speed, 0.25))
+        return _FakeSpeechResponse(self.tone_cache.get(round(duration, 1)))
+
+
+class FakeOpenAI:
+    """openai.OpenAI の代替"""
+
+    def __init__(self, *args, config: FakeConfig, stats: FakeStats, tone_cache: "ToneCache", **kwargs):
+        self.images = _FakeImages(config, stats)
+        self.audio = _Obj(speech=_FakeSpeech(config, stats, tone_cache))
+
+
+class ToneCache:
+    """長さごとのトーンMP3（ffmpegで生成して一時ディレクトリにキャッシュ）"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.lock = threading.Lock()
+
+    def get(self, duration: float) -> Path:
+        path = self.directory / f"tone_{duration:.1f}.mp3"
+        with self.lock:
+            if not path.exists():
+                subprocess.run(
+                    ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi',
+                     '-i', f"sine=frequency=330:duration={duration}",
+                     '-c:a', 'libmp3lame', '-b:a', '64k', str(path)],
+                    check=True
+                )
+        return path
+
+
+# ---------------------------------------------------------------------------
+# 画像ダウンロード
+# ---------------------------------------------------------------------------
+
+def fake_png(width: int, height: int, seed: int = 0) -> bytes:
+    """グラデーションのPNG画像"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 255, size=3)
+    y = np.linspace(0, 1, height)[:, None, None]
+    x = np.linspace(0, 1, width)[None, :, None]
+    pixels = (base * (1 - y) + (255 - base) * x * y) % 256
+    image = Image.fromarray(np.broadcast_to(pixels, (height, width, 3)).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _FakeHTTPResponse:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise FakeAPIError(f"{self.status_code} (fake)")
+
+
+def _make_fake_get(config: FakeConfig, stats: FakeStats, real_get):
+    cache: Dict[str, bytes] = {}
+    lock = threading.Lock()
+    fake = _Fake(config, stats)
+
+    def fake_get(url, *args, **kwargs):
+        if not str(url).startswith("fake://image/"):
+            return real_get(url, *args, **kwargs)
+        fake.call("image_downloads")
+        with lock:
+            if url not in cache:
+                size, name = str(url)[len("fake://image/"):].split("/")
+                width, height = (int(v) for v in size.split("x"))
+                if config.image_size:
+                    width, height = config.image_size
+                else:
+                    width, height = width // 4, height // 4
+                cache[url] = fake_png(width, height, int(Path(name).stem))
+        return _FakeHTTPResponse(cache[url])
+
+    return fake_get
+
+
+def _make_fake_session_get(config: FakeConfig, stats: FakeStats, real_session_get):
+    fake_get = _make_fake_get(config, stats, None)
+
+    def fake_session_get(session, url, *args, **kwargs):
+        if not str(url).startswith("fake://image/"):
+            return real_session_get(session, url, *args, **kwargs)
+        return fake_get(url)
+
+    return fake_session_get
+
+
+# ---------------------------------------------------------------------------
+# 置き換え
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def install_fakes(config: Optional[FakeConfig] = None):
+    """
+    外部APIを偽物に置き換える
+
+    Args:
+        config: 偽APIの設定（Noneの場合は待ち時間・エラーなし）
+
+    Yields:
+        FakeStats（呼び出し回数）
+    """
+    import google.generativeai as genai
+    import openai
+    import requests
+    from backend import api_clients
+
+    config = config or FakeConfig()
+    stats = FakeStats()
+    tone_dir = Path(tempfile.mkdtemp(prefix="bench-tones-"))
+    tone_cache = ToneCache(tone_dir)
+
+    patches = [
+        mock.patch.dict(os.environ, {"GOOGLE_API_KEY": "fake", "OPENAI_API_KEY": "fake"}),
+        mock.patch.object(genai, "configure", lambda *args, **kwargs: None),
+        mock.patch.object(genai, "GenerativeModel",
+                          lambda *args, **kwargs: FakeGenerativeModel(*args, config=config, stats=stats, **kwargs)),
+        mock.patch.object(openai, "OpenAI",
+                          lambda *args, **kwargs: FakeOpenAI(*args, config=config, stats=stats, tone_cache=tone_cache, **kwargs)),
+        mock.patch.object(requests, "get", _make_fake_get(config, stats, requests.get)),
+        mock.patch.object(requests.Session, "get", _make_fake_session_get(config, stats, requests.Session.get)),
+    ]
+
+    # 共有クライアント（backend.api_clients）を偽物で作り直させる
+    api_clients.reset_clients()
+    for patch in patches:
+        patch.start()
+    try:
+        yield stats
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+        api_clients.reset_clients()
+        shutil.rmtree(tone_dir, ignore_errors=True)
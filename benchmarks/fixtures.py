@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク用の合成データ（EPUB・シーン素材）
+
+- make_epub(): 指定した文字数・章数の合成EPUB（ルビ・強調・見出し・段落を含むXHTML）
+- make_scene_assets(): シーン画像（PNG）とナレーション音声（トーンMP3）
+- make_bgm(): BGM（トーンMP3）
+
+同じ引数なら同じ内容になる（乱数シード固定）。
+"""
+
+from pathlib import Path
+from typing import Dict, Any, List, Sequence
+import random
+import subprocess
+
+# ベンチマークで使う書籍サイズ（文字数, 章数）
+EPUB_SIZES = {
+    "tiny": (4_000, 2),
+    "small": (20_000, 5),
+    "medium": (200_000, 20),
+    "large": (1_000_000, 60),
+}
+
+SENTENCE_PARTS = [
+    "この町では", "古い時計台が", "毎朝", "静かに", "時を告げる", "彼女は",
+    "窓の外を", "見つめながら", "遠い日の約束を", "思い出していた", "しかし",
+    "誰もが", "その理由を", "知らなかった", "やがて", "小さな変化が", "訪れる",
+]
+SENTENCE_ENDS = ["。", "。", "。", "！", "？", "」"]
+RUBY_WORDS = [("時計台", "とけいだい"), ("約束", "やくそく"), ("黄昏", "たそがれ"), ("邂逅", "かいこう")]
+
+
+def generate_text(num_chars: int, seed: int = 0) -> List[str]:
+    """合成の段落リスト（合計およそnum_chars文字）"""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < num_chars:
+        sentences = []
+        for _ in range(rng.randint(2, 6)):
+            sentence = "".join(rng.choice(SENTENCE_PARTS) for _ in range(rng.randint(3, 7)))
+            sentences.append(sentence + rng.choice(SENTENCE_ENDS))
+        paragraph = "".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph)
+    return paragraphs
+
+
+def _chapter_html(title: str, paragraphs: List[str], rng: random.Random) -> str:
+    body = []
+    for paragraph in paragraphs:
+        if rng.random() < 0.1:
+            paragraph = f'<span class="em">{paragraph[:6]}</span>{paragraph[6:]}'
+        if rng.random() < 0.2:
+            word, reading = rng.choice(RUBY_WORDS)
+            paragraph = f"<ruby><rb>{word}</rb><rp>（</rp><rt>{reading}</rt><rp>）</rp></ruby>" + paragraph
+        body.append(f"<p>{paragraph}</p>")
+    return f"<html><body><h1>{title}</h1>{''.join(body)}</body></html>"
+
+
+def make_epub(
+    output_file: Path,
+    num_chars: int,
+    num_chapters: int,
+    seed: int = 0,
+    title: str = "合成書籍",
+    revised_chapters: Sequence[int] = ()
+) -> Path:
+    """
+    合成EPUBを作成
+
+    Args:
+        output_file: 出力先
+        num_chars: 本文の文字数（目安）
+        num_chapters: 章数
+        seed: 乱数シード
+        title: 書名
+        revised_chapters: 本文を書き換える章の番号（0始まり、新しい版を作る場合。ほかの章は同じ内容）
+
+    Returns:
+        出力先パス
+    """
+    from ebooklib import epub
+
+    paragraphs = generate_text(num_chars, seed)
+    per_chapter = max(1, len(paragraphs) // num_chapters)
+
+    book = epub.EpubBook()
+    book.set_identifier(f"bench-{seed}-{num_chars}")
+    book.set_title(title)
+    book.set_language("ja")
+    book.add_author("ベンチマーク")
+
+    chapters = []
+    for i in range(num_chapters):
+        chunk = paragraphs[i * per_chapter:] if i == num_chapters - 1 else paragraphs[i * per_chapter:(i + 1) * per_chapter]
+        if i in revised_chapters:
+            chunk = generate_text(sum(len(p) for p in chunk), seed + 1000 + i)
+        rng = random.Random(seed * 1000 + i)  # 章ごとに固定（ほかの章を書き換えても変わらない）
+        chapter = epub.EpubHtml(title=f"第{i + 1}章", file_name=f"chap_{i + 1:03d}.xhtml", lang="ja")
+        chapter.content = _chapter_html(f"第{i + 1}章", chunk, rng)
+        book.add_item(chapter)
+        chapters.append(chapter)
+
+    book.toc = chapters
+    book.spine = ["nav"] + chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    epub.write_epub(str(output_file), book)
+    return output_file
+
+
+def make_epub_fixtures(output_dir: Path, sizes: List[str]) -> Dict[str, Path]:
+    """
+    EPUB_SIZES の各サイズの合成EPUBを作成（既にあれば再利用）
+
+    Returns:
+        {サイズ名: EPUBパス}
+    """
+    fixtures = {}
+    for size in sizes:
+        num_chars, num_chapters = EPUB_SIZES[size]
+        path = output_dir / f"bench_{size}.epub"
+        if not path.exists():
+            make_epub(path, num_chars, num_chapters, seed=num_chars, title=f"合成書籍_{size}")
+        fixtures[size] = path
+    return fixtures
+
+
+def make_scene_assets(
+    output_dir: Path,
+    num_scenes: int = 3,
+    seconds_per_scene: float = 2.0,
+    size: tuple = (270, 480),
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    レンダリング用のシーン（画像・音声・ナレーション）を作成
+
+    Args:
+        output_dir: 出力先
+        num_scenes: シーン数
+        seconds_per_scene: 1シーンの音声の長さ（秒）
+        size: 画像サイズ（幅, 高さ）
+        seed: 乱数シード
+
+    Returns:
+        storyboard_data['scenes'] と同じ形式のリスト
+    """
+    from fakes import fake_png
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paragraphs = generate_text(num_scenes * 60, seed)
+
+    scenes = []
+    for i in range(num_scenes):
+        image_file = output_dir / f"scene_{i + 1:02d}.png"
+        audio_file = output_dir / f"scene_{i + 1:02d}_{seconds_per_scene:.1f}s.mp3"
+        if not image_file.exists():
+            image_file.write_bytes(fake_png(size[0], size[1], seed + i))
+        if not audio_file.exists():
+            subprocess.run(
+                ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi',
+                 '-i', f"sine=frequency={220 + 110 * i}:duration={seconds_per_scene}",
+                 '-c:a', 'libmp3lame', '-b:a', '64k', str(audio_file)],
+                check=True
+            )
+        scenes.append({
+            "scene_number": i + 1,
+            "narration": paragraphs[i % len(paragraphs)][:60],
+            "image_file": str(image_file),
+            "audio_file": str(audio_file),
+            "duration_seconds": seconds_per_scene,
+        })
+    return scenes
+
+
+def make_bgm(output_file: Path, seconds: float = 5.0) -> Path:
+    """BGM用のトーンMP3を作成（既にあれば再利用、動画より短い場合はレンダラー側でループされる）"""
+    if not output_file.exists():
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', f"sine=frequency=440:duration={seconds}",
+             '-c:a', 'libmp3lame', '-b:a', '64k', str(output_file)],
+            check=True
+        )
+    return output_file
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+ベンチマークの計測ヘルパー
+
+各ベンチマークは別プロセス（spawn）で実行し、経過時間・スループット・ピークRSSを計測する。
+別プロセスにすることで、前のベンチマークのメモリ使用量やキャッシュの影響を受けない。
+"""
+
+from typing import Dict, Any, Callable, List, Optional
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import traceback
+
+
+def _peak_rss_mb(who) -> float:
+    # Linux は KB、macOS は バイト
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _child_main(conn, func: Callable[..., Dict[str, Any]], args: tuple, repeat: int, quiet: bool) -> None:
+    if quiet:
+        # 処理ログ（printやmoviepyの進捗バー）を捨てる（ffmpegなどの子プロセスにも引き継がれる）
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+    try:
+        best = float('inf')
+        metrics: Dict[str, Any] = {}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            metrics = func(*args) or {}
+            # 準備処理を除いた時間を関数が返した場合はそちらを使う
+            elapsed = metrics.pop("seconds", time.perf_counter() - start)
+            best = min(best, elapsed)
+        conn.send({
+            "ok": True,
+            "seconds": best,
+            "metrics": metrics,
+            "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+            "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        })
+    except BaseException as e:
+        conn.send({"ok": False, "error": f"{e}\n{traceback.format_exc()}"})
+    finally:
+        conn.close()
+
+
+def run_isolated(
+    func: Callable[..., Dict[str, Any]],
+    *args,
+    repeat: int = 1,
+    timeout: Optional[float] = None,
+    quiet: bool = True
+) -> Dict[str, Any]:
+    """
+    funcを別プロセスで実行して計測
+
+    Args:
+        func: ベンチマーク関数（モジュールのトップレベル関数）。戻り値は
+            {'units': 処理量, 'unit': 単位名, ...} の辞書（スループットの計算に使う）。
+            'seconds' を含めた場合は、その値を計測時間とする（準備処理を除く場合）
+        *args: funcの引数（pickle可能な値）
+        repeat: 繰り返し回数（最良値を採用）
+        timeout: タイムアウト（秒）
+        quiet: True の場合、ベンチマーク中の標準出力・標準エラーを捨てる
+
+    Returns:
+        {'ok', 'seconds', 'throughput', 'unit', 'peak_rss_mb', 'peak_child_rss_mb', 'metrics'}
+        失敗時は {'ok': False, 'error'}
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child_main, args=(child_conn, func, args, repeat, quiet))
+    process.start()
+    child_conn.close()
+
+    if not parent_conn.poll(timeout):
+        process.terminate()
+        process.join()
+        return {"ok": False, "error": f"タイムアウト（{timeout}秒）"}
+
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {"ok": False, "error": f"ベンチマークのプロセスが異常終了しました（終了コード {process.exitcode}）"}
+    process.join()
+
+    if result["ok"]:
+        metrics = result["metrics"]
+        units = metrics.get("units")
+        result["unit"] = metrics.get("unit", "")
+        result["throughput"] = units / result["seconds"] if units and result["seconds"] > 0 else None
+    return result
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """結果を表形式の文字列にする"""
+    lines = [
+        f"  {'ベンチマーク':32s} {'時間':>10s} {'スループット':>22s} {'ピークRSS':>10s} {'子プロセス':>10s}",
+    ]
+    for result in results:
+        if not result["ok"]:
+            first_line = result["error"].split("\n", 1)[0]
+            lines.append(f"  {result['name']:32s} ❌ {first_line}")
+            continue
+        value = result["throughput"]
+        throughput = f"{value:,.1f} {result['unit']}/秒" if value and value >= 10 else (
+            f"{value:.3g} {result['unit']}/秒" if value else "-")
+        lines.append(
+            f"  {result['name']:32s} {result['seconds']:9.3f}s {throughput:>22s} "
+            f"{result['peak_rss_mb']:8.1f}MB {result['peak_child_rss_mb']:8.1f}MB"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+バックグラウンドジョブの進捗表示（各ページ共通）
+
+ページはジョブを投入してジョブIDを st.session_state に保存し、
+show_job_progress() で進捗を表示する。実行中は一定間隔で再実行して表示を更新する。
+
+ジョブには get_owner_id()（ブラウザのタブごとの識別子、URLの ?owner= に保存）を記録し、
+再接続時は同じタブから投入したジョブだけを復元する（別のセッションのジョブを取り込まない）。
+"""
+
+import streamlit as st
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+from backend import job_runner
+
+# 実行中のジョブの表示を更新する間隔（秒）
+POLL_INTERVAL = 1.0
+
+STATUS_LABELS = {
+    job_runner.STATUS_QUEUED: "⏳ 待機中",
+    job_runner.STATUS_RUNNING: "🔄 実行中",
+    job_runner.STATUS_SUCCEEDED: "✅ 完了",
+    job_runner.STATUS_FAILED: "❌ 失敗",
+    job_runner.STATUS_CANCELLED: "⏹️ キャンセル",
+    job_runner.STATUS_ORPHANED: "⚠️ 中断",
+}
+
+
+def get_owner_id() -> str:
+    """
+    このブラウザのタブの識別子（ジョブの owner）
+
+    session_state にない場合（再読み込み・再接続）は URL の ?owner= から復元し、
+    それもない場合は新しく作る。URLに残すため、同じタブで開き直しても同じ値になる。
+    """
+    owner = st.session_state.get('job_owner_id') or st.query_params.get('owner')
+    if not owner:
+        owner = uuid.uuid4().hex
+    st.session_state.job_owner_id = owner
+    if st.query_params.get('owner') != owner:
+        st.query_params['owner'] = owner
+    return owner
+
+
+def restore_job_id(state_key: str, kind: str, book_name: Optional[str] = None) -> Optional[str]:
+    """
+    ページに対応するジョブIDを取得
+
+    session_stateにない場合（ブラウザの再接続など）は、このタブ（get_owner_id()）から投入した
+    ジョブのうち、実行中または結果を未反映の最新ジョブをジョブテーブルから探す。
+
+    Args:
+        state_key: ジョブIDを保存するsession_stateのキー
+        kind: ジョブの種類
+        book_name: 書籍名
+
+    Returns:
+        ジョブID。該当するジョブがない場合はNone
+    """
+    if st.session_state.get(state_key):
+        return st.session_state[state_key]
+
+    job = job_runner.find_pending_job(kind, book_name, owner=get_owner_id())
+    if job:
+        st.session_state[state_key] = job['id']
+        return job['id']
+
+    return None
+
+
+def show_job_progress(job_id: str, state_key: str) -> Optional[Dict[str, Any]]:
+    """
+    ジョブの進捗を表示
+
+    実行中はキャンセルボタンを表示し、POLL_INTERVAL秒後にページを再実行する（この関数から戻らない）。
+
+    Args:
+        job_id: ジョブID
+        state_key: ジョブIDを保存しているsession_stateのキー（終了後の後始末用）
+
+    Returns:
+        終了したジョブの情報
+    """
+    job = job_runner.get_job(job_id)
+    if job is None:
+        st.session_state.pop(state_key, None)
+        st.warning("⚠️ ジョブが見つかりません")
+        return None
+
+    if job['status'] in job_runner.ACTIVE_STATUSES:
+        # アプリの再起動で残った実行中ジョブを整理
+        job_runner.mark_orphaned_jobs()
+        job = job_runner.get_job(job_id)
+
+    label = STATUS_LABELS.get(job['status'], job['status'])
+
+    if job['status'] in job_runner.ACTIVE_STATUSES:
+        st.progress(job['progress'], text=f"{label}: {job['message'] or job['stage'] or '開始待ち'}")
+
+        if job['cancel_requested']:
+            st.caption("⏹️ キャンセルを要求しました（現在の処理が終わり次第中断します）")
+        elif st.button("⏹️ キャンセル", key=f"cancel_{job_id}"):
+            job_runner.cancel_job(job_id)
+            st.rerun()
+
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
+    st.session_state.pop(state_key, None)
+    job_runner.acknowledge_job(job_id)
+
+    if job['status'] == job_runner.STATUS_FAILED:
+        first_line = (job['error'] or '').split('\n', 1)[0]
+        st.error(f"❌ エラーが発生しました: {first_line}")
+        with st.expander("詳細"):
+            st.code(job['error'] or "")
+    elif job['status'] in (job_runner.STATUS_CANCELLED, job_runner.STATUS_ORPHANED):
+        st.warning(f"{label}: {job['message'] or 'ジョブは完了しませんでした'}")
+
+    return job
+
+
+# 計測結果の表に表示するジョブ（処理順）
+TRACE_JOB_KINDS = [
+    ("analyze_book", "書籍分析"),
+    ("storyboard", "シーン分割・画像生成"),
+    ("fill_images", "不足画像の生成"),
+    ("narration", "ナレーション音声"),
+    ("render_video", "動画生成"),
+]
+
+
+def show_trace_summary(book_name: str) -> None:
+    """
+    書籍の各ジョブ（最後に成功したもの）の処理時間とAPIコストを表で表示
+
+    Args:
+        book_name: 書籍名
+    """
+    rows = []
+    for kind, label in TRACE_JOB_KINDS:
+        jobs = [
+            job for job in job_runner.list_jobs(kind=kind, book_name=book_name, limit=10)
+            if job['status'] == job_runner.STATUS_SUCCEEDED
+        ]
+        if not jobs:
+            continue
+        for row in job_runner.get_job_trace(jobs[0]['id']):
+            rows.append({
+                "ジョブ": label,
+                "区間": row['name'],
+                "回数": row['count'],
+                "経過時間(秒)": row['wall_seconds'],
+                "CPU時間(秒)": round(row['cpu_seconds'] + row['child_cpu_seconds'], 2),
+                "API呼び出し": row['api_calls'],
+                "トークン(入/出)": f"{row['tokens_in']}/{row['tokens_out']}" if row['tokens_in'] or row['tokens_out'] else "",
+                "文字数": row['characters'] or "",
+                "入出力(MB)": round((row['bytes_in'] + row['bytes_out']) / (1024 * 1024), 2),
+                "推定コスト($)": row['cost_usd'],
+                "kind": row['kind'],
+            })
+
+    if not rows:
+        st.caption("計測結果はまだありません")
+        return
+
+    total_cost = sum(row["推定コスト($)"] for row in rows if row["kind"] == "job")
+    total_seconds = sum(row["経過時間(秒)"] for row in rows if row["kind"] == "job")
+    col1, col2 = st.columns(2)
+    col1.metric("合計処理時間", f"{total_seconds:.1f} 秒")
+    col2.metric("推定APIコスト", f"${total_cost:.3f}")
+
+    st.dataframe([{k: v for k, v in row.items() if k != "kind"} for row in rows], use_container_width=True, hide_index=True)
+    st.caption("コストは backend/tracing.py の PRICING による推定値です。CPU時間にはffmpegなどの子プロセスを含みます。")
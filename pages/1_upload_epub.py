@@ -12,7 +12,8 @@ import sys
 # backend モジュールのパスを追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend import book_analyzer
+from backend import book_analyzer, chunk_planner, job_runner
+from job_ui import get_owner_id, restore_job_id, show_job_progress
 
 st.set_page_config(
     page_title="1️⃣ EPUBアップロード＆概要抽出",
@@ -77,57 +78,69 @@ with col_left:
         help="EPUB形式の電子書籍ファイルに対応しています"
     )
 
+    # 実行中（または結果未反映）の分析ジョブ
+    analyze_job_id = restore_job_id("analyze_job_id", "analyze_book")
+    if analyze_job_id:
+        st.markdown('<div class="process-step">📚 書籍を分析中（テキスト抽出→チャンク化→チャンクまとめ→全体概要）</div>', unsafe_allow_html=True)
+        job = show_job_progress(analyze_job_id, "analyze_job_id")
+        if job and job['status'] == job_runner.STATUS_SUCCEEDED:
+            # セッション状態に保存
+            st.session_state.book_analysis = job['result']
+            st.session_state.current_step = 2
+            st.success("✅ 書籍分析が完了しました！")
+            st.balloons()
+            st.rerun()
+
     if uploaded_file:
         st.success(f"✅ {uploaded_file.name}")
         st.info(f"📊 サイズ: {uploaded_file.size / 1024:.1f} KB")
 
-        # 解析＆概要生成ボタン
-        if st.button("🚀 解析して概要を生成", type="primary", use_container_width=True):
-
-            progress_placeholder = st.empty()
-            status_placeholder = st.empty()
-
-            try:
-                # EPUBファイルを保存
-                output_dir = Path("data/raw")
-                output_dir.mkdir(parents=True, exist_ok=True)
-
-                epub_path = output_dir / uploaded_file.name
-                with open(epub_path, 'wb') as f:
-                    f.write(uploaded_file.read())
-
-                # プログレス表示用コンテナ
-                progress_container = st.container()
-
-                with progress_container:
-                    # Step 1: テキスト抽出
-                    st.markdown('<div class="process-step">📄 Step 1/4: テキスト抽出中...</div>', unsafe_allow_html=True)
-
-                    # Step 2: チャンク化（book_analyzer内で実行）
-                    st.markdown('<div class="process-step">🔍 Step 2/4: チャンク化中...</div>', unsafe_allow_html=True)
-
-                    # Step 3: チャンクまとめ（book_analyzer内で実行）
-                    st.markdown('<div class="process-step">📝 Step 3/4: 各チャンクをまとめ中...</div>', unsafe_allow_html=True)
-
-                    # Step 4: 全体概要生成（book_analyzer内で実行）
-                    st.markdown('<div class="process-step">✨ Step 4/4: 全体概要を生成中...</div>', unsafe_allow_html=True)
-
-                # 新しいbook_analyzerを使用（チャンク化→チャンクまとめ→論文形式概要まで全自動）
-                result = book_analyzer.analyze_book(epub_path, output_dir)
+        # 分析モード（全文のチャンクまとめ / 各章の抜粋から1回で概要）
+        mode = st.radio(
+            "分析モード",
+            list(book_analyzer.ANALYSIS_MODES),
+            index=list(book_analyzer.ANALYSIS_MODES).index(book_analyzer.DEFAULT_ANALYSIS_MODE),
+            format_func=lambda key: book_analyzer.ANALYSIS_MODES[key],
+            help="高速: 各章から均等に抜き出した抜粋を1回のAPI呼び出しで要約します（長い書籍でも数秒～数十秒）"
+        )
 
-                # セッション状態に保存
-                st.session_state.book_analysis = result
-                st.session_state.current_step = 2
+        # まとめの品質（チャンクの大きさ＝API呼び出し回数を決める）
+        quality = st.radio(
+            "まとめの品質",
+            list(chunk_planner.QUALITY_PRESETS),
+            index=list(chunk_planner.QUALITY_PRESETS).index(chunk_planner.DEFAULT_QUALITY),
+            format_func=lambda key: chunk_planner.QUALITY_PRESETS[key]["label"],
+            horizontal=True,
+            disabled=(mode == "fast"),
+            help="高品質: チャンクを小さくして細かい内容まで残す / 高速: チャンクを大きくしてAPI呼び出しを減らす"
+        )
 
-                progress_placeholder.empty()
-                status_placeholder.success("✅ 書籍分析が完了しました！")
-                st.balloons()
-                st.rerun()
+        # 同じ本（ファイル名違い）・新しい版の保存済みの分析結果を使うか
+        reuse = st.checkbox(
+            "保存済みの分析を再利用",
+            value=True,
+            help="本文が同じ本は保存済みの概要をそのまま使い、新しい版は内容が変わった章だけをまとめ直します"
+        )
 
-            except Exception as e:
-                progress_placeholder.empty()
-                status_placeholder.error(f"❌ エラー: {str(e)}")
-                st.exception(e)
+        # 解析＆概要生成ボタン
+        if st.button("🚀 解析して概要を生成", type="primary", use_container_width=True):
+            # EPUBファイルを保存
+            output_dir = Path("data/raw")
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            epub_path = output_dir / uploaded_file.name
+            with open(epub_path, 'wb') as f:
+                f.write(uploaded_file.read())
+
+            # チャンク化→チャンクまとめ→論文形式概要までバックグラウンドで実行
+            st.session_state.analyze_job_id = job_runner.submit_job(
+                "analyze_book",
+                {'epub_path': str(epub_path.resolve()), 'output_dir': str(output_dir.resolve()),
+                 'quality': quality, 'mode': mode, 'reuse': reuse},
+                book_name=epub_path.stem,
+                owner=get_owner_id()
+            )
+            st.rerun()
 
     else:
         st.markdown("""
@@ -155,7 +168,27 @@ with col_right:
         with col_b:
             st.metric("文字数", f"{result['character_count']:,}")
         with col_c:
-            st.metric("チャンク数", result['num_chunks'])
+            if result.get('mode') == "fast":
+                st.metric("章数", len(result.get('chapters', [])))
+            else:
+                st.metric("チャンク数", result['num_chunks'])
+        if result.get('chunk_plan'):
+            st.caption(f"🔮 {chunk_planner.format_plan(result['chunk_plan'])}")
+        reused_from = result.get('reused_from')
+        if reused_from and reused_from['match'] == "exact":
+            st.caption(f"♻️ 本文が同じ「{reused_from['book_name']}」の分析結果を再利用（{reused_from['created_at'][:16]}）")
+        elif reused_from:
+            st.caption(f"♻️ 近い本「{reused_from['book_name']}」のまとめを再利用"
+                       f"（{reused_from['matched_chapters']}章が一致）")
+        report = result.get('summary_report') or {}
+        if report.get('api_calls_avoided'):
+            st.caption(f"♻️ API呼び出しを{report['api_calls_avoided']}回省略"
+                       f"（保存済みのまとめ {report['checkpoints_reused']}個・ほぼ同じ内容のチャンク {report['near_duplicates']}個"
+                       f"・前の版のまとめ {report.get('chunks_reused', 0)}個）")
+        if result.get('excerpt') and result['excerpt']['coverage'] < 1.0:
+            excerpt = result['excerpt']
+            st.caption(f"⚡ 高速モード: {excerpt['num_chapters']}章から{excerpt['num_samples']}か所を抜粋"
+                       f"（{excerpt['characters']:,}文字・全体の{excerpt['coverage']:.0%}）して概要を生成")
 
         st.markdown("---")
 
@@ -183,11 +216,12 @@ with col_right:
                 st.write(f"- {topic}")
 
         # チャンクまとめを表示（デバッグ・確認用）
-        with st.expander("🔍 チャンクまとめ（詳細）"):
-            for i, chunk_summary in enumerate(result['chunk_summaries']):
-                st.markdown(f"**チャンク{i+1}:**")
-                st.write(chunk_summary)
-                st.markdown("---")
+        if result['chunk_summaries']:
+            with st.expander("🔍 チャンクまとめ（詳細）"):
+                for i, chunk_summary in enumerate(result['chunk_summaries']):
+                    st.markdown(f"**チャンク{i+1}:**")
+                    st.write(chunk_summary)
+                    st.markdown("---")
 
         st.markdown("---")
 
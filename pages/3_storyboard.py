@@ -11,7 +11,8 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend import scene_splitter, image_generator_v2, session_manager
+from backend import image_generator_v2, job_runner
+from job_ui import get_owner_id, restore_job_id, show_job_progress
 
 st.set_page_config(
     page_title="3️⃣ ストーリーボード",
@@ -94,77 +95,37 @@ if 'scenes' not in st.session_state:
     **推定処理時間:** 約{num_scenes * 30}秒～{num_scenes * 60}秒
     """)
 
-    if st.button("🚀 シーン分割＆画像生成を開始", type="primary", use_container_width=True):
-        # プログレスバー
-        progress_container = st.container()
-
-        with progress_container:
-            # Step 1: シーン分割
-            status_text = st.empty()
-            status_text.markdown("### 📝 Step 1/2: シーン分割中...")
-
-            try:
-                scenes = scene_splitter.split_into_scenes(scenario, num_scenes)
-                scene_splitter.save_scenes(scenes, scenario['book_name'])
-                st.session_state.scenes = scenes
-
-                status_text.success(f"✅ {len(scenes)}シーンに分割完了")
-
-                # Step 2: 画像生成
-                status_text.markdown("### 🎨 Step 2/2: 各シーンの画像を生成中...")
-
-                progress_bar = st.progress(0)
-                scene_images = {}
-
-                for idx, scene in enumerate(scenes):
-                    scene_num = scene['scene_number']
-                    st.write(f"🎨 シーン{scene_num}の画像を生成中... ({idx + 1}/{len(scenes)})")
-
-                    try:
-                        # 画像生成（v2を使用）
-                        generated_path = image_generator_v2.generate_image_for_scene(
-                            scene_prompt=scene['image_prompt'],
-                            book_name=scenario['book_name'],
-                            scene_number=scene_num,
-                            visual_style=scenario.get('visual_style', 'Cinematic'),
-                            aspect_ratio=scenario.get('aspect_ratio', '9:16')
-                        )
-
-                        scene_images[scene_num] = generated_path
-
-                        # 途中経過を保存（エラー時も復元可能に）
-                        st.session_state.scene_images = scene_images
-                        session_manager.save_session_state({
-                            'scenes': scenes,
-                            'scene_images': scene_images,
-                            'selected_scenario': scenario
-                        }, scenario['book_name'])
-
-                    except Exception as e:
-                        st.error(f"❌ シーン{scene_num}でエラー: {str(e)}")
-                        # エラーが出ても途中まで保存
-                        st.session_state.scene_images = scene_images
-                        session_manager.save_session_state({
-                            'scenes': scenes,
-                            'scene_images': scene_images,
-                            'selected_scenario': scenario,
-                            'error_at_scene': scene_num
-                        }, scenario['book_name'])
-
-                    progress_bar.progress((idx + 1) / len(scenes))
-
-                st.session_state.scene_images = scene_images
-                st.session_state.current_step = 4
-
-                status_text.empty()
-                progress_bar.empty()
-                st.success("✅ すべての処理が完了しました！")
-                st.balloons()
-                st.rerun()
+    # 実行中（または結果未反映）のジョブ
+    storyboard_job_id = restore_job_id("storyboard_job_id", "storyboard", scenario['book_name'])
+    if storyboard_job_id:
+        job = show_job_progress(storyboard_job_id, "storyboard_job_id")
+        if job and job['status'] == job_runner.STATUS_SUCCEEDED:
+            result = job['result']
+            st.session_state.scenes = result['scenes']
+            st.session_state.scene_images = {int(k): Path(v) for k, v in result['scene_images'].items()}
+            st.session_state.current_step = 4
+
+            if result['errors']:
+                for scene_num, error in result['errors'].items():
+                    st.error(f"❌ シーン{scene_num}でエラー: {error}")
+                st.info("画像を生成できなかったシーンは、シーン一覧から個別に生成できます")
+                if st.button("➡️ シーン一覧へ", type="primary", use_container_width=True):
+                    st.rerun()
+                st.stop()
+
+            st.success("✅ すべての処理が完了しました！")
+            st.balloons()
+            st.rerun()
 
-            except Exception as e:
-                st.error(f"❌ エラーが発生しました: {str(e)}")
-                st.exception(e)
+    if st.button("🚀 シーン分割＆画像生成を開始", type="primary", use_container_width=True):
+        # シーン分割と画像生成をバックグラウンドで実行（途中経過はセッションにも保存される）
+        st.session_state.storyboard_job_id = job_runner.submit_job(
+            "storyboard",
+            {'scenario': scenario, 'num_scenes': num_scenes},
+            book_name=scenario['book_name'],
+            owner=get_owner_id()
+        )
+        st.rerun()
 
     st.stop()
 
@@ -180,7 +141,7 @@ with col_header:
 with col_regen:
     if st.button("🔄 ストーリーボード再生成", use_container_width=True, help="Step 2の設定で新しくシーンと画像を生成"):
         # 確認ダイアログ
-        st.warning("⚠️ 現在のシーンと画像がすべて削除され、新しく生成されます。")
+        st.warning("⚠️ 現在のシーンと画像がすべて削除され、新しく生成されます。足りない画像を補うだけなら「🧩 不足分だけ生成」を使ってください。")
         col_confirm1, col_confirm2 = st.columns(2)
         with col_confirm1:
             if st.button("✅ はい、再生成する", type="primary", use_container_width=True):
@@ -200,6 +161,51 @@ total_duration = sum(scene['duration_seconds'] for scene in scenes)
 
 st.info(f"🎬 全{len(scenes)}シーン / ⏱️ 合計推定時間: {total_duration}秒")
 
+# 不足している画像だけを生成（未生成・失敗・ファイルが消えた・壊れたシーン）
+fill_job_id = restore_job_id("fill_images_job_id", "fill_images", scenario['book_name'])
+if fill_job_id:
+    job = show_job_progress(fill_job_id, "fill_images_job_id")
+    if job and job['status'] == job_runner.STATUS_SUCCEEDED:
+        result = job['result']
+        st.session_state.scene_images = {int(k): Path(v) for k, v in result['scene_images'].items()}
+        st.session_state.fill_images_report = result
+        st.rerun()
+
+if 'fill_images_report' in st.session_state:
+    report = st.session_state.pop('fill_images_report')
+    st.success(
+        f"✅ {len(report['generated'])}シーンの画像を生成しました（{report['seconds']:.0f}秒）"
+        f" / 既存の画像を使用: {len(report['reused'])}シーン"
+        f"（節約: API呼び出し{report['saved_api_calls']}回・約{report['saved_seconds']:.0f}秒・${report['saved_cost_usd']:.2f}）"
+    )
+    for scene_num, error in report['errors'].items():
+        st.error(f"❌ シーン{scene_num}でエラー: {error}")
+
+missing_scenes = image_generator_v2.find_missing_scenes(scenes, st.session_state.scene_images)
+missing_numbers = {scene['scene_number'] for scene in missing_scenes}
+
+if missing_scenes and not fill_job_id:
+    col_missing, col_fill = st.columns([3, 1])
+    with col_missing:
+        st.warning(
+            f"⚠️ {len(missing_scenes)}シーンの画像がありません: "
+            + ", ".join(f"シーン{num}" for num in sorted(missing_numbers))
+        )
+    with col_fill:
+        if st.button(f"🧩 不足分だけ生成（{len(missing_scenes)}シーン）", type="primary", use_container_width=True,
+                     help="既存の画像はそのまま使い、足りないシーンの画像だけを同時に生成"):
+            st.session_state.fill_images_job_id = job_runner.submit_job(
+                "fill_images",
+                {
+                    'scenario': scenario,
+                    'scenes': scenes,
+                    'scene_images': {num: str(path) for num, path in st.session_state.scene_images.items()}
+                },
+                book_name=scenario['book_name'],
+                owner=get_owner_id()
+            )
+            st.rerun()
+
 # 各シーンカード（縦並び、左に小さい画像、右にナレーション）
 for scene in scenes:
     scene_num = scene['scene_number']
@@ -214,7 +220,7 @@ for scene in scenes:
         with col_image:
             st.markdown(f"**🎬 シーン {scene_num}**")
 
-            if scene_num in st.session_state.scene_images:
+            if scene_num not in missing_numbers:
                 image_path = st.session_state.scene_images[scene_num]
                 st.image(str(image_path), use_container_width=True)
 
@@ -318,7 +324,7 @@ st.markdown("---")
 
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
-    all_images_ready = all(scene['scene_number'] in st.session_state.scene_images for scene in scenes)
+    all_images_ready = not missing_scenes
 
     if all_images_ready:
         if st.button("➡️ 次へ：音声・BGM設定", type="primary", use_container_width=True):
@@ -11,7 +11,8 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend import tts_engine_v2, bgm_manager_v2, session_manager
+from backend import bgm_manager_v2, job_runner
+from job_ui import get_owner_id, restore_job_id, show_job_progress
 
 st.set_page_config(
     page_title="5️⃣ 音声・BGM設定",
@@ -133,41 +134,36 @@ with st.container():
         OpenAI TTSを使用して、高品質な日本語ナレーションを生成します。
         """)
 
+        # 実行中（または結果未反映）のジョブ
+        narration_job_id = restore_job_id("narration_job_id", "narration", scenario['book_name'])
+        if narration_job_id:
+            job = show_job_progress(narration_job_id, "narration_job_id")
+            if job and job['status'] == job_runner.STATUS_SUCCEEDED:
+                st.session_state.scene_audio = {
+                    int(k): Path(v) for k, v in job['result']['scene_audio'].items()
+                }
+                st.session_state.voice_settings = job['result']['voice_settings']
+
+                st.success("✅ ナレーション音声を生成しました！")
+                st.balloons()
+                st.rerun()
+
         if st.button("🚀 ナレーション音声を生成", type="primary", use_container_width=True):
-            with st.spinner("🎤 ナレーション音声を生成中..."):
-                try:
-                    # v2を使用（各シーンのナレーションから音声を生成）
-                    scene_audio = tts_engine_v2.synthesize_narration_for_scenes(
-                        scenes=scenes,
-                        book_name=scenario['book_name'],
-                        voice=voice_name,
-                        speed=voice_speed,
-                        model=voice_model
-                    )
-
-                    st.session_state.scene_audio = scene_audio
-                    st.session_state.voice_settings = {
-                        'voice_name': voice_name,
-                        'voice_model': voice_model,
-                        'voice_speed': voice_speed
-                    }
-
-                    # セッション保存
-                    session_manager.save_session_state({
-                        'scenes': scenes,
-                        'scene_images': st.session_state.scene_images,
-                        'scene_audio': scene_audio,
-                        'selected_scenario': scenario,
-                        'voice_settings': st.session_state.voice_settings
-                    }, scenario['book_name'])
-
-                    st.success("✅ ナレーション音声を生成しました！")
-                    st.balloons()
-                    st.rerun()
-
-                except Exception as e:
-                    st.error(f"❌ エラーが発生しました: {str(e)}")
-                    st.exception(e)
+            # 各シーンのナレーションから音声をバックグラウンドで生成（完了時にセッションも保存される）
+            st.session_state.narration_job_id = job_runner.submit_job(
+                "narration",
+                {
+                    'scenario': scenario,
+                    'scenes': scenes,
+                    'scene_images': {k: str(v) for k, v in st.session_state.scene_images.items()},
+                    'voice_name': voice_name,
+                    'voice_model': voice_model,
+                    'voice_speed': voice_speed
+                },
+                book_name=scenario['book_name'],
+                owner=get_owner_id()
+            )
+            st.rerun()
     else:
         st.success("✅ ナレーション音声生成済み")
 
@@ -218,6 +214,25 @@ with st.container():
 
         st.session_state.subtitle_colors = color_mapping[subtitle_color]
 
+    subtitle_output = st.radio(
+        "字幕の出力方法",
+        ["動画に焼き込み", "ソフト字幕（MP4）", "ソフト字幕（MKV）", "字幕ファイルを別途出力"],
+        index=0,
+        horizontal=True,
+        help="焼き込み: どのプレイヤーでも表示（再エンコードあり）\n"
+             "ソフト字幕: 字幕を動画に格納（再エンコードなし、MP4はスタイルなし・MKVはカラオケ表示可）\n"
+             "別途出力: 字幕なし動画とASS/SRTファイルを出力"
+    )
+
+    subtitle_output_mapping = {
+        "動画に焼き込み": ("burn", "mp4"),
+        "ソフト字幕（MP4）": ("soft", "mp4"),
+        "ソフト字幕（MKV）": ("soft", "mkv"),
+        "字幕ファイルを別途出力": ("sidecar", "mp4")
+    }
+
+    st.session_state.subtitle_output, st.session_state.soft_container = subtitle_output_mapping[subtitle_output]
+
 # BGM設定
 st.markdown("---")
 st.subheader("🎵 BGM設定")
@@ -11,7 +11,8 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend import video_renderer_v2, bgm_manager_v2
+from backend import job_runner
+from job_ui import get_owner_id, restore_job_id, show_job_progress, show_trace_summary
 
 st.set_page_config(
     page_title="6️⃣ 完成",
@@ -79,10 +80,95 @@ scene_audio = st.session_state.scene_audio
 
 st.info(f"📁 書籍: **{scenario['book_name']}** / 全{len(scenes)}シーン")
 
+
+def submit_final_video_job() -> str:
+    """
+    現在の設定で最終動画を生成するジョブ（BGM・字幕まで）を投入
+
+    字幕なしマスター動画（BGMミックス済み）はレンダラー側でキャッシュされるため、
+    字幕設定のみを変更した場合は字幕の生成と合成だけが実行される。
+
+    Returns:
+        ジョブID
+    """
+    # シーンデータと画像・音声パスを準備
+    storyboard_data = {
+        'book_name': scenario['book_name'],
+        'scenes': [],
+        'total_scenes': len(scenes),
+        'aspect_ratio': scenario.get('aspect_ratio', '9:16')
+    }
+
+    for scene in scenes:
+        scene_num = scene['scene_number']
+        image_path = st.session_state.scene_images.get(scene_num)
+        audio_path = scene_audio.get(scene_num)
+
+        if image_path and audio_path:
+            storyboard_data['scenes'].append({
+                'scene_number': scene_num,
+                'narration': scene['narration'],
+                'image_file': str(image_path),
+                'audio_file': str(audio_path),
+                'duration_seconds': scene['duration_seconds']
+            })
+
+    # 動画レンダリング設定（v2使用）
+    render_settings = {
+        'subtitle_type': st.session_state.get('subtitle_type', 'normal'),
+        'subtitle_colors': list(st.session_state.get('subtitle_colors', ('FFFFFF', '00FFFF'))),
+        'use_ken_burns': st.session_state.get('use_ken_burns', False),
+        'ken_burns_type': st.session_state.get('ken_burns_type', 'ランダム'),
+        'ken_burns_intensity': st.session_state.get('ken_burns_intensity', 1.15),
+        'transition_type': st.session_state.get('transition_type', 'クロスフェード'),
+        'transition_duration': st.session_state.get('transition_duration', 0.8),
+        'subtitle_output': st.session_state.get('subtitle_output', 'burn'),
+        'soft_container': st.session_state.get('soft_container', 'mp4')
+    }
+
+    # BGM設定
+    bgm = None
+    if st.session_state.get('use_bgm') and st.session_state.get('selected_bgm'):
+        bgm = {
+            'file': str(st.session_state.selected_bgm),
+            'volume': st.session_state.get('bgm_volume', 0.15)
+        }
+
+    return job_runner.submit_job(
+        "render_video",
+        {'storyboard_data': storyboard_data, 'render_settings': render_settings, 'bgm': bgm},
+        book_name=scenario['book_name'],
+        owner=get_owner_id()
+    )
+
+
+def current_subtitle_settings() -> tuple:
+    """現在の字幕設定（再適用の要否判定用）"""
+    return (
+        st.session_state.get('subtitle_type', 'normal'),
+        list(st.session_state.get('subtitle_colors', ('FFFFFF', '00FFFF'))),
+        st.session_state.get('subtitle_output', 'burn'),
+        st.session_state.get('soft_container', 'mp4')
+    )
+
+
 # 動画生成
 st.markdown("---")
 st.subheader("🎬 動画生成")
 
+# 実行中（または結果未反映）の動画生成ジョブ
+render_job_id = restore_job_id("render_job_id", "render_video", scenario['book_name'])
+if render_job_id:
+    st.info("🎬 動画を生成中...（数分かかります）")
+    job = show_job_progress(render_job_id, "render_job_id")
+    if job and job['status'] == job_runner.STATUS_SUCCEEDED:
+        st.session_state.final_video = job['result']
+        st.session_state.current_step = 6
+
+        st.success("✅ 動画生成完了！")
+        st.balloons()
+        st.rerun()
+
 if 'final_video' not in st.session_state:
     st.markdown("""
     全てのシーン画像とナレーション音声を組み合わせて、最終動画を生成します。
@@ -97,71 +183,27 @@ if 'final_video' not in st.session_state:
     """)
 
     if st.button("🚀 最終動画を生成", type="primary", use_container_width=True):
-        with st.spinner("🎬 動画を生成中...（数分かかります）"):
-            try:
-                # シーンデータと画像・音声パスを準備
-                storyboard_data = {
-                    'book_name': scenario['book_name'],
-                    'scenes': [],
-                    'total_scenes': len(scenes),
-                    'aspect_ratio': scenario.get('aspect_ratio', '9:16')
-                }
-
-                for scene in scenes:
-                    scene_num = scene['scene_number']
-                    image_path = st.session_state.scene_images.get(scene_num)
-                    audio_path = scene_audio.get(scene_num)
-
-                    if image_path and audio_path:
-                        storyboard_data['scenes'].append({
-                            'scene_number': scene_num,
-                            'narration': scene['narration'],
-                            'image_file': str(image_path),
-                            'audio_file': str(audio_path),
-                            'duration_seconds': scene['duration_seconds']
-                        })
-
-                # 動画レンダリング（v2使用）
-                video_data = video_renderer_v2.render_video(
-                    storyboard_data,
-                    subtitle_type=st.session_state.get('subtitle_type', 'normal'),
-                    subtitle_colors=st.session_state.get('subtitle_colors', ('FFFFFF', '00FFFF')),
-                    use_ken_burns=st.session_state.get('use_ken_burns', False),
-                    ken_burns_type=st.session_state.get('ken_burns_type', 'ランダム'),
-                    ken_burns_intensity=st.session_state.get('ken_burns_intensity', 1.15),
-                    transition_type=st.session_state.get('transition_type', 'クロスフェード'),
-                    transition_duration=st.session_state.get('transition_duration', 0.8)
-                )
-
-                # BGM追加
-                if st.session_state.get('use_bgm') and st.session_state.get('selected_bgm'):
-                    st.info("🎵 BGMを追加中...")
-                    video_with_bgm = bgm_manager_v2.add_bgm(
-                        video_data['video_file'],
-                        st.session_state.selected_bgm,
-                        volume=st.session_state.get('bgm_volume', 0.15)
-                    )
-                    video_data['video_file'] = video_with_bgm['output_file']
-                    video_data['has_bgm'] = True
-                else:
-                    video_data['has_bgm'] = False
-
-                st.session_state.final_video = video_data
-                st.session_state.current_step = 6
-
-                st.success("✅ 動画生成完了！")
-                st.balloons()
-                st.rerun()
-
-            except Exception as e:
-                st.error(f"❌ エラーが発生しました: {str(e)}")
-                st.exception(e)
+        st.session_state.render_job_id = submit_final_video_job()
+        st.rerun()
 else:
     st.success("✅ 動画生成済み")
 
     video_data = st.session_state.final_video
     video_file = Path(video_data['video_file'])
 
+    # 字幕設定が変更された場合は、キャッシュ済みの字幕なし動画に字幕だけを再適用
+    generated_settings = (
+        video_data.get('subtitle_type'),
+        video_data.get('subtitle_colors'),
+        video_data.get('subtitle_output') or 'burn',
+        video_data.get('soft_container', 'mp4')
+    )
+    if generated_settings != current_subtitle_settings():
+        st.info("📝 字幕設定が変更されています。字幕なし動画を再利用して字幕だけを再適用できます。")
+        if st.button("📝 字幕のみ再適用", use_container_width=True):
+            st.session_state.render_job_id = submit_final_video_job()
+            st.rerun()
+
     # 動画プレビュー
     st.markdown("---")
     st.subheader("🎬 動画プレビュー")
@@ -195,11 +237,30 @@ else:
             label="📥 動画をダウンロード",
             data=video_bytes,
             file_name=video_file.name,
-            mime="video/mp4",
+            mime="video/x-matroska" if video_file.suffix == ".mkv" else "video/mp4",
             type="primary",
             use_container_width=True
         )
 
+        # 字幕ファイル（別途出力の場合）
+        if video_data.get('subtitle_output') == 'sidecar':
+            for subtitle_path in video_data.get('subtitle_files', []):
+                subtitle_path = Path(subtitle_path)
+                if subtitle_path.exists():
+                    st.download_button(
+                        label=f"📝 字幕ファイルをダウンロード（{subtitle_path.suffix[1:].upper()}）",
+                        data=subtitle_path.read_bytes(),
+                        file_name=subtitle_path.name,
+                        mime="text/plain",
+                        use_container_width=True,
+                        key=f"download_{subtitle_path.suffix}"
+                    )
+
+    # 処理時間とAPIコスト
+    st.markdown("---")
+    with st.expander("📊 処理時間とAPIコスト"):
+        show_trace_summary(scenario['book_name'])
+
     # 追加アクション
     st.markdown("---")
     st.subheader("🚀 次のアクション")